@@ -3,7 +3,7 @@ from .models import Configuracion
 
 @admin.register(Configuracion)
 class ConfiguracionAdmin(admin.ModelAdmin):
-    list_display = ('id', 'check_in_time', 'check_out_time')
+    list_display = ('id', 'check_in_time', 'check_out_time', 'minutos_expiracion_pendiente')
     list_display_links = ('id',)
     search_fields = ('check_in_time', 'check_out_time')
     
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class ConfiguracionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'configuraciones'
-    verbose_name = 'Configuraciones del Hotel' 
\ No newline at end of file
+    verbose_name = 'Configuraciones del Hotel'
+
+    def ready(self):
+        from . import signals  # noqa: F401
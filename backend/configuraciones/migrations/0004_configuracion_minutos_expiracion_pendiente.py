@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configuraciones', '0003_remove_configuracion_breakfast_included_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuracion',
+            name='minutos_expiracion_pendiente',
+            field=models.PositiveIntegerField(default=60),
+        ),
+    ]
@@ -1,8 +1,20 @@
+import copy
+
 from django.db import models
 
+from hotel_project import versiones
+
+CLAVE_VERSION = 'configuraciones:version'
+
+# Copia local del proceso; se descarta cuando cambia su versión (ver hotel_project/versiones.py)
+_local = {'version': None, 'config': None}
+
+
 class Configuracion(models.Model):
     check_in_time = models.TimeField(default='14:00')
     check_out_time = models.TimeField(default='12:00')
+    # Las reservas pendientes sin pagar expiran pasado este tiempo (ver habitaciones/estados.py)
+    minutos_expiracion_pendiente = models.PositiveIntegerField(default=60)
 
     class Meta:
         verbose_name = 'Configuración'
@@ -13,7 +25,17 @@ class Configuracion(models.Model):
 
     @classmethod
     def get_settings(cls):
-        config = cls.objects.first()
-        if not config:
-            config = cls.objects.create()
-        return config 
\ No newline at end of file
+        version, = versiones.leer(CLAVE_VERSION)
+        if _local['config'] is None or _local['version'] != version:
+            config = cls.objects.first()
+            if not config:
+                config = cls.objects.create()
+                # Los valores por defecto de las horas son cadenas hasta recargar
+                config.refresh_from_db()
+            _local['config'], _local['version'] = config, version
+        return copy.copy(_local['config'])
+
+    @classmethod
+    def invalidar_cache(cls):
+        """Obliga a todos los procesos a recargar la configuración en su próxima lectura."""
+        versiones.invalidar(CLAVE_VERSION)
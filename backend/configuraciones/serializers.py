@@ -4,4 +4,4 @@ from .models import Configuracion
 class ConfiguracionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Configuracion
-        fields = ['id', 'check_in_time', 'check_out_time'] 
\ No newline at end of file
+        fields = ['id', 'check_in_time', 'check_out_time', 'minutos_expiracion_pendiente'] 
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from hotel_project.versiones import invalidar_ahora_y_tras_commit
+
+from .models import Configuracion
+
+
+@receiver(post_save, sender=Configuracion)
+@receiver(post_delete, sender=Configuracion)
+def invalidar_configuracion(sender, **kwargs):
+    invalidar_ahora_y_tras_commit(Configuracion.invalidar_cache)
@@ -2,10 +2,11 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from .models import Configuracion
+from hotel_project.pruebas import DetectorConsultasMixin
 
 User = get_user_model()
 
-class ConfiguracionTests(APITestCase):
+class ConfiguracionTests(DetectorConsultasMixin, APITestCase):
     
     def setUp(self):
         self.admin_user = User.objects.create_user(
@@ -101,4 +102,41 @@ class ConfiguracionTests(APITestCase):
         
         # Deberían ser la misma instancia (primera en la base de datos)
         if Configuracion.objects.count() == 1:
-            self.assertEqual(config1.id, config2.id) 
\ No newline at end of file
+            self.assertEqual(config1.id, config2.id) 
+
+class ConfiguracionCacheTests(DetectorConsultasMixin, APITestCase):
+
+    def setUp(self):
+        Configuracion.invalidar_cache()
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            email='admin@test.com',
+            password='adminpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+
+    def test_get_settings_sin_consultas_despues_de_cargar(self):
+        """Prueba que las lecturas repetidas no consultan la base de datos"""
+        Configuracion.get_settings()
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                config = Configuracion.get_settings()
+        self.assertIsNotNone(config.check_in_time)
+
+    def test_get_settings_refleja_actualizacion_del_admin(self):
+        """Prueba que un cambio por la API se ve en la siguiente lectura"""
+        Configuracion.get_settings()
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.put('/api/configuraciones/', {
+            'check_in_time': '15:00',
+            'check_out_time': '11:00'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(str(Configuracion.get_settings().check_in_time), '15:00:00')
+
+    def test_get_settings_devuelve_copia(self):
+        """Prueba que modificar la instancia devuelta no altera la cacheada"""
+        config = Configuracion.get_settings()
+        config.check_in_time = '09:00'
+        self.assertNotEqual(str(Configuracion.get_settings().check_in_time), '09:00')
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import ReglaPrecio
 
-# Register your models here.
+
+@admin.register(ReglaPrecio)
+class ReglaPrecioAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'clase', 'tipo_habitacion', 'factor', 'prioridad', 'activa')
+    list_filter = ('clase', 'tipo_habitacion', 'activa')
+    search_fields = ('nombre',)
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
 
 
 class HabitacionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'habitaciones'
+
+    def ready(self):
+        from . import signals, tareas  # noqa: F401
+
+        # Con la primera petición y no aquí: migrate y los demás comandos no deben
+        # tocar la cola, y el esquema puede no estar al día todavía
+        if settings.HABITACIONES_IMAGENES_EN_PROCESO:
+            request_started.connect(tareas.recuperar_al_servir)
@@ -0,0 +1,9 @@
+"""
+Benchmarks reproducibles del backend:
+
+    python manage.py generar_datos       # datos sintéticos persistentes
+    python manage.py bench_escenarios    # escenarios cronometrados, resultados en JSON
+
+datos.py genera habitaciones y reservas con una semilla fija y escenarios.py define
+los escenarios que se miden con el cliente de pruebas de Django.
+"""
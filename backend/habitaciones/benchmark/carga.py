@@ -0,0 +1,246 @@
+"""
+Generador de carga HTTP contra un servidor en marcha (manage.py runserver, uvicorn,
+gunicorn...), solo con la biblioteca estándar.
+
+Cada usuario virtual es un hilo que se registra, inicia sesión y repite el
+recorrido buscar → reservar → pagar → check-in → check-out. Si un paso falla
+tras reservar, la reserva se cancela para no dejar la habitación ocupada.
+
+Las reservas que el servidor rechaza por no disponibilidad cuentan como
+conflictos, no como errores: con muchos usuarios sobre pocas habitaciones son
+lo esperado. Una doble reserva son dos reservas aceptadas sobre la misma
+habitación y noches que estuvieron activas a la vez con seguridad: la segunda
+se aceptó después de aceptarse la primera y antes de pedir su liberación.
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from hotel_project.metricas import PERCENTILES, percentil
+
+PASOS = ('buscar', 'reservar', 'pagar', 'checkin', 'checkout')
+PASSWORD = 'Carga-hotel-2024'
+MENSAJE_NO_DISPONIBLE = 'no está disponible'
+
+
+class Respuesta:
+
+    def __init__(self, status, datos, inicio, fin):
+        self.status = status
+        self.datos = datos
+        self.inicio = inicio
+        self.fin = fin
+
+
+class Cliente:
+    """Peticiones JSON con el token del usuario virtual."""
+
+    def __init__(self, base, timeout):
+        self.base = base.rstrip('/')
+        self.timeout = timeout
+        self.token = None
+
+    def pedir(self, metodo, ruta, datos=None):
+        cabeceras = {'Accept': 'application/json'}
+        cuerpo = None
+        if datos is not None:
+            cuerpo = json.dumps(datos).encode()
+            cabeceras['Content-Type'] = 'application/json'
+        if self.token:
+            cabeceras['Authorization'] = f'Bearer {self.token}'
+        peticion = urllib.request.Request(self.base + ruta, data=cuerpo, headers=cabeceras, method=metodo)
+
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(peticion, timeout=self.timeout) as r:
+                status, contenido = r.status, r.read()
+        except urllib.error.HTTPError as e:
+            status, contenido = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            status, contenido = None, b''
+        fin = time.perf_counter()
+        try:
+            datos = json.loads(contenido) if contenido else None
+        except ValueError:
+            datos = None
+        return Respuesta(status, datos, inicio, fin)
+
+
+class Resultados:
+    """Latencias y conteos de todos los usuarios virtuales, con acceso seguro entre hilos."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tiempos = defaultdict(list)
+        self.codigos = defaultdict(Counter)
+        self.errores = Counter()
+        self.conflictos = 0
+        self.recorridos = 0
+        self.recorridos_completos = 0
+        self.reservas = []
+
+    def anotar(self, paso, respuesta, ok):
+        with self.lock:
+            self.tiempos[paso].append((respuesta.fin - respuesta.inicio) * 1000)
+            self.codigos[paso][str(respuesta.status)] += 1
+            if not ok:
+                self.errores[paso] += 1
+
+    def conflicto(self):
+        with self.lock:
+            self.conflictos += 1
+
+    def recorrido(self, completo):
+        with self.lock:
+            self.recorridos += 1
+            self.recorridos_completos += completo
+
+    def reserva(self, reserva):
+        with self.lock:
+            self.reservas.append(reserva)
+
+    def dobles_reservas(self):
+        """Pares de reservas aceptadas que se solapan y estuvieron activas a la vez."""
+        por_habitacion = defaultdict(list)
+        for reserva in self.reservas:
+            por_habitacion[reserva['habitacion_id']].append(reserva)
+        dobles = []
+        for reservas in por_habitacion.values():
+            reservas.sort(key=lambda r: r['aceptada'])
+            for i, a in enumerate(reservas):
+                for b in reservas[i + 1:]:
+                    solapan = a['fecha_inicio'] < b['fecha_fin'] and b['fecha_inicio'] < a['fecha_fin']
+                    if solapan and b['pedida'] > a['aceptada'] and b['aceptada'] < a['liberada']:
+                        dobles.append((a['id'], b['id']))
+        return dobles
+
+    def resumen(self, duracion):
+        pasos = {}
+        for paso, tiempos in self.tiempos.items():
+            ordenados = sorted(tiempos)
+            pasos[paso] = {
+                'n': len(tiempos),
+                'errores': self.errores[paso],
+                **{f'p{p}_ms': round(percentil(ordenados, p), 2) for p in PERCENTILES},
+                'codigos': dict(sorted(self.codigos[paso].items())),
+            }
+        peticiones = sum(len(t) for t in self.tiempos.values())
+        return {
+            'duracion_s': round(duracion, 3),
+            'peticiones': peticiones,
+            'peticiones_por_s': round(peticiones / duracion, 1) if duracion else 0,
+            'recorridos': self.recorridos,
+            'recorridos_completos': self.recorridos_completos,
+            'recorridos_por_s': round(self.recorridos / duracion, 2) if duracion else 0,
+            'errores': sum(self.errores.values()),
+            'conflictos_reserva': self.conflictos,
+            'dobles_reservas': len(self.dobles_reservas()),
+            'pasos': pasos,
+        }
+
+
+class UsuarioVirtual:
+
+    def __init__(self, numero, opciones, resultados, prefijo):
+        self.numero = numero
+        self.opciones = opciones
+        self.resultados = resultados
+        self.azar = random.Random(opciones['semilla'] * 100_003 + numero)
+        self.cliente = Cliente(opciones['url'], opciones['timeout'])
+        self.username = f'{prefijo}_{numero}'
+
+    def paso(self, nombre, metodo, ruta, datos=None, esperado=200):
+        respuesta = self.cliente.pedir(metodo, ruta, datos)
+        ok = respuesta.status == esperado
+        self.resultados.anotar(nombre, respuesta, ok)
+        return respuesta if ok else None
+
+    def pensar(self):
+        if self.opciones['pensar']:
+            time.sleep(self.azar.uniform(0, self.opciones['pensar']))
+
+    def ejecutar(self):
+        registro = self.paso('registro', 'POST', '/api/registro/register/', {
+            'username': self.username,
+            'email': f'{self.username}@example.com',
+            'full_name': f'Usuario Carga {self.numero}',
+            'password': PASSWORD,
+            'confirm_password': PASSWORD,
+        }, esperado=201)
+        login = registro and self.paso('login', 'POST', '/api/registro/login/', {
+            'username': self.username, 'password': PASSWORD,
+        })
+        if not login:
+            return
+        self.cliente.token = login.datos['access']
+        for _ in range(self.opciones['iteraciones']):
+            self.pensar()
+            self.resultados.recorrido(self.recorrido())
+
+    def recorrido(self):
+        """Un recorrido completo; devuelve True si llegó al último paso pedido."""
+        pasos = self.opciones['pasos']
+        llegada = date.today() + timedelta(days=self.azar.randint(0, self.opciones['dias']))
+        salida = llegada + timedelta(days=self.azar.randint(1, self.opciones['noches']))
+        fechas = f'?fecha_inicio={llegada}&fecha_fin={salida}'
+
+        disponibles = self.paso('buscar', 'GET', f'/api/habitaciones/disponibles/{fechas}')
+        if not disponibles:
+            return False
+        if 'reservar' not in pasos:
+            return True
+        if not disponibles.datos:
+            return False
+        # Solo las primeras habitaciones libres, para que los usuarios compitan por ellas
+        candidatas = sorted(h['numero_habitacion'] for h in disponibles.datos)[:self.opciones['objetivo']]
+        numero = self.azar.choice(candidatas)
+        habitacion_id = next(h['id'] for h in disponibles.datos if h['numero_habitacion'] == numero)
+
+        self.pensar()
+        datos = {'habitacion_id': habitacion_id, 'fecha_inicio': str(llegada), 'fecha_fin': str(salida)}
+        respuesta = self.cliente.pedir('POST', '/api/reservas/', datos)
+        no_disponible = respuesta.status == 400 and MENSAJE_NO_DISPONIBLE in json.dumps(respuesta.datos, ensure_ascii=False)
+        self.resultados.anotar('reservar', respuesta, respuesta.status == 201 or no_disponible)
+        if no_disponible:
+            self.resultados.conflicto()
+        if respuesta.status != 201:
+            return False
+
+        reserva = {
+            'id': respuesta.datos['id'], 'habitacion_id': habitacion_id,
+            'fecha_inicio': llegada, 'fecha_fin': salida,
+            'pedida': respuesta.inicio, 'aceptada': respuesta.fin, 'liberada': float('inf'),
+        }
+        self.resultados.reserva(reserva)
+        ruta = f"/api/reservas/{reserva['id']}"
+        completo = True
+        for accion in pasos[pasos.index('reservar') + 1:]:
+            self.pensar()
+            if accion == 'checkout':
+                reserva['liberada'] = time.perf_counter()
+            if not self.paso(accion, 'POST', f'{ruta}/{accion}/'):
+                completo = False
+                break
+        if not completo or 'checkout' not in pasos:
+            reserva['liberada'] = time.perf_counter()
+            self.paso('cancelar', 'POST', f'{ruta}/cancelar/')
+        return completo
+
+
+def ejecutar(opciones):
+    """Lanza los usuarios virtuales; devuelve el resumen y los Resultados en bruto."""
+    prefijo = f"carga_{opciones['semilla']}_{int(time.time())}"
+    resultados = Resultados()
+    usuarios = [UsuarioVirtual(i, opciones, resultados, prefijo) for i in range(opciones['usuarios'])]
+    hilos = [threading.Thread(target=usuario.ejecutar) for usuario in usuarios]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados.resumen(time.perf_counter() - inicio), resultados
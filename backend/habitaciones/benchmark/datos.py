@@ -0,0 +1,161 @@
+"""
+Generador de datos sintéticos: habitaciones de todos los tipos y reservas repartidas
+en varios años, con estados coherentes con la fecha de cada reserva (pasadas con
+checkout, en curso con check-in, futuras pagadas o pendientes, y una parte
+canceladas o expiradas). Las reservas activas de una habitación no se solapan.
+
+Con la misma semilla y los mismos parámetros se generan los mismos datos, con
+fechas relativas al día en que se ejecuta.
+"""
+import random
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from hotel_project.versiones import invalidar_ahora_y_tras_commit
+
+from .. import cache, disponibilidad
+from ..models import Habitacion, OcupacionNoche, Reserva
+from ..ocupacion import noches
+
+User = get_user_model()
+
+PRECIOS = {'sencilla': 150000.0, 'doble': 220000.0, 'triple': 290000.0}
+PESOS_TIPOS = {'sencilla': 5, 'doble': 3, 'triple': 2}
+
+# Estados posibles según dónde cae la reserva respecto a hoy, con sus pesos
+ESTADOS_PASADAS = {'checkout': 85, 'cancelada': 12, 'expirada': 3}
+ESTADOS_EN_CURSO = {'checkin_aceptado': 90, 'cancelada': 10}
+ESTADOS_FUTURAS = {'pagada': 70, 'pendiente': 15, 'cancelada': 15}
+
+PREFIJO_CLIENTE = 'bench_cliente_'
+
+NOCHES_MAX = 7
+DIAS_FUTURO = 180
+TAMANO_LOTE = 5000
+
+
+def elegir(azar, pesos):
+    return azar.choices(list(pesos), list(pesos.values()))[0]
+
+
+def estado_para(azar, fecha_inicio, fecha_fin, hoy):
+    if fecha_fin <= hoy:
+        return elegir(azar, ESTADOS_PASADAS)
+    if fecha_inicio <= hoy:
+        return elegir(azar, ESTADOS_EN_CURSO)
+    return elegir(azar, ESTADOS_FUTURAS)
+
+
+def marcas(estado, fecha_inicio, fecha_fin):
+    """checkin_en y checkout_en coherentes con el estado."""
+    def a_las(fecha, hora):
+        return timezone.make_aware(datetime.combine(fecha, time(hora)))
+
+    checkin = a_las(fecha_inicio, 15) if estado in ('checkin_aceptado', 'checkout') else None
+    checkout = a_las(fecha_fin, 11) if estado == 'checkout' else None
+    return checkin, checkout
+
+
+def clientes(cantidad):
+    """ids de los clientes sintéticos, creando los que falten."""
+    nombres = [f'{PREFIJO_CLIENTE}{i}' for i in range(cantidad)]
+    existentes = set(User.objects.filter(username__in=nombres).values_list('username', flat=True))
+    password = make_password(None)
+    User.objects.bulk_create([
+        User(username=nombre, email=f'{nombre}@example.com', password=password)
+        for nombre in nombres if nombre not in existentes
+    ])
+    return list(User.objects.filter(username__in=nombres).order_by('id').values_list('id', flat=True))
+
+
+def calendario(azar, cantidad, desde, hasta):
+    """
+    Hasta `cantidad` estancias consecutivas sin solapar entre desde y hasta, con
+    huecos aleatorios que reparten las estancias por todo el periodo.
+    """
+    if cantidad <= 0:
+        return []
+    dias = (hasta - desde).days
+    hueco_medio = max(dias / cantidad - (NOCHES_MAX + 1) / 2, 0)
+    estancias = []
+    cursor = desde + timedelta(days=azar.randint(0, int(hueco_medio)))
+    while len(estancias) < cantidad:
+        fin = cursor + timedelta(days=azar.randint(1, NOCHES_MAX))
+        if fin > hasta:
+            break
+        estancias.append((cursor, fin))
+        cursor = fin + timedelta(days=azar.randint(0, int(2 * hueco_medio)))
+    return estancias
+
+
+def generar(habitaciones=200, reservas=20_000, anios=3, clientes_totales=500, semilla=42,
+            tamano_lote=TAMANO_LOTE):
+    """
+    Crea `habitaciones` habitaciones nuevas (numeradas a continuación de las
+    existentes) y unas `reservas` reservas sobre ellas. Devuelve un resumen con lo
+    creado y las reservas por estado.
+    """
+    azar = random.Random(semilla)
+    hoy = date.today()
+    desde = hoy - timedelta(days=365 * anios)
+    hasta = hoy + timedelta(days=DIAS_FUTURO)
+
+    with transaction.atomic():
+        usuarios = clientes(clientes_totales)
+        primer_numero = (Habitacion.objects.aggregate(m=Max('numero_habitacion'))['m'] or 0) + 1
+        tipos = azar.choices(list(PESOS_TIPOS), list(PESOS_TIPOS.values()), k=habitaciones)
+        nuevas = Habitacion.objects.bulk_create([
+            Habitacion(
+                tipo_habitacion=tipo,
+                numero_habitacion=primer_numero + i,
+                precio=PRECIOS[tipo],
+                descripcion=f'Habitación {tipo} generada para benchmarks',
+            )
+            for i, tipo in enumerate(tipos)
+        ])
+        ids = list(
+            Habitacion.objects.filter(numero_habitacion__gte=primer_numero)
+            .order_by('numero_habitacion').values_list('id', flat=True)
+        )
+
+        por_estado = Counter()
+        lote = []
+        for i, habitacion_id in enumerate(ids):
+            cantidad = reservas // len(ids) + (i < reservas % len(ids))
+            for fecha_inicio, fecha_fin in calendario(azar, cantidad, desde, hasta):
+                estado = estado_para(azar, fecha_inicio, fecha_fin, hoy)
+                checkin_en, checkout_en = marcas(estado, fecha_inicio, fecha_fin)
+                lote.append(Reserva(
+                    habitacion_id=habitacion_id, usuario_id=azar.choice(usuarios),
+                    fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, estado=estado,
+                    checkin_en=checkin_en, checkout_en=checkout_en,
+                ))
+                por_estado[estado] += 1
+                if len(lote) >= tamano_lote:
+                    guardar_reservas(lote)
+                    lote = []
+        guardar_reservas(lote)
+
+    invalidar_ahora_y_tras_commit(disponibilidad.invalidar)
+    invalidar_ahora_y_tras_commit(cache.invalidar)
+    return {
+        'habitaciones': len(nuevas),
+        'reservas': sum(por_estado.values()),
+        'clientes': len(usuarios),
+        'por_estado': dict(sorted(por_estado.items())),
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+    }
+
+
+def guardar_reservas(reservas):
+    # bulk_create no emite señales: las noches del calendario se crean aquí
+    Reserva.objects.bulk_create(reservas)
+    OcupacionNoche.objects.bulk_create(chain.from_iterable(noches(reserva) for reserva in reservas))
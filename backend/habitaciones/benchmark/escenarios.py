@@ -0,0 +1,142 @@
+"""
+Escenarios cronometrados sobre el cliente de pruebas de Django (sin servidor HTTP).
+
+Cada escenario es un generador que prepara una petición fuera del cronómetro y
+entrega una función sin argumentos que la ejecuta. Así el trabajo de preparación
+(crear la reserva que luego se cierra con checkout, invalidar la caché...) no
+cuenta en el tiempo medido.
+"""
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from hotel_project.metricas import PERCENTILES, percentil
+from registro.serializers import CustomTokenObtainPairSerializer
+
+from .. import cache
+from ..models import Habitacion, Reserva
+
+User = get_user_model()
+
+VENTANAS = (1, 7, 30)
+PASSWORD = 'bench-escenarios'
+
+
+class Contexto:
+    """Usuarios, clientes HTTP y datos que comparten los escenarios de una ejecución."""
+
+    def __init__(self, semilla):
+        self.azar = random.Random(semilla)
+        self.hoy = date.today()
+        self.admin = User.objects.create_user(username='bench_escenarios', password=PASSWORD, is_staff=True)
+        token = CustomTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.cliente = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.anonimo = Client()
+        self.habitaciones = list(Habitacion.objects.filter(estado=True).values_list('id', flat=True))
+        if not self.habitaciones:
+            raise ValueError('No hay habitaciones: genera datos con `manage.py generar_datos` o usa --generar.')
+        # Habitación propia para el checkout, sin reservas que choquen
+        numero = (Habitacion.objects.aggregate(m=Max('numero_habitacion'))['m'] or 0) + 1
+        self.habitacion_checkout = Habitacion.objects.create(
+            tipo_habitacion='sencilla', numero_habitacion=numero, precio=150000.0
+        )
+
+    def ventana(self, noches, desde=-365, hasta=180):
+        inicio = self.hoy + timedelta(days=self.azar.randint(desde, hasta))
+        return inicio, inicio + timedelta(days=noches)
+
+
+def catalogo(ctx):
+    while True:
+        yield lambda: ctx.anonimo.get('/api/habitaciones/')
+
+
+def catalogo_sin_cache(ctx):
+    while True:
+        cache.invalidar()
+        yield lambda: ctx.anonimo.get('/api/habitaciones/')
+
+
+def disponibles(ctx, noches):
+    while True:
+        inicio, fin = ctx.ventana(noches)
+        yield lambda: ctx.anonimo.get(
+            '/api/habitaciones/disponibles/', {'fecha_inicio': inicio, 'fecha_fin': fin}
+        )
+
+
+def cotizaciones(ctx, noches):
+    while True:
+        inicio, fin = ctx.ventana(noches)
+        yield lambda: ctx.anonimo.get(
+            '/api/habitaciones/cotizaciones/', {'fecha_inicio': inicio, 'fecha_fin': fin}
+        )
+
+
+def reservar(ctx):
+    # Fechas futuras al azar: parte se crea y parte choca con reservas existentes
+    while True:
+        inicio, fin = ctx.ventana(ctx.azar.randint(1, 5), desde=1, hasta=180)
+        datos = {'habitacion_id': ctx.azar.choice(ctx.habitaciones), 'fecha_inicio': inicio, 'fecha_fin': fin}
+        yield lambda: ctx.cliente.post('/api/reservas/', datos, content_type='application/json')
+
+
+def checkout(ctx):
+    while True:
+        reserva = Reserva.objects.create(
+            habitacion=ctx.habitacion_checkout, usuario=ctx.admin, estado='checkin_aceptado',
+            fecha_inicio=ctx.hoy - timedelta(days=1), fecha_fin=ctx.hoy,
+        )
+        yield lambda: ctx.cliente.post(f'/api/reservas/{reserva.id}/checkout/')
+
+
+def login(ctx):
+    datos = {'username': ctx.admin.username, 'password': PASSWORD}
+    while True:
+        yield lambda: ctx.anonimo.post('/api/registro/login/', datos, content_type='application/json')
+
+
+def escenarios(ventanas=VENTANAS):
+    """Nombre → fábrica de generador, en el orden en que se ejecutan."""
+    todos = {'catalogo': catalogo, 'catalogo_sin_cache': catalogo_sin_cache}
+    for noches in ventanas:
+        todos[f'disponibles_{noches}n'] = lambda ctx, noches=noches: disponibles(ctx, noches)
+    for noches in ventanas:
+        todos[f'cotizaciones_{noches}n'] = lambda ctx, noches=noches: cotizaciones(ctx, noches)
+    todos.update({'reservar': reservar, 'checkout': checkout, 'login': login})
+    return todos
+
+
+def medir(generador, repeticiones, calentamiento):
+    """Ejecuta calentamiento + repeticiones peticiones y resume tiempos, consultas y códigos HTTP."""
+    for _ in range(calentamiento):
+        next(generador)()
+
+    tiempos, consultas, codigos = [], [], Counter()
+    for _ in range(repeticiones):
+        peticion = next(generador)
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            response = peticion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(len(capturadas))
+        codigos[str(response.status_code)] += 1
+
+    ordenados = sorted(tiempos)
+    resultado = {'n': repeticiones, 'media_ms': round(statistics.fmean(tiempos), 3)}
+    resultado.update({f'p{p}_ms': round(percentil(ordenados, p), 3) for p in PERCENTILES})
+    resultado.update({
+        'min_ms': round(ordenados[0], 3),
+        'max_ms': round(ordenados[-1], 3),
+        'consultas_p50': percentil(sorted(consultas), 50),
+        'codigos': dict(sorted(codigos.items())),
+    })
+    return resultado
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from hotel_project import versiones
+
+CLAVE_VERSION = 'habitaciones:catalogo:version'
+TIEMPO_CACHE = 60 * 60
+
+
+def invalidar():
+    """Cambia la versión del catálogo; las entradas anteriores dejan de usarse."""
+    versiones.invalidar(CLAVE_VERSION)
+
+
+def clave(version, accion, pk, request):
+    """Clave de una entrada; version es (identificador, momento) de hotel_project.versiones."""
+    params = sorted(request.GET.lists())
+    return 'habitaciones:catalogo:{}:{}'.format(version[0], hashlib.md5(json.dumps([
+        accion, pk, request.scheme, request.get_host(), params,
+    ]).encode()).hexdigest())
+
+
+def nueva_entrada(data, modificado):
+    cuerpo = json.dumps(data, sort_keys=True, default=str).encode()
+    return {
+        'data': data,
+        'etag': quote_etag(hashlib.md5(cuerpo).hexdigest()),
+        'modificado': modificado or int(time.time()),
+    }
+
+
+def cabeceras(entrada):
+    return {
+        'ETag': entrada['etag'],
+        'Last-Modified': http_date(entrada['modificado']),
+        'Cache-Control': 'no-cache',
+    }
+
+
+class CatalogoCacheMixin:
+    """
+    Cachea las respuestas de list/retrieve ya serializadas, por versión del catálogo
+    y parámetros de la petición, y responde 304 con ETag/Last-Modified sin serializar.
+    """
+
+    def clave_cache(self, request, version):
+        return clave(version, self.action, self.kwargs.get(self.lookup_url_kwarg or self.lookup_field), request)
+
+    def respuesta_cacheada(self, request, generar):
+        version, = versiones.leer(CLAVE_VERSION)
+        clave_entrada = self.clave_cache(request, version)
+        entrada = cache.get(clave_entrada)
+        if entrada is None:
+            response = generar()
+            if response.status_code != 200:
+                return response
+            entrada = nueva_entrada(response.data, version[1])
+            cache.set(clave_entrada, entrada, TIEMPO_CACHE)
+
+        no_modificado = get_conditional_response(
+            request._request, etag=entrada['etag'], last_modified=entrada['modificado']
+        )
+        if no_modificado is not None:
+            return Response(status=no_modificado.status_code, headers=cabeceras(entrada))
+        return Response(entrada['data'], headers=cabeceras(entrada))
+
+    def list(self, request, *args, **kwargs):
+        return self.respuesta_cacheada(request, lambda: super(CatalogoCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.respuesta_cacheada(request, lambda: super(CatalogoCacheMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from hotel_project import versiones
+
+from .memoria import Foto, MotorEnMemoria
+from .models import Habitacion, OcupacionNoche
+
+CLAVE_VERSION = 'habitaciones:disponibilidad:version'
+
+
+def invalidar():
+    """Marca el motor como obsoleto en todos los procesos."""
+    versiones.invalidar(CLAVE_VERSION)
+
+
+class Calendario(Foto):
+    """
+    Ocupación de cada habitación como un entero usado de bitset (bit i = noche
+    origen + i).
+    """
+
+    def __init__(self, version, origen, dias, habitaciones, ocupacion):
+        super().__init__(version, origen, dias)
+        self.habitaciones = habitaciones
+        self.ocupacion = ocupacion
+
+    def mascara(self, desde, hasta):
+        return ((1 << (hasta - desde).days) - 1) << (desde - self.origen).days
+
+    def ocupadas(self, tipo, desde, hasta):
+        """(habitaciones del tipo ocupadas cada noche de [desde, hasta), habitaciones del tipo)."""
+        desplazamiento = (desde - self.origen).days
+        dias = (hasta - desde).days
+        conteo = [0] * dias
+        total = 0
+        for habitacion in self.habitaciones:
+            if habitacion['tipo_habitacion'] != tipo:
+                continue
+            total += 1
+            bits = (self.ocupacion[habitacion['id']] >> desplazamiento) & ((1 << dias) - 1)
+            while bits:
+                conteo[(bits & -bits).bit_length() - 1] += 1
+                bits &= bits - 1
+        return conteo, total
+
+
+class MotorDisponibilidad(MotorEnMemoria):
+    """
+    Ocupación de todas las habitaciones en memoria. Las consultas sobre una ventana
+    se resuelven con operaciones de bits sobre la habitación completa a la vez.
+    """
+    claves = (CLAVE_VERSION,)
+
+    def cargar(self, desde, hasta, version):
+        habitaciones = list(
+            Habitacion.objects.order_by('numero_habitacion').values(
+                'id', 'numero_habitacion', 'tipo_habitacion', 'estado'
+            )
+        )
+        ocupacion = {h['id']: 0 for h in habitaciones}
+        noches = OcupacionNoche.objects.filter(
+            fecha__gte=desde, fecha__lt=hasta
+        ).values_list('habitacion_id', 'fecha')
+        for habitacion_id, fecha in noches.iterator(chunk_size=10000):
+            # Una habitación creada después de leer la lista entra en la próxima carga
+            if habitacion_id in ocupacion:
+                ocupacion[habitacion_id] |= 1 << (fecha - desde).days
+        return Calendario(version, desde, (hasta - desde).days, habitaciones, ocupacion)
+
+    def libres(self, fecha_inicio, fecha_fin, noches=1, tipo=None):
+        """
+        Habitaciones habilitadas (opcionalmente de un tipo) con al menos `noches`
+        noches seguidas libres dentro de [fecha_inicio, fecha_fin). Cada resultado
+        incluye la primera fecha en que puede empezar la estadía.
+        """
+        calendario = self.asegurar(fecha_inicio, fecha_fin)
+        ventana_bits = calendario.mascara(fecha_inicio, fecha_fin)
+        resultados = []
+        for habitacion in calendario.habitaciones:
+            if not habitacion['estado'] or (tipo and habitacion['tipo_habitacion'] != tipo):
+                continue
+            # Bit i encendido si las noches i .. i + largo - 1 están libres
+            corridas = ~calendario.ocupacion[habitacion['id']] & ventana_bits
+            largo = 1
+            while corridas and largo < noches:
+                paso = min(largo, noches - largo)
+                corridas &= corridas >> paso
+                largo += paso
+            if corridas:
+                primera = (corridas & -corridas).bit_length() - 1
+                resultados.append({**habitacion, 'primera_fecha': calendario.origen + timedelta(days=primera)})
+        return resultados
+
+    def matriz(self, fecha_inicio, fecha_fin):
+        """Disponibilidad de cada habitación para cada noche de [fecha_inicio, fecha_fin)."""
+        calendario = self.asegurar(fecha_inicio, fecha_fin)
+        desplazamiento = (fecha_inicio - calendario.origen).days
+        dias = (fecha_fin - fecha_inicio).days
+        filas = []
+        for habitacion in calendario.habitaciones:
+            bits = calendario.ocupacion[habitacion['id']] >> desplazamiento
+            filas.append({
+                **habitacion,
+                'disponible': [habitacion['estado'] and not (bits >> i) & 1 for i in range(dias)],
+            })
+        return filas
+
+
+motor = MotorDisponibilidad()
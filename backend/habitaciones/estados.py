@@ -0,0 +1,196 @@
+"""
+Máquina de estados de Reserva:
+
+    pendiente → pagada → checkin_aceptado → checkout
+         └─────────┴──────────┴──────────→ cancelada
+    pendiente → expirada (sin pagar a tiempo, ver expirar_pendientes)
+
+Cada transición es un único UPDATE condicionado al estado de origen
+(UPDATE ... WHERE id = %s AND estado IN (...)), así dos peticiones simultáneas
+no pueden aplicar la misma transición dos veces ni pisarse entre sí.
+"""
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from configuraciones.models import Configuracion
+from hotel_project.versiones import invalidar_ahora_y_tras_commit
+
+from . import cache, disponibilidad
+from .models import Habitacion, OcupacionNoche, Reserva
+
+# acción: (estados de origen, estado de destino)
+TRANSICIONES = {
+    'pagar': (['pendiente'], 'pagada'),
+    'checkin': (['pagada'], 'checkin_aceptado'),
+    'checkout': (['checkin_aceptado'], 'checkout'),
+    'cancelar': (['pendiente', 'pagada', 'checkin_aceptado'], 'cancelada'),
+    'expirar': (['pendiente'], 'expirada'),
+}
+
+# Estados finales: la reserva deja de ocupar la habitación
+ESTADOS_FINALES = ['checkout', 'cancelada', 'expirada']
+
+LOTE_EXPIRACION = 1000
+
+
+class TransicionInvalida(Exception):
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def permitida(actual, nuevo):
+    return any(actual in origen and nuevo == destino for origen, destino in TRANSICIONES.values())
+
+
+def inicio_checkin(reserva, config):
+    return timezone.make_aware(datetime.combine(reserva.fecha_inicio, config.check_in_time))
+
+
+def salida_tardia(reserva):
+    """Si el checkout se hizo después de la hora de salida configurada del último día."""
+    config = Configuracion.get_settings()
+    limite = timezone.make_aware(datetime.combine(reserva.fecha_fin, config.check_out_time))
+    return reserva.checkout_en is not None and reserva.checkout_en > limite
+
+
+def condicion(accion, ahora, config):
+    """Filtro del UPDATE: estado de origen y, para el check-in, la ventana horaria."""
+    origen, _ = TRANSICIONES[accion]
+    filtro = Q(estado__in=origen)
+    if accion == 'checkin':
+        # Desde la hora de check-in del día de llegada hasta el día de salida
+        hoy = ahora.date()
+        llegada_hasta = hoy if ahora.time() >= config.check_in_time else hoy - timedelta(days=1)
+        filtro &= Q(fecha_inicio__lte=llegada_hasta, fecha_fin__gte=hoy)
+    return filtro
+
+
+def cambios(accion, ahora):
+    _, destino = TRANSICIONES[accion]
+    valores = {'estado': destino}
+    if accion == 'checkin':
+        valores['checkin_en'] = ahora
+    elif accion == 'checkout':
+        valores['checkout_en'] = ahora
+    return valores
+
+
+def liberar(reserva_ids, habitacion_ids=()):
+    """
+    Efectos de llegar a un estado final. El UPDATE no emite señales, así que se
+    borran aquí las noches del calendario, se marca la habitación como disponible
+    tras el checkout y se invalidan las cachés.
+    """
+    OcupacionNoche.objects.filter(reserva_id__in=reserva_ids).delete()
+    invalidar_ahora_y_tras_commit(disponibilidad.invalidar)
+    if habitacion_ids and Habitacion.objects.filter(id__in=habitacion_ids, estado=False).update(estado=True):
+        invalidar_ahora_y_tras_commit(cache.invalidar)
+
+
+def aplicar(queryset, pk, accion, ahora=None):
+    """
+    Aplica la transición a la reserva pk dentro de queryset (que ya limita a qué
+    reservas tiene acceso el usuario) y devuelve la reserva actualizada.
+    Lanza TransicionInvalida si la reserva no existe o no admite la transición.
+    """
+    ahora = ahora or timezone.localtime()
+    config = Configuracion.get_settings()
+    with transaction.atomic():
+        actualizadas = queryset.filter(condicion(accion, ahora, config), pk=pk).update(**cambios(accion, ahora))
+        reserva = queryset.filter(pk=pk).first()
+        if actualizadas and reserva.estado in ESTADOS_FINALES:
+            liberar([reserva.id], [reserva.habitacion_id] if accion == 'checkout' else ())
+    if not actualizadas:
+        raise error(reserva, accion, ahora, config)
+    return reserva
+
+
+def pendientes_hoy(accion, ahora):
+    """Filtro adicional de "todas las de hoy" en las acciones masivas."""
+    if accion == 'checkout':
+        return Q(fecha_fin__lte=ahora.date())
+    return Q()
+
+
+def aplicar_masivo(queryset, accion, ids=None, ahora=None):
+    """
+    Aplica la transición a varias reservas con unas pocas sentencias, sin importar
+    cuántas sean: un UPDATE condicionado, un SELECT de las que cambiaron (marcadas
+    con la misma hora en checkin_en/checkout_en) y, si alguna falló, un SELECT para
+    explicar por qué. Con ids=None se procesan todas las que tocan hoy.
+    Devuelve una lista de {'id', 'ok'[, 'error']} en el orden de ids.
+    """
+    ahora = ahora or timezone.localtime()
+    config = Configuracion.get_settings()
+    if ids is not None:
+        ids = list(dict.fromkeys(ids))
+    _, destino = TRANSICIONES[accion]
+    marca = cambios(accion, ahora)
+    seleccion = queryset.filter(id__in=ids) if ids is not None else queryset.filter(pendientes_hoy(accion, ahora))
+
+    with transaction.atomic():
+        seleccion.filter(condicion(accion, ahora, config)).update(**marca)
+        hechas = dict(seleccion.filter(**marca).values_list('id', 'habitacion_id'))
+        if hechas and destino in ESTADOS_FINALES:
+            liberar(list(hechas), set(hechas.values()) if accion == 'checkout' else ())
+
+    if ids is None:
+        return [{'id': reserva_id, 'ok': True} for reserva_id in sorted(hechas)]
+
+    fallidas = {r.id: r for r in queryset.filter(id__in=set(ids) - set(hechas))} if len(hechas) < len(ids) else {}
+    resultados = []
+    for reserva_id in ids:
+        if reserva_id in hechas:
+            resultados.append({'id': reserva_id, 'ok': True})
+        else:
+            motivo = error(fallidas.get(reserva_id), accion, ahora, config)
+            resultados.append({'id': reserva_id, 'ok': False, 'error': str(motivo)})
+    return resultados
+
+
+def error(reserva, accion, ahora, config):
+    """Explica por qué no se aplicó la transición (solo se calcula si falló)."""
+    if reserva is None:
+        return TransicionInvalida('La reserva no existe.', status=404)
+    origen, _ = TRANSICIONES[accion]
+    if reserva.estado not in origen:
+        return TransicionInvalida(f"La reserva está en estado '{reserva.estado}' y no admite {accion}.")
+    if ahora < inicio_checkin(reserva, config):
+        return TransicionInvalida(
+            f'El check-in está disponible desde el {reserva.fecha_inicio} a las {config.check_in_time:%H:%M}.'
+        )
+    return TransicionInvalida('La estadía de esta reserva ya terminó.')
+
+
+def expirar_pendientes(ahora=None, lote=LOTE_EXPIRACION):
+    """
+    Expira las reservas pendientes creadas hace más de
+    Configuracion.minutos_expiracion_pendiente y devuelve cuántas expiró.
+
+    Trabaja por lotes, cada uno en su transacción: toma ids vencidos (con
+    SKIP LOCKED donde existe, así varios procesos se reparten el trabajo), los
+    pasa a expirada con un UPDATE condicionado a que sigan pendientes y libera
+    sus noches. Repetirlo no tiene efecto: una reserva pagada entre medias no
+    cumple la condición y una expirada ya no es pendiente.
+    """
+    ahora = ahora or timezone.now()
+    config = Configuracion.get_settings()
+    origen, destino = TRANSICIONES['expirar']
+    vencidas = Reserva.objects.filter(
+        estado__in=origen, creado__lt=ahora - timedelta(minutes=config.minutos_expiracion_pendiente)
+    )
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(vencidas.select_for_update(skip_locked=True).values_list('id', flat=True)[:lote])
+            expiradas = Reserva.objects.filter(id__in=ids, estado__in=origen).update(estado=destino)
+            if expiradas:
+                OcupacionNoche.objects.filter(reserva_id__in=ids, reserva__estado=destino).delete()
+                invalidar_ahora_y_tras_commit(disponibilidad.invalidar)
+        total += expiradas
+        if len(ids) < lote:
+            return total
@@ -0,0 +1,93 @@
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Lado mayor en píxeles de cada variante
+VARIANTES = {
+    'thumb': 160,
+    'card': 640,
+    'full': 1600,
+}
+
+FORMATOS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+CARPETA = 'habitaciones/variantes'
+
+
+def ruta_variante(digest, variante, formato):
+    """Ruta direccionada por contenido: cambia si y solo si cambia la imagen original."""
+    return f'{CARPETA}/{digest}-{variante}.{formato}'
+
+
+def decodificar(datos):
+    """
+    Decodifica la imagen completa (lo que la valida) y aplica su orientación EXIF.
+    Devuelve (imagen, bytes sin metadatos EXIF o None si la original no los tenía).
+    """
+    with Image.open(io.BytesIO(datos)) as original:
+        original.load()
+        formato = 'JPEG' if original.format == 'MPO' else original.format
+        tiene_exif = bool(original.getexif())
+        imagen = ImageOps.exif_transpose(original)
+
+    limpios = None
+    if tiene_exif:
+        salida = io.BytesIO()
+        if formato == 'JPEG':
+            imagen.convert('RGB').save(salida, formato, quality=90, optimize=True)
+        else:
+            imagen.save(salida, formato)
+        limpios = salida.getvalue()
+    return imagen, limpios
+
+
+def generar_variantes(imagen, digest):
+    """Guarda las variantes de la imagen que todavía no existan en el storage."""
+    imagen = imagen.convert('RGB')
+    for variante, lado in VARIANTES.items():
+        for formato, (formato_pil, opciones) in FORMATOS.items():
+            ruta = ruta_variante(digest, variante, formato)
+            if default_storage.exists(ruta):
+                continue
+            copia = imagen.copy()
+            copia.thumbnail((lado, lado), Image.LANCZOS)
+            salida = io.BytesIO()
+            copia.save(salida, formato_pil, **opciones)
+            default_storage.save(ruta, ContentFile(salida.getvalue()))
+
+
+def procesar_imagen(nombre):
+    """
+    Valida la imagen guardada en `nombre`, le quita el EXIF y genera sus variantes.
+    Devuelve (nombre de la imagen limpia, hash SHA-256 de su contenido). Si hubo que
+    limpiarla, la copia limpia es un archivo nuevo y la original sigue en su sitio:
+    quien llama decide cuál borrar.
+    Lanza OSError o ValueError si el archivo no es una imagen válida.
+    """
+    with default_storage.open(nombre, 'rb') as archivo:
+        datos = archivo.read()
+    imagen, limpios = decodificar(datos)
+    if limpios is not None:
+        nombre = default_storage.save(nombre, ContentFile(limpios))
+        datos = limpios
+    digest = hashlib.sha256(datos).hexdigest()
+    generar_variantes(imagen, digest)
+    return nombre, digest
+
+
+def urls_variantes(digest, request=None):
+    if not digest:
+        return None
+    urls = {}
+    for variante in VARIANTES:
+        urls[variante] = {}
+        for formato in FORMATOS:
+            url = default_storage.url(ruta_variante(digest, variante, formato))
+            urls[variante][formato] = request.build_absolute_uri(url) if request else url
+    return urls
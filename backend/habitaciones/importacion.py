@@ -0,0 +1,234 @@
+"""
+Importación y exportación masiva de habitaciones y reservas en NDJSON o CSV.
+
+La entrada se lee del cuerpo de la petición línea a línea y se procesa por lotes:
+cada lote se valida con un par de consultas (números repetidos, habitaciones y
+usuarios inexistentes, solapamientos contra la base y dentro del propio lote) y se
+escribe con bulk_create en su propia transacción. La exportación recorre la tabla
+con .iterator(), así que la memoria no crece con el número de filas.
+"""
+import csv
+import json
+from collections import defaultdict
+from itertools import chain, islice
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from . import cache, disponibilidad
+from .models import ESTADOS_ACTIVOS, Habitacion, OcupacionNoche, Reserva
+from .ocupacion import noches
+from .serializers import (
+    MENSAJE_NO_DISPONIBLE,
+    HabitacionImportSerializer,
+    ReservaImportSerializer,
+    bloquear_habitaciones,
+)
+
+User = get_user_model()
+
+FORMATOS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+TAMANO_LOTE = 1000
+# Filas por escritura en la exportación: evita un yield por fila
+FILAS_POR_BLOQUE = 500
+# Errores detallados en la respuesta; el total se cuenta siempre
+MAX_ERRORES = 100
+# Un lote que choca con una reserva concurrente se valida y escribe de nuevo
+INTENTOS = 2
+
+CAMPOS_HABITACION = ('id', 'tipo_habitacion', 'numero_habitacion', 'precio', 'estado', 'descripcion')
+CAMPOS_RESERVA = ('id', 'habitacion_id', 'usuario_id', 'fecha_inicio', 'fecha_fin', 'estado', 'creado')
+
+
+def formato_de(request):
+    """?formato=ndjson|csv; si no se indica, se deduce del Content-Type (NDJSON por defecto)."""
+    formato = request.query_params.get('formato')
+    if formato is None:
+        formato = 'csv' if request.content_type.split(';')[0].strip() == FORMATOS['csv'] else 'ndjson'
+    if formato not in FORMATOS:
+        raise serializers.ValidationError({'formato': f"Use uno de: {', '.join(FORMATOS)}."})
+    return formato
+
+
+def leer_filas(stream, formato):
+    """Genera (número de fila, datos, error) a partir de un flujo de bytes."""
+    if stream is None:
+        return
+    lineas = (linea.decode('utf-8-sig') for linea in stream)
+    if formato == 'csv':
+        for numero, fila in enumerate(csv.DictReader(lineas), start=1):
+            # Las columnas sobrantes quedan bajo None y las que faltan valen None
+            yield numero, {k: v for k, v in fila.items() if k is not None and v is not None}, None
+        return
+
+    numero = 0
+    for linea in lineas:
+        if not linea.strip():
+            continue
+        numero += 1
+        try:
+            datos = json.loads(linea)
+        except ValueError:
+            yield numero, None, {api_settings.NON_FIELD_ERRORS_KEY: ['JSON inválido.']}
+            continue
+        if not isinstance(datos, dict):
+            yield numero, None, {api_settings.NON_FIELD_ERRORS_KEY: ['Se esperaba un objeto JSON.']}
+            continue
+        yield numero, datos, None
+
+
+def en_lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+class Resultado:
+    def __init__(self):
+        self.creadas = 0
+        self.errores = []
+        self.total_errores = 0
+
+    def error(self, numero, detalle):
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append({'fila': numero, 'errores': detalle})
+
+    def datos(self):
+        return {'creadas': self.creadas, 'total_errores': self.total_errores, 'errores': self.errores}
+
+
+def importar(stream, formato, serializer_class, escribir_lote, tamano_lote=TAMANO_LOTE):
+    resultado = Resultado()
+    for lote in en_lotes(leer_filas(stream, formato), tamano_lote):
+        validas, errores_lote = [], []
+        for numero, datos, error in lote:
+            if error is None:
+                serializer = serializer_class(data=datos)
+                if serializer.is_valid():
+                    validas.append((numero, serializer.validated_data))
+                    continue
+                error = serializer.errors
+            errores_lote.append((numero, error))
+
+        creadas, errores = 0, []
+        for intento in range(INTENTOS):
+            if not validas:
+                break
+            try:
+                with transaction.atomic():
+                    creadas, errores = escribir_lote(validas)
+                break
+            except IntegrityError as e:
+                if intento + 1 < INTENTOS:
+                    continue
+                creadas, errores = 0, [
+                    (numero, {api_settings.NON_FIELD_ERRORS_KEY: [str(e)]}) for numero, _ in validas
+                ]
+        resultado.creadas += creadas
+        for numero, detalle in sorted(errores_lote + errores, key=lambda error: error[0]):
+            resultado.error(numero, detalle)
+        if creadas:
+            # bulk_create no emite señales: se invalida por cada lote confirmado
+            disponibilidad.invalidar()
+    return resultado
+
+
+def escribir_habitaciones(filas):
+    numeros = {datos['numero_habitacion'] for _, datos in filas}
+    existentes = set(
+        Habitacion.objects.filter(numero_habitacion__in=numeros).values_list('numero_habitacion', flat=True)
+    )
+    nuevas, errores = [], []
+    for numero, datos in filas:
+        if datos['numero_habitacion'] in existentes:
+            errores.append((numero, {'numero_habitacion': ['Ya existe una habitación con este número.']}))
+            continue
+        existentes.add(datos['numero_habitacion'])
+        nuevas.append(Habitacion(**datos))
+    Habitacion.objects.bulk_create(nuevas)
+    return len(nuevas), errores
+
+
+def escribir_reservas(filas):
+    habitaciones = set(
+        Habitacion.objects.filter(id__in={d['habitacion_id'] for _, d in filas}).values_list('id', flat=True)
+    )
+    usuarios = set(User.objects.filter(id__in={d['usuario_id'] for _, d in filas}).values_list('id', flat=True))
+
+    errores, candidatas = [], []
+    for numero, datos in filas:
+        detalle = {}
+        if datos['habitacion_id'] not in habitaciones:
+            detalle['habitacion_id'] = ['La habitación no existe.']
+        if datos['usuario_id'] not in usuarios:
+            detalle['usuario_id'] = ['El usuario no existe.']
+        if detalle:
+            errores.append((numero, detalle))
+        else:
+            candidatas.append((numero, datos))
+
+    # Noches ocupadas por habitación: reservas activas de la base que caen en el lote
+    activas = [datos for _, datos in candidatas if datos['estado'] in ESTADOS_ACTIVOS]
+    ocupadas = defaultdict(list)
+    if activas:
+        ids = {datos['habitacion_id'] for datos in activas}
+        if connection.vendor != 'postgresql':
+            # En Postgres la restricción de exclusión cubre las reservas concurrentes
+            bloquear_habitaciones(ids)
+        existentes = Reserva.objects.solapadas(
+            min(datos['fecha_inicio'] for datos in activas),
+            max(datos['fecha_fin'] for datos in activas),
+        ).filter(habitacion_id__in=ids).values_list('habitacion_id', 'fecha_inicio', 'fecha_fin')
+        for habitacion_id, inicio, fin in existentes:
+            ocupadas[habitacion_id].append((inicio, fin))
+
+    nuevas = []
+    for numero, datos in candidatas:
+        if datos['estado'] in ESTADOS_ACTIVOS:
+            rangos = ocupadas[datos['habitacion_id']]
+            if any(inicio < datos['fecha_fin'] and datos['fecha_inicio'] < fin for inicio, fin in rangos):
+                errores.append((numero, {api_settings.NON_FIELD_ERRORS_KEY: [MENSAJE_NO_DISPONIBLE]}))
+                continue
+            rangos.append((datos['fecha_inicio'], datos['fecha_fin']))
+        nuevas.append(Reserva(**datos))
+
+    Reserva.objects.bulk_create(nuevas)
+    OcupacionNoche.objects.bulk_create(chain.from_iterable(noches(reserva) for reserva in nuevas))
+    return len(nuevas), errores
+
+
+def importar_habitaciones(stream, formato, tamano_lote=TAMANO_LOTE):
+    resultado = importar(stream, formato, HabitacionImportSerializer, escribir_habitaciones, tamano_lote)
+    cache.invalidar()
+    return resultado
+
+
+def importar_reservas(stream, formato, tamano_lote=TAMANO_LOTE):
+    return importar(stream, formato, ReservaImportSerializer, escribir_reservas, tamano_lote)
+
+
+class _Eco:
+    """Destino de csv.writer que devuelve la línea en vez de escribirla."""
+
+    def write(self, valor):
+        return valor
+
+
+def exportar(queryset, campos, formato):
+    """Genera el contenido de la exportación en bloques de FILAS_POR_BLOQUE filas."""
+    filas = queryset.order_by('id').values_list(*campos).iterator(chunk_size=TAMANO_LOTE)
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(campos)
+        lineas = (escritor.writerow(fila) for fila in filas)
+    else:
+        lineas = (json.dumps(dict(zip(campos, fila)), cls=DjangoJSONEncoder) + '\n' for fila in filas)
+    for bloque in en_lotes(lineas, FILAS_POR_BLOQUE):
+        yield ''.join(bloque)
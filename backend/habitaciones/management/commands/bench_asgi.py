@@ -0,0 +1,112 @@
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Rutas equivalentes: la vista DRF síncrona y su versión asíncrona
+RUTAS = {
+    'disponibles': ('/api/habitaciones/disponibles/', '/api/async/habitaciones/disponibles/'),
+    'catalogo': ('/api/habitaciones/', '/api/async/habitaciones/'),
+    'reservas': ('/api/reservas/', '/api/async/reservas/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga: levanta el proyecto con gunicorn (WSGI) y con uvicorn (ASGI) '
+        'y mide peticiones/s y latencias de las vistas de lectura síncronas y asíncronas '
+        'con N clientes concurrentes. Usa la base de datos de la configuración activa; '
+        'la diferencia se nota sobre todo contra una base remota.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rutas', nargs='+', choices=list(RUTAS), default=['disponibles', 'catalogo'])
+        parser.add_argument('--concurrencia', type=int, default=50)
+        parser.add_argument('--peticiones', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1, help='Procesos por servidor.')
+        parser.add_argument('--hilos', type=int, default=4, help='Hilos por proceso de gunicorn.')
+        parser.add_argument('--puerto', type=int, default=8765)
+        parser.add_argument('--token', default='', help='JWT para la ruta de reservas.')
+
+    def handle(self, *args, **options):
+        if 'reservas' in options['rutas'] and not options['token']:
+            raise CommandError('La ruta de reservas necesita --token.')
+
+        servidores = [
+            ('wsgi', [
+                sys.executable, '-m', 'gunicorn', 'hotel_project.wsgi:application',
+                '--workers', str(options['workers']), '--threads', str(options['hilos']),
+                '--bind', f'127.0.0.1:{options["puerto"]}', '--log-level', 'warning',
+            ]),
+            ('asgi', [
+                sys.executable, '-m', 'uvicorn', 'hotel_project.asgi:application',
+                '--workers', str(options['workers']),
+                '--port', str(options['puerto']), '--log-level', 'warning', '--no-access-log',
+            ]),
+        ]
+        self.stdout.write(
+            f"{'servidor':<10}{'ruta':<40}{'pet/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}"
+        )
+        for nombre, comando in servidores:
+            with self.servidor(comando, options['puerto']):
+                for ruta in options['rutas']:
+                    sincrona, asincrona = RUTAS[ruta]
+                    for url in (sincrona, asincrona):
+                        resultado = self.carga(f'http://127.0.0.1:{options["puerto"]}{url}', options)
+                        self.stdout.write(f'{nombre:<10}{url:<40}' + resultado)
+
+    @contextmanager
+    def servidor(self, comando, puerto):
+        proceso = subprocess.Popen(comando, cwd=settings.BASE_DIR)
+        try:
+            self.esperar_puerto(puerto, proceso)
+            yield
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+    def esperar_puerto(self, puerto, proceso, limite=30):
+        fin = time.monotonic() + limite
+        while time.monotonic() < fin:
+            if proceso.poll() is not None:
+                raise CommandError(f'El servidor terminó con código {proceso.returncode}.')
+            with socket.socket() as s:
+                if s.connect_ex(('127.0.0.1', puerto)) == 0:
+                    return
+            time.sleep(0.1)
+        raise CommandError('El servidor no respondió a tiempo.')
+
+    def carga(self, url, options):
+        if 'disponibles' in url:
+            inicio = date.today() + timedelta(days=7)
+            url += f'?fecha_inicio={inicio}&fecha_fin={inicio + timedelta(days=3)}'
+        cabeceras = {'Authorization': f'Bearer {options["token"]}'} if options['token'] else {}
+
+        def peticion(_):
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers=cabeceras), timeout=30) as r:
+                    r.read()
+                    ok = r.status == 200
+            except (urllib.error.URLError, OSError):
+                ok = False
+            return time.perf_counter() - t0, ok
+
+        peticion(0)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrencia']) as pool:
+            resultados = list(pool.map(peticion, range(options['peticiones'])))
+        total = time.perf_counter() - inicio
+
+        tiempos = sorted(t * 1000 for t, _ in resultados)
+        p50, p95, p99 = (tiempos[min(len(tiempos) - 1, int(len(tiempos) * q))] for q in (0.50, 0.95, 0.99))
+        errores = sum(not ok for _, ok in resultados)
+        return f'{len(resultados) / total:>9.1f}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{errores:>9}'
@@ -0,0 +1,94 @@
+import json
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from django.utils import timezone
+
+from configuraciones.models import Configuracion
+
+from habitaciones.benchmark import carga
+from habitaciones.models import Reserva
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga contra un servidor en marcha (runserver, uvicorn, gunicorn): N '
+        'usuarios virtuales concurrentes se registran, inician sesión y repiten el recorrido '
+        'buscar → reservar → pagar → check-in → check-out. Informa peticiones/s, latencias '
+        'por paso, errores, conflictos de reserva y dobles reservas. El check-in solo es '
+        'posible desde la hora de check-in configurada; antes, use --hasta pagar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--usuarios', type=int, default=20, help='Usuarios virtuales concurrentes.')
+        parser.add_argument('--iteraciones', type=int, default=5, help='Recorridos por usuario.')
+        parser.add_argument('--hasta', choices=carga.PASOS, default='checkout', help='Último paso del recorrido.')
+        parser.add_argument('--objetivo', type=int, default=5,
+                            help='Cada usuario elige entre las primeras N habitaciones libres (más bajo, más competencia).')
+        parser.add_argument('--dias', type=int, default=0, help='Llegada entre hoy y hoy + N días.')
+        parser.add_argument('--noches', type=int, default=2, help='Máximo de noches por reserva.')
+        parser.add_argument('--pensar', type=float, default=0.0, help='Pausa aleatoria máxima entre pasos (s).')
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--salida', help='Guarda el resumen en este archivo JSON.')
+        parser.add_argument('--verificar-bd', action='store_true',
+                            help='Busca también solapamientos en la base de datos (la misma que usa el servidor).')
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['iteraciones'] < 1:
+            raise CommandError('--usuarios e --iteraciones deben ser positivos.')
+        options['pasos'] = carga.PASOS[:carga.PASOS.index(options['hasta']) + 1]
+        if 'checkin' in options['pasos'] and options['dias'] == 0:
+            self.avisar_hora_checkin()
+        resumen, resultados = carga.ejecutar(options)
+        if not resumen['peticiones'] or not resumen['pasos'].get('login', {}).get('n'):
+            raise CommandError(f"El servidor en {options['url']} no respondió al registro o al login.")
+
+        if options['verificar_bd']:
+            resumen['dobles_reservas_bd'] = self.solapadas_en_bd([r['id'] for r in resultados.reservas])
+
+        self.stdout.write(
+            f"{resumen['recorridos']} recorridos ({resumen['recorridos_completos']} completos) en "
+            f"{resumen['duracion_s']} s: {resumen['peticiones_por_s']} pet/s, "
+            f"{resumen['recorridos_por_s']} recorridos/s"
+        )
+        self.stdout.write(f"{'paso':<10}{'n':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}  códigos")
+        for paso, datos in resumen['pasos'].items():
+            codigos = ' '.join(f'{c}:{n}' for c, n in datos['codigos'].items())
+            self.stdout.write(
+                f"{paso:<10}{datos['n']:>7}{datos['p50_ms']:>9.1f}{datos['p95_ms']:>9.1f}"
+                f"{datos['p99_ms']:>9.1f}{datos['errores']:>9}  {codigos}"
+            )
+        self.stdout.write(
+            f"errores: {resumen['errores']}  conflictos de reserva: {resumen['conflictos_reserva']}  "
+            f"dobles reservas: {resumen['dobles_reservas']}"
+            + (f"  (en la base: {resumen['dobles_reservas_bd']})" if options['verificar_bd'] else '')
+        )
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resumen, archivo, indent=2, ensure_ascii=False)
+
+    def avisar_hora_checkin(self):
+        # Solo orientativo: la configuración se lee de la base de datos local, si hay
+        try:
+            hora = Configuracion.get_settings().check_in_time
+        except DatabaseError:
+            return
+        if timezone.now().time() < hora:
+            self.stderr.write(
+                f'Aviso: antes de las {hora:%H:%M} ({timezone.get_current_timezone_name()}) '
+                'el servidor rechazará los check-in de hoy; use --hasta pagar.'
+            )
+
+    def solapadas_en_bd(self, ids):
+        """Pares de reservas de la prueba que siguen activas y se solapan en la base de datos."""
+        por_habitacion = defaultdict(list)
+        for reserva in Reserva.objects.activas().filter(id__in=ids).order_by('fecha_inicio'):
+            por_habitacion[reserva.habitacion_id].append(reserva)
+        return sum(
+            a.fecha_fin > b.fecha_inicio
+            for reservas in por_habitacion.values()
+            for a, b in zip(reservas, reservas[1:])
+        )
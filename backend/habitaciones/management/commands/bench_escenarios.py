@@ -0,0 +1,115 @@
+import json
+import logging
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from habitaciones.benchmark import datos, escenarios
+from habitaciones.models import Habitacion, Reserva
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta escenarios cronometrados (catálogo, disponibles con varias ventanas, '
+        'reservar, checkout, login) con el cliente de pruebas contra la base de datos '
+        'configurada (SQLite o Postgres) y guarda los resultados en JSON. Todo lo que '
+        'crean los escenarios, y los datos de --generar, se revierte al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenarios', nargs='+', help='Por defecto, todos.')
+        parser.add_argument('--ventanas', nargs='+', type=int, default=list(escenarios.VENTANAS),
+                            help='Noches de las consultas de disponibilidad.')
+        parser.add_argument('--repeticiones', type=int, default=200)
+        parser.add_argument('--calentamiento', type=int, default=10)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--salida', default='bench_escenarios.json')
+        parser.add_argument('--comparar', help='JSON de una ejecución anterior para comparar el p50.')
+        parser.add_argument('--generar', action='store_true',
+                            help='Genera datos sintéticos antes de medir (ver generar_datos).')
+        parser.add_argument('--habitaciones', type=int, default=200)
+        parser.add_argument('--reservas', type=int, default=20_000)
+        parser.add_argument('--anios', type=int, default=3)
+
+    def handle(self, *args, **options):
+        disponibles = escenarios.escenarios(options['ventanas'])
+        nombres = options['escenarios'] or list(disponibles)
+        desconocidos = set(nombres) - set(disponibles)
+        if desconocidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+        anterior = self.leer(options['comparar']) if options['comparar'] else {}
+
+        # Los 400 de las reservas que chocan con otras son esperados
+        registro = logging.getLogger('django.request')
+        nivel = registro.level
+        registro.setLevel(logging.ERROR)
+        try:
+            resultados = self.ejecutar(disponibles, nombres, anterior, options)
+        finally:
+            registro.setLevel(nivel)
+
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(f"Resultados en {options['salida']}")
+
+    def ejecutar(self, disponibles, nombres, anterior, options):
+        with transaction.atomic():
+            if options['generar']:
+                datos.generar(
+                    habitaciones=options['habitaciones'], reservas=options['reservas'],
+                    anios=options['anios'], semilla=options['semilla'],
+                )
+            resultados = {
+                'meta': self.meta(options),
+                'datos': {
+                    'habitaciones': Habitacion.objects.count(),
+                    'reservas': dict(
+                        Reserva.objects.values_list('estado').annotate(n=Count('id')).order_by('estado')
+                    ),
+                },
+                'escenarios': {},
+            }
+            try:
+                ctx = escenarios.Contexto(options['semilla'])
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            self.stdout.write(
+                f"{'escenario':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'consultas':>11}"
+                + (f"{'p50 antes':>11}{'cambio':>9}" if anterior else '')
+            )
+            for nombre in nombres:
+                r = escenarios.medir(disponibles[nombre](ctx), options['repeticiones'], options['calentamiento'])
+                resultados['escenarios'][nombre] = r
+                linea = f"{nombre:<22}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['consultas_p50']:>11}"
+                previo = anterior.get('escenarios', {}).get(nombre)
+                if previo:
+                    cambio = (r['p50_ms'] - previo['p50_ms']) / previo['p50_ms'] * 100
+                    linea += f"{previo['p50_ms']:>11.2f}{cambio:>+8.1f}%"
+                self.stdout.write(linea)
+            transaction.set_rollback(True)
+        return resultados
+
+    def meta(self, options):
+        return {
+            'fecha': timezone.now().isoformat(),
+            'motor': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'opciones': {
+                clave: options[clave]
+                for clave in ('ventanas', 'repeticiones', 'calentamiento', 'semilla', 'generar',
+                              'habitaciones', 'reservas', 'anios')
+            },
+        }
+
+    def leer(self, ruta):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'No se pudo leer {ruta}: {e}')
@@ -0,0 +1,80 @@
+import io
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from habitaciones.models import Habitacion, Reserva
+from habitaciones.serializers import ReservaSerializer
+from hotel_project import json_rapido
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide serialización, render y parseo de N reservas de ReservaSerializer con el '
+        'JSON de DRF, el renderer propio sobre json y el renderer propio con orjson. '
+        'No usa la base de datos: las reservas se construyen en memoria.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservas', type=int, default=10_000)
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument(
+            '--compacto', action='store_true',
+            help='Serializa la habitación solo como id, como el listado sin ?expand=habitacion.',
+        )
+
+    def handle(self, *args, **options):
+        data = self.serializar(options)
+        orjson = json_rapido.orjson
+        variantes = [('DRF (json)', JSONRenderer, JSONParser)]
+        variantes.append(('propio (json)', json_rapido.JSONRapidoRenderer, json_rapido.JSONRapidoParser))
+        if orjson is not None:
+            variantes.append(('propio (orjson)', json_rapido.JSONRapidoRenderer, json_rapido.JSONRapidoParser))
+
+        self.stdout.write(f"{'variante':<18}{'render (ms)':>14}{'parseo (ms)':>14}{'bytes':>12}")
+        for nombre, renderer, parser in variantes:
+            json_rapido.orjson = orjson if 'orjson' in nombre else None
+            try:
+                cuerpo = renderer().render(data, 'application/json')
+                render = self.medir(lambda: renderer().render(data, 'application/json'), options)
+                parseo = self.medir(lambda: parser().parse(io.BytesIO(cuerpo)), options)
+            finally:
+                json_rapido.orjson = orjson
+            self.stdout.write(f'{nombre:<18}{render:>14.1f}{parseo:>14.1f}{len(cuerpo):>12}')
+
+    def serializar(self, options):
+        habitaciones = [
+            Habitacion(id=i, tipo_habitacion='doble', numero_habitacion=100 + i, precio=180000.0,
+                       descripcion='Habitación con vista al jardín')
+            for i in range(1, 201)
+        ]
+        ahora = timezone.now()
+        reservas = [
+            Reserva(
+                id=i, habitacion=habitaciones[i % len(habitaciones)], usuario_id=1 + i % 50,
+                fecha_inicio=date.today() + timedelta(days=i % 365),
+                fecha_fin=date.today() + timedelta(days=i % 365 + 3),
+                estado='pagada', creado=ahora,
+            )
+            for i in range(1, options['reservas'] + 1)
+        ]
+        contexto = {'expand_habitacion': not options['compacto']}
+        inicio = time.perf_counter()
+        data = ReservaSerializer(reservas, many=True, context=contexto).data
+        self.stdout.write(
+            f'ReservaSerializer: {len(reservas)} reservas en {(time.perf_counter() - inicio) * 1000:.1f} ms'
+        )
+        return data
+
+    def medir(self, funcion, options):
+        tiempos = []
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tiempos)
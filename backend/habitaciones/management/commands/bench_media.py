@@ -0,0 +1,60 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.views.static import serve
+
+from hotel_project.media import servir_media
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el servido de un archivo de MEDIA_ROOT con django.views.static.serve '
+        '(lo que usa static()) y con hotel_project.media.servir_media.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archivo', help='Ruta relativa a MEDIA_ROOT; por defecto el archivo más grande.')
+        parser.add_argument('--peticiones', type=int, default=500)
+
+    def handle(self, *args, **options):
+        raiz = Path(settings.MEDIA_ROOT)
+        if options['archivo']:
+            ruta = options['archivo']
+        else:
+            archivos = [p for p in raiz.rglob('*') if p.is_file()]
+            if not archivos:
+                raise CommandError(f'No hay archivos en {raiz}.')
+            ruta = max(archivos, key=lambda p: p.stat().st_size).relative_to(raiz).as_posix()
+        tamano = (raiz / ruta).stat().st_size
+        self.stdout.write(f'{ruta} ({tamano / 1024:.0f} KB), {options["peticiones"]} peticiones')
+
+        factory = RequestFactory()
+        escenarios = {
+            'static.serve': lambda cabeceras: serve(factory.get('/', **cabeceras), ruta, document_root=raiz),
+            'servir_media': lambda cabeceras: servir_media(factory.get('/', **cabeceras), ruta),
+        }
+        for nombre, vista in escenarios.items():
+            self.medir(nombre, vista, {}, options['peticiones'], tamano)
+        self.medir('servir_media 304', escenarios['servir_media'], {
+            'HTTP_IF_NONE_MATCH': servir_media(factory.get('/'), ruta)['ETag'],
+        }, options['peticiones'], 0)
+        self.medir('servir_media Range', escenarios['servir_media'], {
+            'HTTP_RANGE': 'bytes=0-65535',
+        }, options['peticiones'], min(tamano, 65536))
+
+    def medir(self, nombre, vista, cabeceras, peticiones, bytes_por_peticion):
+        inicio = time.perf_counter()
+        for _ in range(peticiones):
+            response = vista(cabeceras)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            response.close()
+        total = time.perf_counter() - inicio
+        self.stdout.write(
+            f'  {nombre:<20} {peticiones / total:>9.1f} peticiones/s '
+            f'{peticiones * bytes_por_peticion / total / 1024 / 1024:>9.1f} MB/s'
+        )
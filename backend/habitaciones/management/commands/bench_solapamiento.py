@@ -0,0 +1,133 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+
+from habitaciones.models import ESTADOS_ACTIVOS, RESTRICCION_SOLAPAMIENTO, Habitacion, Reserva
+
+User = get_user_model()
+
+ESTADOS = ['pendiente', 'pagada', 'checkin_aceptado', 'checkout', 'cancelada']
+PESOS_ESTADOS = [5, 10, 5, 65, 15]
+ESTADOS_INACTIVOS = [e for e in ESTADOS if e not in ESTADOS_ACTIVOS]
+PESOS_INACTIVOS = [p for e, p in zip(ESTADOS, PESOS_ESTADOS) if e not in ESTADOS_ACTIVOS]
+INDICES = ['reserva_hab_fechas_idx', 'reserva_activas_fechas_idx', 'reserva_activas_periodo_gist']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide las consultas de solapamiento de reservas con y sin los índices de fechas. '
+        'Todos los datos se generan dentro de una transacción que se revierte al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservas', type=int, default=1_000_000)
+        parser.add_argument('--habitaciones', type=int, default=200)
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--lote', type=int, default=10_000)
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['semilla'])
+        with transaction.atomic():
+            self.generar_datos(options)
+            despues = self.medir(options['repeticiones'])
+            self.eliminar_indices()
+            antes = self.medir(options['repeticiones'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'consulta':<22}{'antes (ms)':>14}{'después (ms)':>16}")
+        for nombre in despues:
+            self.stdout.write(f'{nombre:<22}{antes[nombre]:>14.2f}{despues[nombre]:>16.2f}')
+
+    def generar_datos(self, options):
+        usuario = User.objects.create_user(username='bench_solapamiento', password=None)
+        inicio_numero = (Habitacion.objects.aggregate(m=Max('numero_habitacion'))['m'] or 0) + 1
+        Habitacion.objects.bulk_create([
+            Habitacion(
+                tipo_habitacion=self.random.choice(['sencilla', 'doble', 'triple']),
+                numero_habitacion=inicio_numero + i,
+                precio=150000.0,
+            )
+            for i in range(options['habitaciones'])
+        ])
+        self.habitaciones = list(
+            Habitacion.objects.filter(numero_habitacion__gte=inicio_numero).values_list('id', flat=True)
+        )
+
+        self.origen = date.today() - timedelta(days=3 * 365)
+        # Noches con reserva activa de cada habitación (bit i = origen + i)
+        self.activas = dict.fromkeys(self.habitaciones, 0)
+        pendientes = options['reservas']
+        while pendientes > 0:
+            lote = min(pendientes, options['lote'])
+            Reserva.objects.bulk_create([self.reserva_aleatoria(usuario) for _ in range(lote)])
+            pendientes -= lote
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def reserva_aleatoria(self, usuario):
+        habitacion_id = self.random.choice(self.habitaciones)
+        dia = self.random.randrange(4 * 365)
+        noches = self.random.randint(1, 7)
+        estado = self.random.choices(ESTADOS, PESOS_ESTADOS)[0]
+        # Las activas no se solapan (en Postgres lo exige reserva_sin_solapamiento):
+        # si choca con otra activa de la habitación, pasa a un estado final
+        mascara = ((1 << noches) - 1) << dia
+        if estado in ESTADOS_ACTIVOS:
+            if self.activas[habitacion_id] & mascara:
+                estado = self.random.choices(ESTADOS_INACTIVOS, PESOS_INACTIVOS)[0]
+            else:
+                self.activas[habitacion_id] |= mascara
+        fecha_inicio = self.origen + timedelta(days=dia)
+        return Reserva(
+            habitacion_id=habitacion_id,
+            usuario=usuario,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_inicio + timedelta(days=noches),
+            estado=estado,
+        )
+
+    def ventana_aleatoria(self):
+        fecha_inicio = self.origen + timedelta(days=self.random.randrange(4 * 365))
+        return fecha_inicio, fecha_inicio + timedelta(days=self.random.randint(1, 14))
+
+    def medir(self, repeticiones):
+        consultas = {
+            'disponibles': lambda inicio, fin: list(
+                Habitacion.objects.filter(estado=True).exclude(
+                    id__in=Reserva.objects.solapadas(inicio, fin).values_list('habitacion_id', flat=True)
+                ).values_list('id', flat=True)
+            ),
+            'validar_reserva': lambda inicio, fin: Reserva.objects.solapadas(inicio, fin).filter(
+                habitacion_id=self.random.choice(self.habitaciones)
+            ).exists(),
+        }
+        resultados = {}
+        for nombre, consulta in consultas.items():
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio, fin = self.ventana_aleatoria()
+                t0 = time.perf_counter()
+                consulta(inicio, fin)
+                tiempos.append((time.perf_counter() - t0) * 1000)
+            resultados[nombre] = statistics.median(tiempos)
+        return resultados
+
+    def eliminar_indices(self):
+        # La restricción de exclusión tiene su propio índice GiST: también fuera para la línea base
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'ALTER TABLE {connection.ops.quote_name(Reserva._meta.db_table)} '
+                    f'DROP CONSTRAINT IF EXISTS {connection.ops.quote_name(RESTRICCION_SOLAPAMIENTO)}'
+                )
+            for nombre in INDICES:
+                cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(nombre)}')
+            cursor.execute('ANALYZE')
@@ -0,0 +1,66 @@
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.test import Client
+
+from habitaciones.models import Habitacion, Reserva
+from registro.serializers import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el check-in y check-out de N reservas una por una contra las acciones '
+        'masivas. Todos los datos se generan dentro de una transacción que se revierte al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservas', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            admin = User.objects.create_user(username='bench_transiciones', password=None, is_staff=True)
+            token = CustomTokenObtainPairSerializer.get_token(admin).access_token
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+            self.stdout.write(f"{'operación':<12}{'una por una (s)':>18}{'masiva (s)':>14}")
+            for accion, origen in [('checkin', 'pagada'), ('checkout', 'checkin_aceptado')]:
+                individual = self.medir_individual(client, accion, self.generar(admin, origen, options['reservas']))
+                masiva = self.medir_masiva(client, accion, self.generar(admin, origen, options['reservas']))
+                self.stdout.write(f'{accion:<12}{individual:>18.3f}{masiva:>14.3f}')
+            transaction.set_rollback(True)
+
+    def generar(self, usuario, estado, cantidad):
+        # Una habitación por reserva, llegada ayer y salida hoy
+        inicio_numero = (Habitacion.objects.aggregate(m=Max('numero_habitacion'))['m'] or 0) + 1
+        habitaciones = Habitacion.objects.bulk_create([
+            Habitacion(tipo_habitacion='sencilla', numero_habitacion=inicio_numero + i, precio=150000.0)
+            for i in range(cantidad)
+        ])
+        reservas = Reserva.objects.bulk_create([
+            Reserva(
+                habitacion=habitacion, usuario=usuario, estado=estado,
+                fecha_inicio=date.today() - timedelta(days=1), fecha_fin=date.today(),
+            )
+            for habitacion in habitaciones
+        ])
+        return [reserva.id for reserva in reservas]
+
+    def medir_individual(self, client, accion, ids):
+        inicio = time.perf_counter()
+        for reserva_id in ids:
+            response = client.post(f'/api/reservas/{reserva_id}/{accion}/')
+            assert response.status_code == 200, response.content
+        return time.perf_counter() - inicio
+
+    def medir_masiva(self, client, accion, ids):
+        inicio = time.perf_counter()
+        response = client.post(f'/api/reservas/{accion}-masivo/', {'ids': ids}, content_type='application/json')
+        total = time.perf_counter() - inicio
+        assert response.json()['procesadas'] == len(ids), response.content
+        return total
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from habitaciones import estados
+
+
+class Command(BaseCommand):
+    help = (
+        'Expira las reservas pendientes sin pagar más antiguas que '
+        'Configuracion.minutos_expiracion_pendiente y libera sus noches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo', action='store_true',
+            help='Repite el barrido cada --intervalo segundos.',
+        )
+        parser.add_argument('--intervalo', type=float, default=60.0)
+        parser.add_argument('--lote', type=int, default=estados.LOTE_EXPIRACION)
+
+    def handle(self, *args, **options):
+        while True:
+            expiradas = estados.expirar_pendientes(lote=options['lote'])
+            if expiradas:
+                self.stdout.write(f'{expiradas} reservas pendientes expiradas.')
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
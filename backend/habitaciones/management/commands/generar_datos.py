@@ -0,0 +1,27 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from habitaciones.benchmark import datos
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos para benchmarks: N habitaciones de todos los tipos y M '
+        'reservas repartidas en varios años con una mezcla realista de estados. '
+        'Los datos quedan guardados; con la misma semilla se generan los mismos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habitaciones', type=int, default=200)
+        parser.add_argument('--reservas', type=int, default=20_000)
+        parser.add_argument('--anios', type=int, default=3, help='Años de historial hacia atrás.')
+        parser.add_argument('--clientes', type=int, default=500)
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        resumen = datos.generar(
+            habitaciones=options['habitaciones'], reservas=options['reservas'], anios=options['anios'],
+            clientes_totales=options['clientes'], semilla=options['semilla'],
+        )
+        self.stdout.write(json.dumps(resumen, indent=2))
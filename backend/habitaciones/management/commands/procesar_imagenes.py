@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from habitaciones import tareas
+from habitaciones.models import Habitacion
+
+
+class Command(BaseCommand):
+    help = 'Procesa las imágenes de habitaciones pendientes (validación, EXIF y variantes).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas', action='store_true',
+            help='Vuelve a encolar todas las habitaciones con imagen antes de procesar.',
+        )
+        parser.add_argument(
+            '--continuo', action='store_true',
+            help='Sigue revisando la cola cada --intervalo segundos.',
+        )
+        parser.add_argument('--intervalo', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        if options['todas']:
+            Habitacion.objects.exclude(Q(imagen='') | Q(imagen__isnull=True)).update(
+                imagen_estado=Habitacion.IMAGEN_PENDIENTE
+            )
+
+        while True:
+            procesadas = tareas.procesar_pendientes()
+            if procesadas:
+                self.stdout.write(f'{procesadas} imágenes procesadas.')
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from habitaciones import ocupacion
+
+
+class Command(BaseCommand):
+    help = 'Regenera el calendario de ocupación por noche desde las reservas, o lo verifica con --verificar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Solo compara el calendario con las reservas, sin modificarlo.',
+        )
+        parser.add_argument('--lote', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not options['verificar']:
+            creadas = ocupacion.reconstruir(lote=options['lote'])
+            self.stdout.write(self.style.SUCCESS(f'Calendario reconstruido: {creadas} noches ocupadas.'))
+
+        faltantes, sobrantes = ocupacion.verificar(lote=options['lote'])
+        if faltantes or sobrantes:
+            for habitacion_id, reserva_id, fecha in sorted(faltantes)[:20]:
+                self.stderr.write(f'Falta: habitación {habitacion_id}, reserva {reserva_id}, {fecha}')
+            for habitacion_id, reserva_id, fecha in sorted(sobrantes)[:20]:
+                self.stderr.write(f'Sobra: habitación {habitacion_id}, reserva {reserva_id}, {fecha}')
+            raise CommandError(
+                f'El calendario no coincide con las reservas: {len(faltantes)} faltantes, {len(sobrantes)} sobrantes.'
+            )
+        self.stdout.write(self.style.SUCCESS('El calendario coincide con las reservas.'))
@@ -0,0 +1,89 @@
+"""
+Base de los motores en memoria (disponibilidad y precios).
+
+Cada motor guarda una foto inmutable de un rango de fechas, cargada con las
+versiones compartidas (hotel_project/versiones.py) de las que depende. Cuando
+alguna cambia o la consulta sale del rango, se carga una foto nueva entera y se
+publica con una sola asignación: una consulta en curso nunca mezcla dos cargas.
+"""
+import threading
+from datetime import date, timedelta
+
+from hotel_project import versiones
+
+# Al recargar se cubre al menos un año desde hoy para no recargar en cada consulta
+HORIZONTE_DIAS = 366
+
+# Días hacia atrás que admiten las consultas; con HORIZONTE_DIAS acota la memoria
+HISTORIAL_DIAS = 366
+
+
+def ventana():
+    """Fechas [desde, hasta] que admiten las consultas en memoria (disponibilidad y precios)."""
+    hoy = date.today()
+    return hoy - timedelta(days=HISTORIAL_DIAS), hoy + timedelta(days=HORIZONTE_DIAS)
+
+
+def dentro_de_ventana(fecha_inicio, fecha_fin):
+    desde, hasta = ventana()
+    return desde <= fecha_inicio and fecha_fin <= hasta
+
+
+def rango_a_cargar(desde, hasta, anterior=None):
+    """
+    Rango que se carga para atender [desde, hasta): al menos de hoy a hoy +
+    HORIZONTE_DIAS, más lo que ya cubría la carga anterior, sin salir de la ventana.
+    """
+    hoy = date.today()
+    desde, hasta = min(desde, hoy), max(hasta, hoy + timedelta(days=HORIZONTE_DIAS))
+    if anterior is not None:
+        desde, hasta = min(desde, anterior[0]), max(hasta, anterior[1])
+    limite_desde, limite_hasta = ventana()
+    return max(desde, limite_desde), min(hasta, limite_hasta)
+
+
+class Foto:
+    """Datos de las noches [origen, origen + dias), válidos mientras no cambie `version`."""
+
+    def __init__(self, version, origen, dias):
+        self.version = version
+        self.origen = origen
+        self.dias = dias
+
+    @property
+    def fin(self):
+        return self.origen + timedelta(days=self.dias)
+
+    def cubre(self, desde, hasta, version):
+        return self.version == version and self.origen <= desde and hasta <= self.fin
+
+
+class MotorEnMemoria:
+    """
+    Mantiene la foto vigente. Las subclases indican en `claves` las versiones de
+    las que depende y construyen la foto en `cargar`.
+    """
+    claves = ()
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.foto = None
+
+    def asegurar(self, desde, hasta):
+        """Foto vigente que cubre [desde, hasta); ValueError si sale de la ventana."""
+        if not dentro_de_ventana(desde, hasta):
+            raise ValueError(f'Fechas fuera de la ventana admitida {ventana()}.')
+        version = tuple(versiones.leer(*self.claves))
+        foto = self.foto
+        if foto is not None and foto.cubre(desde, hasta, version):
+            return foto
+        with self.lock:
+            foto = self.foto
+            if foto is not None and foto.cubre(desde, hasta, version):
+                return foto
+            anterior = (foto.origen, foto.fin) if foto is not None and foto.version == version else None
+            foto = self.foto = self.cargar(*rango_a_cargar(desde, hasta, anterior), version)
+            return foto
+
+    def cargar(self, desde, hasta, version):
+        raise NotImplementedError
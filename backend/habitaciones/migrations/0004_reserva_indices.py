@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 11:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def crear_indice_gist(apps, schema_editor):
+    # Índice GiST sobre daterange para el operador &&, solo disponible en Postgres
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS reserva_activas_periodo_gist "
+        "ON habitaciones_reserva USING gist (daterange(fecha_inicio, fecha_fin)) "
+        "WHERE estado IN ('pendiente', 'pagada', 'checkin_aceptado')"
+    )
+
+
+def eliminar_indice_gist(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS reserva_activas_periodo_gist")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0003_reserva'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['habitacion', 'fecha_inicio', 'fecha_fin'], name='reserva_hab_fechas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado__in', ['pendiente', 'pagada', 'checkin_aceptado'])), fields=['fecha_inicio', 'fecha_fin'], name='reserva_activas_fechas_idx'),
+        ),
+        migrations.RunPython(crear_indice_gist, eliminar_indice_gist),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def crear_restriccion(apps, schema_editor):
+    # La restricción de exclusión solo existe en Postgres; en otros motores
+    # ReservaSerializer bloquea la habitación antes de insertar.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE habitaciones_reserva ADD CONSTRAINT reserva_sin_solapamiento "
+        "EXCLUDE USING gist (habitacion_id WITH =, daterange(fecha_inicio, fecha_fin) WITH &&) "
+        "WHERE (estado IN ('pendiente', 'pagada', 'checkin_aceptado'))"
+    )
+
+
+def eliminar_restriccion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "ALTER TABLE habitaciones_reserva DROP CONSTRAINT IF EXISTS reserva_sin_solapamiento"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0004_reserva_indices'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_restriccion, eliminar_restriccion),
+    ]
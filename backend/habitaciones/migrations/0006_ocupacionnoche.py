@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-18 11:24
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def poblar_ocupacion(apps, schema_editor):
+    Reserva = apps.get_model('habitaciones', 'Reserva')
+    OcupacionNoche = apps.get_model('habitaciones', 'OcupacionNoche')
+    activas = Reserva.objects.filter(estado__in=['pendiente', 'pagada', 'checkin_aceptado'])
+    pendientes = []
+    for reserva in activas.iterator(chunk_size=5000):
+        for i in range((reserva.fecha_fin - reserva.fecha_inicio).days):
+            pendientes.append(OcupacionNoche(
+                habitacion_id=reserva.habitacion_id,
+                reserva_id=reserva.id,
+                fecha=reserva.fecha_inicio + timedelta(days=i),
+            ))
+        if len(pendientes) >= 5000:
+            OcupacionNoche.objects.bulk_create(pendientes)
+            pendientes = []
+    OcupacionNoche.objects.bulk_create(pendientes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0005_reserva_sin_solapamiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacionNoche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('habitacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='habitaciones.habitacion')),
+                ('reserva', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='noches', to='habitaciones.reserva')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha', 'habitacion'], name='ocupacion_fecha_hab_idx')],
+            },
+        ),
+        migrations.RunPython(poblar_ocupacion, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0006_ocupacionnoche'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitacion',
+            name='imagen_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 11:37
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def encolar_imagenes_existentes(apps, schema_editor):
+    # Las imágenes ya subidas se procesan con `manage.py procesar_imagenes`
+    Habitacion = apps.get_model('habitaciones', 'Habitacion')
+    Habitacion.objects.exclude(Q(imagen='') | Q(imagen__isnull=True)).update(imagen_estado='pendiente')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0007_habitacion_imagen_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitacion',
+            name='imagen_estado',
+            field=models.CharField(blank=True, choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('lista', 'Lista'), ('error', 'Error')], editable=False, max_length=20),
+        ),
+        migrations.RunPython(encolar_imagenes_existentes, migrations.RunPython.noop),
+    ]
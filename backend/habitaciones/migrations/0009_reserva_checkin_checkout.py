@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0008_habitacion_imagen_estado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='checkin_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='checkout_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
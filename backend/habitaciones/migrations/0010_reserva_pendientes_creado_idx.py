@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 11:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0009_reserva_checkin_checkout'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado', 'pendiente')), fields=['creado'], name='reserva_pendientes_creado_idx'),
+        ),
+    ]
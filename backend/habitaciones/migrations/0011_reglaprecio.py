@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0010_reserva_pendientes_creado_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglaPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('clase', models.CharField(choices=[('temporada', 'Temporada'), ('dia_semana', 'Día de la semana'), ('ocupacion', 'Ocupación')], max_length=20)),
+                ('tipo_habitacion', models.CharField(blank=True, choices=[('sencilla', 'Sencilla'), ('doble', 'Doble'), ('triple', 'Triple')], max_length=20)),
+                ('factor', models.DecimalField(decimal_places=4, max_digits=6)),
+                ('fecha_inicio', models.DateField(blank=True, null=True)),
+                ('fecha_fin', models.DateField(blank=True, null=True)),
+                ('dia_semana', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('ocupacion_minima', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('prioridad', models.IntegerField(default=0)),
+                ('activa', models.BooleanField(default=True)),
+            ],
+        ),
+    ]
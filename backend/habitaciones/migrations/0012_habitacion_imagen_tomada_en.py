@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitaciones', '0011_reglaprecio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitacion',
+            name='imagen_tomada_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,14 +1,34 @@
-from django.db import models
+from django.db import models, connections
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Estados que ocupan la habitación en las fechas de la reserva
+ESTADOS_ACTIVOS = ['pendiente', 'pagada', 'checkin_aceptado']
+
+# Todos los estados que puede tener una reserva
+ESTADOS_RESERVA = ESTADOS_ACTIVOS + ['checkout', 'cancelada', 'expirada']
+
+# Restricción de exclusión de Postgres que impide reservas activas solapadas
+RESTRICCION_SOLAPAMIENTO = 'reserva_sin_solapamiento'
+
 class Habitacion(models.Model):
     TIPO_CHOICES = [
         ('sencilla', 'Sencilla'),
         ('doble', 'Doble'),
         ('triple', 'Triple'),
     ]
+
+    IMAGEN_PENDIENTE = 'pendiente'
+    IMAGEN_PROCESANDO = 'procesando'
+    IMAGEN_LISTA = 'lista'
+    IMAGEN_ERROR = 'error'
+    IMAGEN_ESTADO_CHOICES = [
+        (IMAGEN_PENDIENTE, 'Pendiente'),
+        (IMAGEN_PROCESANDO, 'Procesando'),
+        (IMAGEN_LISTA, 'Lista'),
+        (IMAGEN_ERROR, 'Error'),
+    ]
     
     tipo_habitacion = models.CharField(max_length=20, choices=TIPO_CHOICES)
     numero_habitacion = models.IntegerField(unique=True)
@@ -16,17 +36,123 @@ class Habitacion(models.Model):
     estado = models.BooleanField(default=True)
     imagen = models.ImageField(upload_to='habitaciones/', null=True, blank=True)
     descripcion = models.TextField(blank=True, null= True)
+    # SHA-256 de la imagen original; identifica sus variantes (ver habitaciones/imagenes.py)
+    imagen_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Estado del procesamiento en segundo plano de la imagen (ver habitaciones/tareas.py)
+    imagen_estado = models.CharField(max_length=20, choices=IMAGEN_ESTADO_CHOICES, blank=True, editable=False)
+    # Cuándo un worker tomó la tarea; pasado el tiempo máximo se da por abandonada
+    imagen_tomada_en = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"Habitación {self.numero_habitacion} - {self.tipo_habitacion}"
 
+class DateRange(models.Func):
+    """daterange(fecha_inicio, fecha_fin) de Postgres, con límites [inicio, fin)."""
+    function = 'daterange'
+
+    def __init__(self, *expressions, **extra):
+        from django.contrib.postgres.fields import DateRangeField
+        super().__init__(*expressions, output_field=DateRangeField(), **extra)
+
+
+class ReservaQuerySet(models.QuerySet):
+    def activas(self):
+        return self.filter(estado__in=ESTADOS_ACTIVOS)
+
+    def solapadas(self, fecha_inicio, fecha_fin):
+        """
+        Reservas activas que se cruzan con el rango [fecha_inicio, fecha_fin).
+        En Postgres usa el operador && sobre daterange para aprovechar el índice GiST.
+        """
+        queryset = self.activas()
+        if connections[self.db].vendor == 'postgresql':
+            from django.contrib.postgres.fields.ranges import DateRange as Rango
+            return queryset.annotate(
+                periodo=DateRange('fecha_inicio', 'fecha_fin')
+            ).filter(periodo__overlap=Rango(fecha_inicio, fecha_fin))
+        return queryset.filter(fecha_inicio__lt=fecha_fin, fecha_fin__gt=fecha_inicio)
+
+
 class Reserva(models.Model):
     habitacion = models.ForeignKey(Habitacion, on_delete=models.CASCADE)
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField()
-    estado = models.CharField(max_length=20, default='pendiente')  # pendiente, pagada, cancelada
+    estado = models.CharField(max_length=20, default='pendiente')  # ver habitaciones/estados.py
     creado = models.DateTimeField(auto_now_add=True)
+    checkin_en = models.DateTimeField(null=True, blank=True, editable=False)
+    checkout_en = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ReservaQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['habitacion', 'fecha_inicio', 'fecha_fin'],
+                name='reserva_hab_fechas_idx',
+            ),
+            models.Index(
+                fields=['fecha_inicio', 'fecha_fin'],
+                condition=models.Q(estado__in=ESTADOS_ACTIVOS),
+                name='reserva_activas_fechas_idx',
+            ),
+            # Barrido de reservas pendientes vencidas (ver estados.expirar_pendientes)
+            models.Index(
+                fields=['creado'],
+                condition=models.Q(estado='pendiente'),
+                name='reserva_pendientes_creado_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Reserva de {self.habitacion} por {self.usuario} del {self.fecha_inicio} al {self.fecha_fin}"
+
+class OcupacionNoche(models.Model):
+    """
+    Calendario materializado: una fila por noche ocupada de cada habitación.
+    Se mantiene con las señales de Reserva (ver habitaciones/signals.py).
+    """
+    habitacion = models.ForeignKey(Habitacion, on_delete=models.CASCADE)
+    reserva = models.ForeignKey(Reserva, on_delete=models.CASCADE, related_name='noches')
+    fecha = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha', 'habitacion'], name='ocupacion_fecha_hab_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.habitacion} ocupada el {self.fecha}"
+
+
+class ReglaPrecio(models.Model):
+    """
+    Regla de la tarifa dinámica (ver habitaciones/precios.py). Multiplica el precio
+    base de las habitaciones de un tipo (o de todas, sin tipo) por `factor`:
+
+    - temporada: las noches de [fecha_inicio, fecha_fin)
+    - dia_semana: las noches de ese día (0 = lunes ... 6 = domingo)
+    - ocupacion: las noches en que la ocupación del tipo llega a ocupacion_minima (%)
+    """
+    TEMPORADA = 'temporada'
+    DIA_SEMANA = 'dia_semana'
+    OCUPACION = 'ocupacion'
+    CLASE_CHOICES = [
+        (TEMPORADA, 'Temporada'),
+        (DIA_SEMANA, 'Día de la semana'),
+        (OCUPACION, 'Ocupación'),
+    ]
+
+    nombre = models.CharField(max_length=100)
+    clase = models.CharField(max_length=20, choices=CLASE_CHOICES)
+    tipo_habitacion = models.CharField(max_length=20, choices=Habitacion.TIPO_CHOICES, blank=True)
+    factor = models.DecimalField(max_digits=6, decimal_places=4)
+    fecha_inicio = models.DateField(null=True, blank=True)
+    fecha_fin = models.DateField(null=True, blank=True)
+    dia_semana = models.PositiveSmallIntegerField(null=True, blank=True)
+    ocupacion_minima = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    prioridad = models.IntegerField(default=0)
+    activa = models.BooleanField(default=True)
 
     def __str__(self):
-        return f"Reserva de {self.habitacion} por {self.usuario} del {self.fecha_inicio} al {self.fecha_fin}"
\ No newline at end of file
+        return f"{self.nombre} ({self.get_clase_display()}, x{self.factor})"
@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import ESTADOS_ACTIVOS, Habitacion, OcupacionNoche, Reserva
+
+
+def noches(reserva):
+    """Filas de OcupacionNoche de una reserva: una por noche en [fecha_inicio, fecha_fin)."""
+    if reserva.estado not in ESTADOS_ACTIVOS:
+        return []
+    dias = (reserva.fecha_fin - reserva.fecha_inicio).days
+    return [
+        OcupacionNoche(
+            habitacion_id=reserva.habitacion_id,
+            reserva_id=reserva.id,
+            fecha=reserva.fecha_inicio + timedelta(days=i),
+        )
+        for i in range(dias)
+    ]
+
+
+def sincronizar_reserva(reserva):
+    """Reemplaza las noches de la reserva según su estado y fechas actuales."""
+    with transaction.atomic():
+        OcupacionNoche.objects.filter(reserva_id=reserva.id).delete()
+        OcupacionNoche.objects.bulk_create(noches(reserva))
+
+
+def habitaciones_ocupadas(fecha_inicio, fecha_fin):
+    """ids de habitaciones con al menos una noche ocupada en [fecha_inicio, fecha_fin)."""
+    return OcupacionNoche.objects.filter(
+        fecha__gte=fecha_inicio, fecha__lt=fecha_fin
+    ).values_list('habitacion_id', flat=True)
+
+
+def responder_consultas(consultas):
+    """
+    Responde varias consultas de disponibilidad con una sola consulta SQL.
+
+    Cada consulta trae fecha_inicio, fecha_fin y habitacion_id o tipo. Se anota un
+    EXISTS sobre el calendario por cada rango de fechas distinto, así cada habitación
+    candidata sale con un indicador de ocupación por rango. Las habitaciones fuera de
+    servicio (estado=False) no están disponibles, igual que en /disponibles/.
+    """
+    rangos = list(dict.fromkeys((c['fecha_inicio'], c['fecha_fin']) for c in consultas))
+    anotaciones = {
+        f'ocupada_{i}': Exists(OcupacionNoche.objects.filter(
+            habitacion=OuterRef('pk'), fecha__gte=inicio, fecha__lt=fin
+        ))
+        for i, (inicio, fin) in enumerate(rangos)
+    }
+    ids = {c['habitacion_id'] for c in consultas if 'habitacion_id' in c}
+    tipos = {c['tipo'] for c in consultas if 'tipo' in c}
+    habitaciones = list(
+        Habitacion.objects.filter(Q(id__in=ids) | Q(tipo_habitacion__in=tipos), estado=True)
+        .annotate(**anotaciones)
+        .values('id', 'tipo_habitacion', *anotaciones)
+        .order_by('numero_habitacion')
+    )
+    por_id = {h['id']: h for h in habitaciones}
+
+    resultados = []
+    for consulta in consultas:
+        ocupada = f"ocupada_{rangos.index((consulta['fecha_inicio'], consulta['fecha_fin']))}"
+        resultado = dict(consulta)
+        if 'habitacion_id' in consulta:
+            habitacion = por_id.get(consulta['habitacion_id'])
+            resultado['disponible'] = habitacion is not None and not habitacion[ocupada]
+        else:
+            resultado['habitaciones'] = [
+                h['id'] for h in habitaciones
+                if h['tipo_habitacion'] == consulta['tipo'] and not h[ocupada]
+            ]
+        resultados.append(resultado)
+    return resultados
+
+
+def reservas_activas():
+    return Reserva.objects.activas().only(
+        'id', 'habitacion_id', 'fecha_inicio', 'fecha_fin', 'estado'
+    ).order_by('id')
+
+
+def reconstruir(lote=5000):
+    """Regenera el calendario completo a partir de las reservas. Devuelve las filas creadas."""
+    creadas = 0
+    with transaction.atomic():
+        OcupacionNoche.objects.all().delete()
+        pendientes = []
+        for reserva in reservas_activas().iterator(chunk_size=lote):
+            pendientes.extend(noches(reserva))
+            if len(pendientes) >= lote:
+                OcupacionNoche.objects.bulk_create(pendientes)
+                creadas += len(pendientes)
+                pendientes = []
+        OcupacionNoche.objects.bulk_create(pendientes)
+        creadas += len(pendientes)
+    return creadas
+
+
+def verificar(lote=5000):
+    """
+    Compara el calendario con las reservas.
+    Devuelve (faltantes, sobrantes) como conjuntos de (habitacion_id, reserva_id, fecha).
+    """
+    esperadas = set()
+    for reserva in reservas_activas().iterator(chunk_size=lote):
+        esperadas.update((n.habitacion_id, n.reserva_id, n.fecha) for n in noches(reserva))
+    actuales = set(
+        OcupacionNoche.objects.values_list('habitacion_id', 'reserva_id', 'fecha').iterator(chunk_size=lote)
+    )
+    return esperadas - actuales, actuales - esperadas
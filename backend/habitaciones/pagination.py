@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ReservaCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) sobre la llave primaria.
+    El costo de cada página es constante sin importar el tamaño del historial.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-id'
@@ -0,0 +1,183 @@
+"""
+Tarifa dinámica por noche.
+
+El precio de una noche es el precio base de la habitación por el factor de ese
+día para su tipo: el producto de una regla de cada clase (temporada, día de la
+semana y ocupación; ver ReglaPrecio). De cada clase se aplica una sola regla, la
+de mayor prioridad; a igual prioridad gana la específica del tipo sobre la
+general y, entre las de ocupación, la de umbral más alto.
+
+Los factores de temporada y día de la semana se compilan por tipo en una tabla
+por noche. De ella salen, para cada precio base, las tarifas de cada noche ya
+redondeadas y sus sumas acumuladas, así el total de cualquier estadía es
+acumulado[fin] - acumulado[inicio]. La tabla depende solo de las reglas: se
+recompila cuando cambia la versión de precios (señales de ReglaPrecio), no con
+cada reserva.
+
+La ocupación sí cambia con cada reserva, así que las reglas de ocupación se
+aplican al cotizar, sobre las noches de la estadía y con el calendario del motor
+de disponibilidad. Solo los tipos que tienen reglas de ocupación lo consultan.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import accumulate
+
+from hotel_project import versiones
+
+from . import disponibilidad
+from .memoria import Foto, MotorEnMemoria
+from .models import Habitacion, ReglaPrecio
+
+CLAVE_VERSION = 'habitaciones:precios:version'
+
+CENTAVOS = Decimal('0.01')
+UNO = Decimal(1)
+
+
+def invalidar():
+    """Marca las tablas de tarifas como obsoletas en todos los procesos."""
+    versiones.invalidar(CLAVE_VERSION)
+
+
+def a_decimal(precio):
+    # Habitacion.precio es un float: str() da el valor que se guardó, no su binario
+    return Decimal(str(precio))
+
+
+def redondear(valor):
+    return valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def orden_aplicacion(regla):
+    """Se aplican de menor a mayor: la última que cubre una noche es la que vale."""
+    return (regla.prioridad, bool(regla.tipo_habitacion), regla.ocupacion_minima or 0, regla.id)
+
+
+def factores_por_clase(reglas, desde, dias, ocupacion=(), habitaciones=0):
+    """Factor de cada noche de [desde, desde + dias) para una clase de reglas ya ordenadas."""
+    factores = [UNO] * dias
+    for regla in reglas:
+        if regla.clase == ReglaPrecio.TEMPORADA:
+            inicio = max((regla.fecha_inicio - desde).days, 0)
+            fin = min((regla.fecha_fin - desde).days, dias)
+            if inicio < fin:
+                factores[inicio:fin] = [regla.factor] * (fin - inicio)
+        elif regla.clase == ReglaPrecio.DIA_SEMANA:
+            primera = (regla.dia_semana - desde.weekday()) % 7
+            factores[primera::7] = [regla.factor] * len(range(primera, dias, 7))
+        elif habitaciones:
+            # ocupadas / habitaciones >= minima / 100, sin dividir
+            umbral = regla.ocupacion_minima * habitaciones
+            for i, ocupadas in enumerate(ocupacion):
+                if ocupadas * 100 >= umbral:
+                    factores[i] = regla.factor
+    return factores
+
+
+class TablaTarifas(Foto):
+    """
+    Factores de temporada y día de la semana por tipo y noche desde `origen`, con las
+    tarifas por precio base calculadas a demanda, y las reglas de ocupación de cada tipo.
+    """
+
+    def __init__(self, version, origen, dias, factores, reglas_ocupacion):
+        super().__init__(version, origen, dias)
+        self.factores = factores
+        self.reglas_ocupacion = reglas_ocupacion
+        self._tarifas = {}
+
+    def tarifas(self, tipo, precio):
+        """(tarifa de cada noche, sumas acumuladas) de un tipo con ese precio base."""
+        clave = (tipo, precio)
+        tarifas = self._tarifas.get(clave)
+        if tarifas is None:
+            base = a_decimal(precio)
+            noches = [redondear(base * factor) for factor in self.factores[tipo]]
+            # Las habitaciones de un tipo comparten casi siempre el precio: pocas entradas
+            tarifas = self._tarifas[clave] = (noches, [Decimal(0), *accumulate(noches)])
+        return tarifas
+
+    def total(self, tipo, precio, fecha_inicio, fecha_fin, ocupacion=None):
+        """`ocupacion`: factor de ocupación de cada noche de la estadía, o None si no aplica."""
+        if ocupacion is None:
+            _, acumulados = self.tarifas(tipo, precio)
+            return acumulados[(fecha_fin - self.origen).days] - acumulados[(fecha_inicio - self.origen).days]
+        noches = self.desglose(tipo, precio, fecha_inicio, fecha_fin, ocupacion)
+        return sum((noche['precio'] for noche in noches), Decimal(0))
+
+    def desglose(self, tipo, precio, fecha_inicio, fecha_fin, ocupacion=None):
+        noches, _ = self.tarifas(tipo, precio)
+        base = a_decimal(precio)
+        inicio = (fecha_inicio - self.origen).days
+        desglose = []
+        for i in range((fecha_fin - fecha_inicio).days):
+            factor, tarifa = self.factores[tipo][inicio + i], noches[inicio + i]
+            if ocupacion is not None and ocupacion[i] != UNO:
+                factor *= ocupacion[i]
+                tarifa = redondear(base * factor)
+            desglose.append({'fecha': fecha_inicio + timedelta(days=i), 'factor': factor, 'precio': tarifa})
+        return desglose
+
+
+class MotorPrecios(MotorEnMemoria):
+    """Tabla de tarifas en memoria, recompilada cuando cambian las reglas."""
+    claves = (CLAVE_VERSION,)
+
+    def cargar(self, desde, hasta, version):
+        dias = (hasta - desde).days
+        reglas = sorted(ReglaPrecio.objects.filter(activa=True), key=orden_aplicacion)
+
+        factores = {}
+        reglas_ocupacion = {}
+        for tipo, _ in Habitacion.TIPO_CHOICES:
+            por_clase = defaultdict(list)
+            for regla in reglas:
+                if regla.tipo_habitacion in ('', tipo):
+                    por_clase[regla.clase].append(regla)
+            reglas_ocupacion[tipo] = por_clase.pop(ReglaPrecio.OCUPACION, [])
+            producto = [UNO] * dias
+            for reglas_clase in por_clase.values():
+                clase_factores = factores_por_clase(reglas_clase, desde, dias)
+                producto = [a * b for a, b in zip(producto, clase_factores)]
+            factores[tipo] = producto
+        return TablaTarifas(version, desde, dias, factores, reglas_ocupacion)
+
+    def ocupacion(self, tabla, tipo, fecha_inicio, fecha_fin):
+        """Factor de ocupación de cada noche de la estadía, o None si el tipo no tiene reglas de ocupación."""
+        reglas = tabla.reglas_ocupacion[tipo]
+        if not reglas:
+            return None
+        calendario = disponibilidad.motor.asegurar(fecha_inicio, fecha_fin)
+        ocupadas, habitaciones = calendario.ocupadas(tipo, fecha_inicio, fecha_fin)
+        return factores_por_clase(reglas, fecha_inicio, len(ocupadas), ocupadas, habitaciones)
+
+    def cotizar(self, habitacion, fecha_inicio, fecha_fin):
+        """Total y desglose por noche de una estadía en una habitación."""
+        tabla = self.asegurar(fecha_inicio, fecha_fin)
+        tipo, precio = habitacion.tipo_habitacion, habitacion.precio
+        ocupacion = self.ocupacion(tabla, tipo, fecha_inicio, fecha_fin)
+        return {
+            'habitacion_id': habitacion.id,
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'noches': (fecha_fin - fecha_inicio).days,
+            'total': tabla.total(tipo, precio, fecha_inicio, fecha_fin, ocupacion),
+            'desglose': tabla.desglose(tipo, precio, fecha_inicio, fecha_fin, ocupacion),
+        }
+
+    def cotizar_todas(self, habitaciones, fecha_inicio, fecha_fin):
+        """Total de la estadía en cada habitación (dicts con id, numero_habitacion, tipo y precio)."""
+        tabla = self.asegurar(fecha_inicio, fecha_fin)
+        ocupacion = {}
+        cotizaciones = []
+        for habitacion in habitaciones:
+            tipo = habitacion['tipo_habitacion']
+            if tipo not in ocupacion:
+                ocupacion[tipo] = self.ocupacion(tabla, tipo, fecha_inicio, fecha_fin)
+            total = tabla.total(tipo, habitacion['precio'], fecha_inicio, fecha_fin, ocupacion[tipo])
+            cotizaciones.append({**habitacion, 'total': total})
+        return cotizaciones
+
+
+motor = MotorPrecios()
@@ -1,12 +1,150 @@
+from contextlib import contextmanager
 from rest_framework import serializers
-from .models import Habitacion, Reserva
+from rest_framework.settings import api_settings
+from django.core.validators import validate_image_file_extension
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from .models import Habitacion, ReglaPrecio, Reserva, ESTADOS_ACTIVOS, ESTADOS_RESERVA, RESTRICCION_SOLAPAMIENTO
+from .imagenes import urls_variantes
+from . import memoria
 from datetime import date
 
+MENSAJE_NO_DISPONIBLE = "La habitación no está disponible en las fechas seleccionadas."
+
+MAX_NOCHES_COTIZACION = 365
+
+
+def bloquear_habitaciones(ids):
+    if connection.features.has_select_for_update:
+        list(Habitacion.objects.select_for_update().filter(pk__in=ids).values_list('pk', flat=True))
+    else:
+        # SQLite ignora FOR UPDATE: un UPDATE toma el bloqueo de escritura de la base
+        Habitacion.objects.filter(pk__in=ids).update(estado=F('estado'))
+
 class HabitacionSerializer(serializers.ModelSerializer):
+    # Sin decodificar con Pillow en la petición: la validación ocurre en segundo plano
+    imagen = serializers.FileField(
+        required=False, allow_null=True, validators=[validate_image_file_extension]
+    )
+    imagenes = serializers.SerializerMethodField()
+
     class Meta:
         model = Habitacion
         fields = '__all__'
 
+    def get_imagenes(self, obj):
+        if obj.imagen_estado != Habitacion.IMAGEN_LISTA:
+            return None
+        return urls_variantes(obj.imagen_hash, self.context.get('request'))
+
+class ConsultaDisponibilidadSerializer(serializers.Serializer):
+    """Una consulta de disponibilidad: una habitación concreta o todas las de un tipo."""
+    habitacion_id = serializers.IntegerField(required=False)
+    tipo = serializers.ChoiceField(choices=Habitacion.TIPO_CHOICES, required=False)
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+
+    def validate(self, data):
+        if ('habitacion_id' in data) == ('tipo' in data):
+            raise serializers.ValidationError("Indique habitacion_id o tipo, no ambos.")
+        if data['fecha_inicio'] >= data['fecha_fin']:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior a la fecha de fin.")
+        return data
+
+class DisponibilidadBatchSerializer(serializers.Serializer):
+    consultas = ConsultaDisponibilidadSerializer(many=True, allow_empty=False, max_length=100)
+
+class ConsultaCotizacionSerializer(serializers.Serializer):
+    """Parámetros de una cotización; tipo y disponibles solo aplican a la de todas las habitaciones."""
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    tipo = serializers.ChoiceField(choices=Habitacion.TIPO_CHOICES, required=False)
+    disponibles = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['fecha_inicio'] >= data['fecha_fin']:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior a la fecha de fin.")
+        if (data['fecha_fin'] - data['fecha_inicio']).days > MAX_NOCHES_COTIZACION:
+            raise serializers.ValidationError(f"Se cotizan como máximo {MAX_NOCHES_COTIZACION} noches.")
+        # Las tarifas se precalculan solo para la ventana de los motores en memoria
+        if not memoria.dentro_de_ventana(data['fecha_inicio'], data['fecha_fin']):
+            desde, hasta = memoria.ventana()
+            raise serializers.ValidationError(f"Las fechas deben estar entre {desde} y {hasta}.")
+        return data
+
+class NocheCotizadaSerializer(serializers.Serializer):
+    fecha = serializers.DateField()
+    factor = serializers.DecimalField(max_digits=12, decimal_places=4)
+    precio = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+# Importes como cadenas con dos decimales: nunca pasan por float
+class CotizacionSerializer(serializers.Serializer):
+    habitacion_id = serializers.IntegerField()
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    noches = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    desglose = NocheCotizadaSerializer(many=True)
+
+class CotizacionHabitacionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    numero_habitacion = serializers.IntegerField()
+    tipo_habitacion = serializers.CharField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class ReglaPrecioSerializer(serializers.ModelSerializer):
+    # Campos que usa cada clase de regla; los demás deben quedar vacíos
+    CAMPOS_CLASE = {
+        ReglaPrecio.TEMPORADA: ('fecha_inicio', 'fecha_fin'),
+        ReglaPrecio.DIA_SEMANA: ('dia_semana',),
+        ReglaPrecio.OCUPACION: ('ocupacion_minima',),
+    }
+
+    class Meta:
+        model = ReglaPrecio
+        fields = '__all__'
+
+    def validate(self, data):
+        datos = {**self.datos_actuales(), **data}
+        usados = self.CAMPOS_CLASE[datos['clase']]
+        errores = {}
+        for campos in self.CAMPOS_CLASE.values():
+            for campo in campos:
+                if campo in usados and datos.get(campo) is None:
+                    errores[campo] = "Obligatorio para esta clase de regla."
+                elif campo not in usados and datos.get(campo) is not None:
+                    errores[campo] = "No aplica a esta clase de regla."
+        if errores:
+            raise serializers.ValidationError(errores)
+
+        if datos['factor'] <= 0:
+            raise serializers.ValidationError({'factor': "Debe ser mayor que cero."})
+        if datos['clase'] == ReglaPrecio.TEMPORADA and datos['fecha_inicio'] >= datos['fecha_fin']:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior a la fecha de fin.")
+        if datos['clase'] == ReglaPrecio.DIA_SEMANA and datos['dia_semana'] > 6:
+            raise serializers.ValidationError({'dia_semana': "Debe estar entre 0 (lunes) y 6 (domingo)."})
+        if datos['clase'] == ReglaPrecio.OCUPACION and not 0 <= datos['ocupacion_minima'] <= 100:
+            raise serializers.ValidationError({'ocupacion_minima': "Debe estar entre 0 y 100."})
+        return data
+
+    def datos_actuales(self):
+        # En un PATCH se valida la regla resultante, no solo los campos enviados
+        if self.instance is None:
+            return {}
+        return {campo.name: getattr(self.instance, campo.name) for campo in ReglaPrecio._meta.concrete_fields}
+
+class TransicionMasivaSerializer(serializers.Serializer):
+    """Reservas de una acción masiva: una lista de ids o todas las que tocan hoy."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=1000
+    )
+    todas_hoy = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if ('ids' in data) == data['todas_hoy']:
+            raise serializers.ValidationError("Indique ids o todas_hoy, no ambos.")
+        return data
+
 class ReservaSerializer(serializers.ModelSerializer):
     habitacion = HabitacionSerializer(read_only=True)
     habitacion_id = serializers.PrimaryKeyRelatedField(
@@ -16,12 +154,18 @@ class ReservaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reserva
         fields = '__all__'
-        read_only_fields = ('usuario',)
+        # El estado y sus marcas solo cambian con las acciones pagar/checkin/checkout/cancelar
+        read_only_fields = ('usuario', 'estado', 'checkin_en', 'checkout_en')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Representación compacta: solo el id de la habitación
+        if not self.context.get('expand_habitacion', True):
+            self.fields['habitacion'] = serializers.PrimaryKeyRelatedField(read_only=True)
     
     def validate(self, data):
         fecha_inicio = data.get('fecha_inicio')
         fecha_fin = data.get('fecha_fin')
-        habitacion = data.get('habitacion')
         
 
         if fecha_inicio and fecha_fin and fecha_inicio >= fecha_fin:
@@ -30,20 +174,83 @@ class ReservaSerializer(serializers.ModelSerializer):
 
         if fecha_inicio and fecha_inicio < date.today():
             raise serializers.ValidationError("La fecha de inicio no puede ser en el pasado.")
-        
 
-        if habitacion and fecha_inicio and fecha_fin:
-            reservas_existentes = Reserva.objects.filter(
-                habitacion=habitacion,
-                fecha_inicio__lt=fecha_fin,
-                fecha_fin__gt=fecha_inicio,
-                estado__in=['pendiente', 'pagada', 'checkin_aceptado']
+        # Los cambios de estado pasan por las acciones (ver habitaciones/estados.py)
+        estado = self.initial_data.get('estado') if hasattr(self.initial_data, 'get') else None
+        if estado is not None and estado != getattr(self.instance, 'estado', 'pendiente'):
+            raise serializers.ValidationError(
+                {'estado': "El estado se cambia con las acciones pagar, checkin, checkout o cancelar."}
             )
 
-            if self.instance:
-                reservas_existentes = reservas_existentes.exclude(id=self.instance.id)
-            
-            if reservas_existentes.exists():
-                raise serializers.ValidationError("La habitación no está disponible en las fechas seleccionadas.")
-        
-        return data
\ No newline at end of file
+        return data
+
+    def create(self, validated_data):
+        with self.reserva_exclusiva(validated_data):
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with self.reserva_exclusiva(validated_data):
+            return super().update(instance, validated_data)
+
+    @contextmanager
+    def reserva_exclusiva(self, validated_data):
+        """
+        Garantiza en la base de datos que no haya dos reservas activas solapadas.
+        En Postgres lo hace la restricción de exclusión y la reserva es un solo INSERT;
+        en otros motores se bloquea la habitación y se comprueba dentro de la transacción.
+        """
+        def valor(campo, defecto=None):
+            return validated_data.get(campo, getattr(self.instance, campo, defecto))
+
+        habitacion = valor('habitacion')
+        try:
+            with transaction.atomic():
+                if connection.vendor != 'postgresql' and valor('estado', 'pendiente') in ESTADOS_ACTIVOS:
+                    self.bloquear_habitacion(habitacion)
+                    reservas_existentes = Reserva.objects.solapadas(
+                        valor('fecha_inicio'), valor('fecha_fin')
+                    ).filter(habitacion=habitacion)
+                    if self.instance:
+                        reservas_existentes = reservas_existentes.exclude(id=self.instance.id)
+                    if reservas_existentes.exists():
+                        raise self.no_disponible()
+                yield
+        except IntegrityError as e:
+            if RESTRICCION_SOLAPAMIENTO not in str(e):
+                raise
+            raise self.no_disponible()
+
+    def bloquear_habitacion(self, habitacion):
+        bloquear_habitaciones([habitacion.pk])
+
+    def no_disponible(self):
+        return serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [MENSAJE_NO_DISPONIBLE]})
+
+
+class HabitacionImportSerializer(serializers.ModelSerializer):
+    """Fila de la importación masiva de habitaciones (ver habitaciones/importacion.py)."""
+
+    class Meta:
+        model = Habitacion
+        fields = ('tipo_habitacion', 'numero_habitacion', 'precio', 'estado', 'descripcion')
+        # La unicidad del número se comprueba una vez por lote, no por fila
+        extra_kwargs = {'numero_habitacion': {'validators': []}}
+
+class ReservaImportSerializer(serializers.ModelSerializer):
+    """
+    Fila de la importación masiva de reservas. Admite reservas históricas, así que
+    no rechaza fechas pasadas; la existencia de habitación y usuario y los solapamientos
+    se comprueban por lote.
+    """
+    habitacion_id = serializers.IntegerField()
+    usuario_id = serializers.IntegerField()
+    estado = serializers.ChoiceField(choices=ESTADOS_RESERVA, default='pendiente')
+
+    class Meta:
+        model = Reserva
+        fields = ('habitacion_id', 'usuario_id', 'fecha_inicio', 'fecha_fin', 'estado')
+
+    def validate(self, data):
+        if data['fecha_inicio'] >= data['fecha_fin']:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior a la fecha de fin.")
+        return data
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from hotel_project.versiones import invalidar_ahora_y_tras_commit
+
+from . import cache, disponibilidad, precios, tareas
+from .models import Habitacion, ReglaPrecio, Reserva
+from .ocupacion import sincronizar_reserva
+
+
+@receiver(post_save, sender=Reserva)
+def actualizar_ocupacion(sender, instance, raw=False, **kwargs):
+    # Las filas de la reserva eliminada se borran en cascada
+    if raw:
+        return
+    sincronizar_reserva(instance)
+
+
+@receiver(post_save, sender=Reserva)
+@receiver(post_delete, sender=Reserva)
+@receiver(post_save, sender=Habitacion)
+@receiver(post_delete, sender=Habitacion)
+def invalidar_disponibilidad(sender, **kwargs):
+    invalidar_ahora_y_tras_commit(disponibilidad.invalidar)
+
+
+@receiver(post_save, sender=Habitacion)
+@receiver(post_delete, sender=Habitacion)
+def invalidar_catalogo(sender, **kwargs):
+    invalidar_ahora_y_tras_commit(cache.invalidar)
+
+
+@receiver(post_save, sender=ReglaPrecio)
+@receiver(post_delete, sender=ReglaPrecio)
+def invalidar_precios(sender, **kwargs):
+    invalidar_ahora_y_tras_commit(precios.invalidar)
+
+
+@receiver(pre_save, sender=Habitacion)
+def detectar_imagen_nueva(sender, instance, raw=False, **kwargs):
+    # Un archivo recién subido aún no se ha guardado en el storage
+    instance._imagen_nueva = not raw and bool(instance.imagen) and not instance.imagen._committed
+    if instance._imagen_nueva:
+        instance.imagen_estado = Habitacion.IMAGEN_PENDIENTE
+        instance.imagen_hash = ''
+    elif not instance.imagen:
+        instance.imagen_estado = ''
+        instance.imagen_hash = ''
+
+
+@receiver(post_save, sender=Habitacion)
+def encolar_imagen(sender, instance, **kwargs):
+    if getattr(instance, '_imagen_nueva', False):
+        instance._imagen_nueva = False
+        habitacion_id = instance.pk
+        transaction.on_commit(lambda: tareas.encolar(habitacion_id))
@@ -0,0 +1,111 @@
+"""
+Cola local de procesamiento de imágenes, sin broker externo.
+El estado vive en Habitacion.imagen_estado; un hilo del propio proceso toma la
+tarea al confirmarse la subida y `manage.py procesar_imagenes` recoge las que
+hayan quedado pendientes. Las que un proceso tomó y no terminó (murió o se
+reinició a mitad) se vuelven a encolar pasado HABITACIONES_IMAGENES_TIEMPO_MAXIMO;
+el hilo arranca con la primera petición que atiende el proceso (ver apps.py) y
+empieza recogiendo lo pendiente, así no hace falta esperar a una subida nueva.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.signals import request_started
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+
+from . import cache
+from .imagenes import procesar_imagen
+from .models import Habitacion
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='imagenes')
+        # Lo que dejó a medias un proceso anterior
+        _executor.submit(ejecutar_en_hilo, procesar_pendientes)
+    return _executor
+
+
+def recuperar_al_servir(**kwargs):
+    """Receptor de request_started: arranca el hilo una sola vez por proceso."""
+    request_started.disconnect(recuperar_al_servir)
+    executor()
+
+
+def encolar(habitacion_id):
+    if settings.HABITACIONES_IMAGENES_EN_PROCESO:
+        executor().submit(ejecutar_en_hilo, procesar, habitacion_id)
+
+
+def ejecutar_en_hilo(tarea, *args):
+    close_old_connections()
+    try:
+        tarea(*args)
+    except Exception:
+        logger.exception('Error procesando imágenes de habitaciones (%s%s)', tarea.__name__, args)
+    finally:
+        connection.close()
+
+
+def procesar(habitacion_id):
+    """Procesa una habitación pendiente. Devuelve False si otro proceso ya la tomó."""
+    tomada = Habitacion.objects.filter(
+        pk=habitacion_id, imagen_estado=Habitacion.IMAGEN_PENDIENTE
+    ).update(imagen_estado=Habitacion.IMAGEN_PROCESANDO, imagen_tomada_en=timezone.now())
+    if not tomada:
+        return False
+
+    original = Habitacion.objects.values_list('imagen', flat=True).get(pk=habitacion_id)
+    cambios = {'imagen_estado': Habitacion.IMAGEN_LISTA}
+    try:
+        cambios['imagen'], cambios['imagen_hash'] = procesar_imagen(original)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning('Imagen inválida en la habitación %s: %s', habitacion_id, e)
+        # El archivo sin validar no se queda como imagen de la habitación
+        cambios = {'imagen_estado': Habitacion.IMAGEN_ERROR, 'imagen_hash': '', 'imagen': None}
+
+    # Si mientras tanto se subió otra imagen, su propia tarea la procesará
+    actualizada = Habitacion.objects.filter(
+        pk=habitacion_id, imagen=original, imagen_estado=Habitacion.IMAGEN_PROCESANDO
+    ).update(imagen_tomada_en=None, **cambios)
+    nueva = cambios['imagen']
+    # Los archivos se borran después del UPDATE: el que quedó sin usar es el que sobra
+    if actualizada and nueva != original:
+        default_storage.delete(original)
+    elif not actualizada and nueva and nueva != original:
+        default_storage.delete(nueva)
+    cache.invalidar()
+    return True
+
+
+def reencolar_abandonadas():
+    """Vuelve a pendiente las imágenes tomadas hace más del tiempo máximo."""
+    limite = timezone.now() - timedelta(seconds=settings.HABITACIONES_IMAGENES_TIEMPO_MAXIMO)
+    return Habitacion.objects.filter(
+        Q(imagen_tomada_en__lt=limite) | Q(imagen_tomada_en__isnull=True),
+        imagen_estado=Habitacion.IMAGEN_PROCESANDO,
+    ).update(imagen_estado=Habitacion.IMAGEN_PENDIENTE, imagen_tomada_en=None)
+
+
+def procesar_pendientes():
+    reencoladas = reencolar_abandonadas()
+    if reencoladas:
+        logger.warning('%s imágenes abandonadas a medio procesar vuelven a la cola', reencoladas)
+    procesadas = 0
+    pendientes = Habitacion.objects.filter(
+        imagen_estado=Habitacion.IMAGEN_PENDIENTE
+    ).values_list('pk', flat=True)
+    for habitacion_id in list(pendientes):
+        procesadas += procesar(habitacion_id)
+    return procesadas
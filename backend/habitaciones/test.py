@@ -1,15 +1,38 @@
 from rest_framework.test import APITestCase
-from rest_framework import status
+from rest_framework import status, serializers
+from django.db import connection
+from django.test import LiveServerTestCase, TransactionTestCase, override_settings
+from django.test.testcases import LiveServerThread, QuietWSGIRequestHandler
+from django.core.servers.basehttp import WSGIServer
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.signals import request_started
 from django.core.files.uploadedfile import SimpleUploadedFile
-from .models import Habitacion, Reserva
+from .models import Habitacion, Reserva, OcupacionNoche, ReglaPrecio
+from .serializers import ReservaSerializer
+from . import cache, disponibilidad, estados, memoria, precios, tareas
+from .imagenes import procesar_imagen
+from .benchmark import carga, datos as datos_benchmark
+from registro.serializers import CustomTokenObtainPairSerializer
+from hotel_project.pruebas import DetectorConsultasMixin
+from configuraciones.models import Configuracion
 from django.contrib.auth import get_user_model
 from PIL import Image
 import io
-from datetime import date, timedelta
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
 User = get_user_model()
 
-class HabitacionTests(APITestCase):
+class HabitacionTests(DetectorConsultasMixin, APITestCase):
 
     def setUp(self):
         self.user = User.objects.create_user(
@@ -86,6 +109,28 @@ class HabitacionTests(APITestCase):
         self.assertIn('imagen', response.data)
         self.assertTrue(response.data['imagen'].endswith('.png'))
 
+    def test_listar_habitaciones_etag(self):
+        """Prueba que el catálogo responde 304 si el ETag no cambió"""
+        response = self.client.get('/api/habitaciones/')
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get('/api/habitaciones/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_catalogo_se_invalida_al_modificar_habitacion(self):
+        """Prueba que un cambio en una habitación invalida el catálogo cacheado"""
+        response = self.client.get(f'/api/habitaciones/{self.habitacion.id}/')
+        etag = response['ETag']
+
+        self.habitacion.precio = 175000.0
+        self.habitacion.save()
+
+        response = self.client.get(f'/api/habitaciones/{self.habitacion.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['precio'], 175000.0)
+        self.assertNotEqual(response['ETag'], etag)
+
     def test_habitaciones_disponibles_sin_fechas(self):
         """Prueba obtener habitaciones disponibles sin parámetros de fecha"""
         response = self.client.get('/api/habitaciones/disponibles/')
@@ -127,7 +172,24 @@ class HabitacionTests(APITestCase):
         self.assertNotIn(self.habitacion.id, habitaciones_disponibles)
 
 
-class ReservaTests(APITestCase):
+    def test_habitaciones_disponibles_ignora_reservas_canceladas(self):
+        """Prueba que solo las reservas activas bloquean la habitación"""
+        fecha_inicio = date.today() + timedelta(days=1)
+        fecha_fin = fecha_inicio + timedelta(days=3)
+        for estado in ['cancelada', 'checkout']:
+            Reserva.objects.create(
+                habitacion=self.habitacion, usuario=self.user,
+                fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, estado=estado
+            )
+
+        response = self.client.get('/api/habitaciones/disponibles/', {
+            'fecha_inicio': fecha_inicio.isoformat(),
+            'fecha_fin': fecha_fin.isoformat()
+        })
+        self.assertIn(self.habitacion.id, [h['id'] for h in response.data])
+        self.assertFalse(Reserva.objects.solapadas(fecha_inicio, fecha_fin).exists())
+
+class ReservaTests(DetectorConsultasMixin, APITestCase):
 
     def setUp(self):
         self.user = User.objects.create_user(
@@ -164,6 +226,97 @@ class ReservaTests(APITestCase):
         response = self.client.get('/api/reservas/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_listar_reservas_solo_del_usuario(self):
+        """Prueba que un usuario sin staff solo ve sus propias reservas"""
+        otro = User.objects.create_user(username='otro', email='otro@test.com', password='testpass123')
+        propia = Reserva.objects.create(
+            habitacion=self.habitacion, usuario=self.user,
+            fecha_inicio=date.today(), fecha_fin=date.today() + timedelta(days=1)
+        )
+        Reserva.objects.create(
+            habitacion=self.habitacion, usuario=otro,
+            fecha_inicio=date.today() + timedelta(days=2), fecha_fin=date.today() + timedelta(days=3)
+        )
+
+        response = self.client.get('/api/reservas/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data['results']], [propia.id])
+
+    def test_listar_reservas_filtros(self):
+        """Prueba los filtros de estado, habitación y ventana de fechas"""
+        hoy = date.today()
+        pagada = Reserva.objects.create(
+            habitacion=self.habitacion, usuario=self.user,
+            fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=2), estado='pagada'
+        )
+        Reserva.objects.create(
+            habitacion=self.habitacion, usuario=self.user,
+            fecha_inicio=hoy + timedelta(days=10), fecha_fin=hoy + timedelta(days=12), estado='checkout'
+        )
+
+        response = self.client.get('/api/reservas/', {'estado__in': 'pagada,checkin_aceptado'})
+        self.assertEqual([r['id'] for r in response.data['results']], [pagada.id])
+
+        response = self.client.get('/api/reservas/', {
+            'fecha_desde': (hoy + timedelta(days=1)).isoformat(),
+            'fecha_hasta': (hoy + timedelta(days=5)).isoformat(),
+            'habitacion_id': self.habitacion.id,
+        })
+        self.assertEqual([r['id'] for r in response.data['results']], [pagada.id])
+
+        response = self.client.get('/api/reservas/', {'fecha_desde': 'no-es-fecha'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_listar_reservas_paginacion_cursor(self):
+        """Prueba que el listado se pagina por cursor"""
+        for i in range(3):
+            Reserva.objects.create(
+                habitacion=self.habitacion, usuario=self.user,
+                fecha_inicio=date.today() + timedelta(days=i * 2),
+                fecha_fin=date.today() + timedelta(days=i * 2 + 1)
+            )
+
+        response = self.client.get('/api/reservas/', {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    def crear_reservas(self, cantidad):
+        inicio = date.today() + timedelta(days=1000)
+        Reserva.objects.bulk_create([
+            Reserva(
+                habitacion=self.habitacion, usuario=self.user,
+                fecha_inicio=inicio + timedelta(days=i * 2),
+                fecha_fin=inicio + timedelta(days=i * 2 + 1)
+            )
+            for i in range(cantidad)
+        ])
+
+    def test_listar_reservas_compacto_por_defecto(self):
+        """Prueba que el listado devuelve solo el id de la habitación salvo ?expand=habitacion"""
+        self.crear_reservas(1)
+
+        response = self.client.get('/api/reservas/')
+        self.assertEqual(response.data['results'][0]['habitacion'], self.habitacion.id)
+
+        response = self.client.get('/api/reservas/', {'expand': 'habitacion'})
+        self.assertEqual(response.data['results'][0]['habitacion']['numero_habitacion'], 101)
+
+    def test_listar_reservas_numero_de_consultas_constante(self):
+        """Prueba que el número de consultas no depende de la cantidad de reservas"""
+        self.crear_reservas(10)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reservas/', {'expand': 'habitacion', 'page_size': 200})
+        self.assertEqual(len(response.data['results']), 10)
+
+        self.crear_reservas(190)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reservas/', {'expand': 'habitacion', 'page_size': 200})
+        self.assertEqual(len(response.data['results']), 200)
+
     def test_checkout_exitoso(self):
         """Prueba checkout exitoso de una reserva"""
         # Crear reserva en estado checkin_aceptado
@@ -211,7 +364,670 @@ class ReservaTests(APITestCase):
         # El error 500 es aceptable para una reserva inexistente en este caso
         self.assertIn(response.status_code, [status.HTTP_404_NOT_FOUND, status.HTTP_500_INTERNAL_SERVER_ERROR])
 
-class HabitacionSerializerTests(APITestCase):
+class TransicionesReservaTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas de la máquina de estados de Reserva"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.habitacion = Habitacion.objects.create(
+            tipo_habitacion='sencilla',
+            numero_habitacion=101,
+            precio=150000.0,
+            estado=True
+        )
+        self.client.force_authenticate(user=self.user)
+        self.config = Configuracion.get_settings()
+
+    def crear_reserva(self, inicio=-1, noches=3, estado='pagada', **kwargs):
+        return Reserva.objects.create(
+            habitacion=self.habitacion, usuario=self.user, estado=estado,
+            fecha_inicio=date.today() + timedelta(days=inicio),
+            fecha_fin=date.today() + timedelta(days=inicio + noches),
+            **kwargs
+        )
+
+    def test_checkin_un_solo_update_sin_consultar_configuracion(self):
+        """Prueba que el check-in es un UPDATE condicionado y usa la configuración en memoria"""
+        reserva = self.crear_reserva()
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(f'/api/reservas/{reserva.id}/checkin/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['reserva']['estado'], 'checkin_aceptado')
+        sql = [q['sql'] for q in consultas.captured_queries]
+        self.assertFalse([q for q in sql if 'configuraciones_' in q])
+        actualizaciones = [q for q in sql if q.startswith('UPDATE')]
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertIn('"estado" IN', actualizaciones[0])
+        reserva.refresh_from_db()
+        self.assertIsNotNone(reserva.checkin_en)
+
+    def test_checkin_antes_de_la_hora_o_estado_incorrecto(self):
+        """Prueba que no se admite el check-in antes del día de llegada ni sin pagar"""
+        futura = self.crear_reserva(inicio=2)
+        response = self.client.post(f'/api/reservas/{futura.id}/checkin/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(self.config.check_in_time.strftime('%H:%M'), response.data['error'])
+
+        pendiente = self.crear_reserva(inicio=5, estado='pendiente')
+        response = self.client.post(f'/api/reservas/{pendiente.id}/checkin/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Reserva.objects.get(id=pendiente.id).estado, 'pendiente')
+
+    def test_checkin_desde_la_hora_configurada(self):
+        """Prueba la ventana de check-in según la hora configurada del día de llegada"""
+        reserva = self.crear_reserva(inicio=0)
+        llegada = timezone.make_aware(datetime.combine(reserva.fecha_inicio, self.config.check_in_time))
+        queryset = Reserva.objects.all()
+        with self.assertRaises(estados.TransicionInvalida):
+            estados.aplicar(queryset, reserva.id, 'checkin', ahora=llegada - timedelta(minutes=1))
+        reserva = estados.aplicar(queryset, reserva.id, 'checkin', ahora=llegada)
+        self.assertEqual(reserva.estado, 'checkin_aceptado')
+
+    def test_salida_tardia(self):
+        """Prueba que el checkout después de la hora de salida queda marcado como tardío"""
+        reserva = self.crear_reserva(estado='checkin_aceptado')
+        salida = timezone.make_aware(datetime.combine(reserva.fecha_fin, self.config.check_out_time))
+        reserva = estados.aplicar(Reserva.objects.all(), reserva.id, 'checkout', ahora=salida + timedelta(hours=1))
+        self.assertTrue(estados.salida_tardia(reserva))
+
+    def test_cancelar_libera_noches_y_no_se_repite(self):
+        """Prueba que cancelar libera el calendario y que una segunda cancelación falla"""
+        reserva = self.crear_reserva(inicio=3, estado='pendiente')
+        self.assertTrue(OcupacionNoche.objects.filter(reserva=reserva).exists())
+
+        response = self.client.post(f'/api/reservas/{reserva.id}/cancelar/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(OcupacionNoche.objects.filter(reserva=reserva).exists())
+
+        response = self.client.post(f'/api/reservas/{reserva.id}/cancelar/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reserva_de_otro_usuario(self):
+        """Prueba que un usuario no puede cambiar el estado de reservas ajenas"""
+        otro = User.objects.create_user(username='otro', password='testpass123')
+        reserva = self.crear_reserva(inicio=3, estado='pendiente')
+        Reserva.objects.filter(id=reserva.id).update(usuario=otro)
+        response = self.client.post(f'/api/reservas/{reserva.id}/pagar/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_patch_de_estado_sigue_la_maquina(self):
+        """Prueba que el PATCH genérico no cambia el estado: solo las acciones lo hacen"""
+        reserva = self.crear_reserva(inicio=30, estado='pagada')
+        for estado in ('checkin_aceptado', 'checkout', 'pendiente'):
+            response = self.client.patch(f'/api/reservas/{reserva.id}/', {'estado': estado})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        reserva.refresh_from_db()
+        self.assertEqual(reserva.estado, 'pagada')
+        self.assertIsNone(reserva.checkin_en)
+
+        # Reenviar el estado actual (un PUT con el objeto completo) no es un cambio
+        response = self.client.patch(f'/api/reservas/{reserva.id}/', {'estado': 'pagada'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(f'/api/reservas/{reserva.id}/', {'checkin_en': timezone.now().isoformat()})
+        reserva.refresh_from_db()
+        self.assertIsNone(reserva.checkin_en)
+
+class TransicionesMasivasTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas del check-in y check-out masivos de recepción"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.habitaciones = Habitacion.objects.bulk_create([
+            Habitacion(tipo_habitacion='sencilla', numero_habitacion=100 + i, precio=150000.0, estado=False)
+            for i in range(20)
+        ])
+        self.client.force_authenticate(user=self.admin)
+        Configuracion.get_settings()
+
+    def crear_reserva(self, habitacion, estado, inicio, noches):
+        return Reserva.objects.create(
+            habitacion=habitacion, usuario=self.admin, estado=estado,
+            fecha_inicio=date.today() + timedelta(days=inicio),
+            fecha_fin=date.today() + timedelta(days=inicio + noches),
+        ).id
+
+    def crear_reservas(self, estado, inicio, noches, cantidad=20):
+        return [self.crear_reserva(h, estado, inicio, noches) for h in self.habitaciones[:cantidad]]
+
+    def test_checkout_masivo_con_pocas_consultas(self):
+        """Prueba que el número de consultas no depende de cuántas reservas se procesan"""
+        ids = self.crear_reservas('checkin_aceptado', inicio=-2, noches=2)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post('/api/reservas/checkout-masivo/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['procesadas'], 20)
+        self.assertLessEqual(len([q for q in consultas.captured_queries if 'SAVEPOINT' not in q['sql']]), 5)
+        self.assertFalse(Reserva.objects.exclude(estado='checkout').exists())
+        self.assertFalse(OcupacionNoche.objects.exists())
+        self.assertFalse(Habitacion.objects.filter(estado=False).exists())
+
+    def test_resultados_por_id(self):
+        """Prueba que cada id informa si se procesó y, si no, por qué"""
+        pagada = self.crear_reserva(self.habitaciones[0], 'pagada', inicio=-1, noches=2)
+        pendiente = self.crear_reserva(self.habitaciones[1], 'pendiente', inicio=0, noches=1)
+        futura = self.crear_reserva(self.habitaciones[2], 'pagada', inicio=3, noches=1)
+        response = self.client.post(
+            '/api/reservas/checkin-masivo/', {'ids': [pagada, pendiente, futura, 99999]}, format='json'
+        )
+        resultados = response.data['resultados']
+        self.assertEqual([r['id'] for r in resultados], [pagada, pendiente, futura, 99999])
+        self.assertEqual([r['ok'] for r in resultados], [True, False, False, False])
+        self.assertIn('pendiente', resultados[1]['error'])
+        self.assertIn('check-in', resultados[2]['error'])
+        self.assertEqual(resultados[3]['error'], 'La reserva no existe.')
+
+    def test_checkout_de_todas_las_de_hoy(self):
+        """Prueba que todas_hoy solo procesa las salidas de hoy o atrasadas"""
+        hoy = self.crear_reservas('checkin_aceptado', inicio=-2, noches=2, cantidad=5)
+        self.crear_reserva(self.habitaciones[10], 'checkin_aceptado', inicio=-1, noches=2)
+        response = self.client.post('/api/reservas/checkout-masivo/', {'todas_hoy': True}, format='json')
+        self.assertEqual([r['id'] for r in response.data['resultados']], hoy)
+        self.assertEqual(Reserva.objects.filter(estado='checkin_aceptado').count(), 1)
+
+    def test_requiere_staff(self):
+        """Prueba que las acciones masivas son solo para el personal"""
+        usuario = User.objects.create_user(username='huesped', password='testpass123')
+        self.client.force_authenticate(user=usuario)
+        response = self.client.post('/api/reservas/checkin-masivo/', {'todas_hoy': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class ExpiracionPendientesTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas del barrido de reservas pendientes sin pagar"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.habitacion = Habitacion.objects.create(
+            tipo_habitacion='sencilla', numero_habitacion=101, precio=150000.0
+        )
+        self.config = Configuracion.get_settings()
+
+    def crear_reserva(self, estado, minutos, inicio):
+        reserva = Reserva.objects.create(
+            habitacion=self.habitacion, usuario=self.user, estado=estado,
+            fecha_inicio=date.today() + timedelta(days=inicio),
+            fecha_fin=date.today() + timedelta(days=inicio + 2),
+        )
+        Reserva.objects.filter(id=reserva.id).update(creado=timezone.now() - timedelta(minutes=minutos))
+        return reserva
+
+    def test_expira_solo_pendientes_vencidas(self):
+        """Prueba que solo expiran las pendientes más antiguas que el tiempo configurado"""
+        ttl = self.config.minutos_expiracion_pendiente
+        vencida = self.crear_reserva('pendiente', ttl + 1, inicio=1)
+        reciente = self.crear_reserva('pendiente', ttl - 1, inicio=3)
+        pagada = self.crear_reserva('pagada', ttl + 1, inicio=5)
+
+        self.assertEqual(estados.expirar_pendientes(lote=1), 1)
+        estados_finales = dict(Reserva.objects.values_list('id', 'estado'))
+        self.assertEqual(estados_finales, {vencida.id: 'expirada', reciente.id: 'pendiente', pagada.id: 'pagada'})
+        self.assertFalse(OcupacionNoche.objects.filter(reserva=vencida).exists())
+        self.assertEqual(OcupacionNoche.objects.count(), 4)
+
+        # Repetir el barrido no cambia nada
+        self.assertEqual(estados.expirar_pendientes(), 0)
+
+    def test_habitacion_vuelve_a_estar_disponible(self):
+        """Prueba que las fechas de la reserva expirada se pueden reservar de nuevo"""
+        vencida = self.crear_reserva('pendiente', self.config.minutos_expiracion_pendiente + 1, inicio=1)
+        call_command('expirar_reservas', stdout=io.StringIO())
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/reservas/', {
+            'habitacion_id': self.habitacion.id,
+            'fecha_inicio': vencida.fecha_inicio.isoformat(),
+            'fecha_fin': vencida.fecha_fin.isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(f'/api/reservas/{vencida.id}/pagar/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class VistasAsyncTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas de las vistas asíncronas de lectura"""
+
+    def setUp(self):
+        cache.invalidar()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.otro = User.objects.create_user(username='otro', password='testpass123')
+        self.habitaciones = [
+            Habitacion.objects.create(tipo_habitacion='sencilla', numero_habitacion=100 + i, precio=150000.0)
+            for i in range(3)
+        ]
+        self.fecha_inicio = date.today() + timedelta(days=1)
+        for i, habitacion in enumerate(self.habitaciones):
+            Reserva.objects.create(
+                habitacion=habitacion, usuario=self.otro if i == 0 else self.user,
+                fecha_inicio=self.fecha_inicio + timedelta(days=i), fecha_fin=self.fecha_inicio + timedelta(days=i + 1),
+            )
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_disponibles_igual_que_la_vista_drf(self):
+        """Prueba que la vista asíncrona devuelve lo mismo que /disponibles/"""
+        params = {
+            'fecha_inicio': self.fecha_inicio.isoformat(),
+            'fecha_fin': (self.fecha_inicio + timedelta(days=2)).isoformat(),
+        }
+        sincrona = self.client.get('/api/habitaciones/disponibles/', params)
+        asincrona = self.client.get('/api/async/habitaciones/disponibles/', params)
+        self.assertEqual(asincrona.status_code, status.HTTP_200_OK)
+        self.assertEqual(asincrona.json(), sincrona.json())
+        self.assertEqual([h['id'] for h in asincrona.json()], [self.habitaciones[2].id])
+
+        response = self.client.get('/api/async/habitaciones/disponibles/', {'fecha_inicio': 'x', 'fecha_fin': 'y'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_catalogo_comparte_etag(self):
+        """Prueba que el catálogo asíncrono usa la misma caché y ETag que el de DRF"""
+        etag = self.client.get('/api/habitaciones/')['ETag']
+        response = self.client.get('/api/async/habitaciones/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.habitaciones[0].delete()
+        response = self.client.get('/api/async/habitaciones/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_reservas_requiere_token(self):
+        """Prueba que el listado asíncrono pide un token válido"""
+        self.assertEqual(self.client.get('/api/async/reservas/').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/api/async/reservas/', HTTP_AUTHORIZATION='Bearer invalido')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_reservas_paginadas_del_usuario(self):
+        """Prueba que el listado asíncrono pagina por cursor y solo muestra reservas propias"""
+        response = self.client.get('/api/async/reservas/', {'page_size': 1, 'expand': 'habitacion'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pagina = response.json()
+        self.assertEqual(pagina['results'][0]['habitacion']['id'], self.habitaciones[2].id)
+
+        pagina = self.client.get(pagina['next'], **self.auth).json()
+        self.assertEqual(pagina['results'][0]['habitacion']['id'], self.habitaciones[1].id)
+        self.assertIsNone(pagina['next'])
+
+class ReservaConcurrenciaTests(TransactionTestCase):
+    """Reservas simultáneas de la misma habitación"""
+
+    hilos = 20
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('SQLite en memoria no admite escrituras concurrentes entre hilos')
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.habitacion = Habitacion.objects.create(
+            tipo_habitacion='sencilla',
+            numero_habitacion=101,
+            precio=150000.0,
+            estado=True
+        )
+
+    def test_reservas_concurrentes_sin_doble_reserva(self):
+        """Prueba que muchos hilos reservando las mismas fechas producen una sola reserva"""
+        fecha_inicio = date.today() + timedelta(days=1)
+        barrera = threading.Barrier(self.hilos)
+        resultados = []
+
+        def reservar(desplazamiento):
+            try:
+                serializer = ReservaSerializer(data={
+                    'habitacion_id': self.habitacion.id,
+                    'fecha_inicio': (fecha_inicio + timedelta(days=desplazamiento)).isoformat(),
+                    'fecha_fin': (fecha_inicio + timedelta(days=desplazamiento + 3)).isoformat(),
+                })
+                serializer.is_valid(raise_exception=True)
+                barrera.wait()
+                serializer.save(usuario=self.user)
+                resultados.append('creada')
+            except serializers.ValidationError:
+                resultados.append('rechazada')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reservar, args=(i % 3,)) for i in range(self.hilos)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(resultados), self.hilos)
+        self.assertEqual(resultados.count('creada'), 1)
+        self.assertEqual(Reserva.objects.filter(habitacion=self.habitacion).count(), 1)
+
+
+class ImagenVariantesTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas de las variantes de imagen de las habitaciones"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def generar_imagen(self, ancho=2400, alto=1600):
+        imagen = Image.new('RGB', (ancho, alto), color='blue')
+        archivo = io.BytesIO()
+        imagen.save(archivo, format='PNG')
+        return SimpleUploadedFile('grande.png', archivo.getvalue(), content_type='image/png')
+
+    def test_subida_queda_pendiente_y_genera_variantes(self):
+        """Prueba que la subida responde sin procesar y la tarea genera las variantes"""
+        response = self.client.post('/api/habitaciones/', {
+            'tipo_habitacion': 'doble',
+            'numero_habitacion': 301,
+            'precio': 180000.0,
+            'imagen': self.generar_imagen(),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imagen_estado'], 'pendiente')
+        self.assertIsNone(response.data['imagenes'])
+
+        self.assertEqual(tareas.procesar_pendientes(), 1)
+
+        habitacion = Habitacion.objects.get(numero_habitacion=301)
+        self.assertEqual(habitacion.imagen_estado, 'lista')
+        self.assertEqual(len(habitacion.imagen_hash), 64)
+
+        response = self.client.get(f'/api/habitaciones/{habitacion.id}/')
+        imagenes = response.data['imagenes']
+        self.assertEqual(set(imagenes), {'thumb', 'card', 'full'})
+        self.assertIn(habitacion.imagen_hash, imagenes['card']['webp'])
+
+        ruta = f'{self.media}/habitaciones/variantes/{habitacion.imagen_hash}-card.webp'
+        with Image.open(ruta) as card:
+            self.assertEqual(card.format, 'WEBP')
+            self.assertEqual(max(card.size), 640)
+
+    def test_tarea_quita_exif(self):
+        """Prueba que la imagen original se guarda sin metadatos EXIF"""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camara de prueba'
+        archivo = io.BytesIO()
+        Image.new('RGB', (200, 100), color='red').save(archivo, format='JPEG', exif=exif)
+        habitacion = Habitacion.objects.create(
+            tipo_habitacion='sencilla', numero_habitacion=303, precio=1.0,
+            imagen=SimpleUploadedFile('foto.jpg', archivo.getvalue(), content_type='image/jpeg')
+        )
+
+        tareas.procesar(habitacion.id)
+
+        habitacion.refresh_from_db()
+        self.assertEqual(habitacion.imagen_estado, 'lista')
+        with Image.open(habitacion.imagen.path) as limpia:
+            self.assertFalse(limpia.getexif())
+
+    def test_imagen_reemplazada_durante_la_tarea(self):
+        """Prueba que si se sube otra imagen a mitad de la tarea, la copia limpia se descarta"""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camara de prueba'
+        archivo = io.BytesIO()
+        Image.new('RGB', (200, 100), color='red').save(archivo, format='JPEG', exif=exif)
+        habitacion = Habitacion.objects.create(
+            tipo_habitacion='sencilla', numero_habitacion=306, precio=1.0,
+            imagen=SimpleUploadedFile('foto.jpg', archivo.getvalue(), content_type='image/jpeg')
+        )
+        original = habitacion.imagen.name
+        limpias = []
+
+        def procesar_y_reemplazar(nombre):
+            limpia, digest = procesar_imagen(nombre)
+            limpias.append(limpia)
+            habitacion.imagen = self.generar_imagen(200, 100)
+            habitacion.save()
+            return limpia, digest
+
+        with mock.patch.object(tareas, 'procesar_imagen', procesar_y_reemplazar):
+            tareas.procesar(habitacion.id)
+
+        habitacion.refresh_from_db()
+        self.assertEqual(habitacion.imagen_estado, 'pendiente')
+        self.assertNotIn(habitacion.imagen.name, (original, limpias[0]))
+        self.assertTrue(os.path.exists(habitacion.imagen.path))
+        # La copia limpia no quedó huérfana y el UPDATE que no aplicó no borró nada más
+        self.assertNotEqual(limpias[0], original)
+        self.assertFalse(os.path.exists(os.path.join(self.media, limpias[0])))
+        self.assertTrue(os.path.exists(os.path.join(self.media, original)))
+
+    def test_tarea_marca_error_si_no_es_imagen(self):
+        """Prueba que un archivo que no es imagen queda en estado de error"""
+        response = self.client.post('/api/habitaciones/', {
+            'tipo_habitacion': 'doble',
+            'numero_habitacion': 304,
+            'precio': 180000.0,
+            'imagen': SimpleUploadedFile('falsa.png', b'no es una imagen', content_type='image/png'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        ruta = Habitacion.objects.get(numero_habitacion=304).imagen.path
+        tareas.procesar_pendientes()
+
+        habitacion = Habitacion.objects.get(numero_habitacion=304)
+        self.assertEqual(habitacion.imagen_estado, 'error')
+        self.assertEqual(habitacion.imagen_hash, '')
+        # El archivo sin validar no queda publicado como imagen
+        self.assertFalse(habitacion.imagen)
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_reencola_tareas_abandonadas(self):
+        """Prueba que una imagen tomada por un worker que murió vuelve a procesarse"""
+        habitacion = Habitacion.objects.create(
+            tipo_habitacion='sencilla', numero_habitacion=305, precio=1.0, imagen=self.generar_imagen(200, 100)
+        )
+        Habitacion.objects.filter(pk=habitacion.pk).update(
+            imagen_estado=Habitacion.IMAGEN_PROCESANDO, imagen_tomada_en=timezone.now() - timedelta(minutes=1)
+        )
+        # Aún dentro del tiempo máximo: puede que otro worker la esté procesando
+        self.assertEqual(tareas.procesar_pendientes(), 0)
+
+        with override_settings(HABITACIONES_IMAGENES_TIEMPO_MAXIMO=30):
+            self.assertEqual(tareas.procesar_pendientes(), 1)
+        habitacion.refresh_from_db()
+        self.assertEqual(habitacion.imagen_estado, 'lista')
+        self.assertIsNone(habitacion.imagen_tomada_en)
+
+    def test_recupera_pendientes_con_la_primera_peticion(self):
+        """Prueba que tras reiniciar el hilo arranca (y recoge lo pendiente) con la primera petición"""
+        request_started.connect(tareas.recuperar_al_servir)
+        self.addCleanup(request_started.disconnect, tareas.recuperar_al_servir)
+        with mock.patch.object(tareas, 'executor') as executor:
+            self.client.get('/api/habitaciones/')
+            self.client.get('/api/habitaciones/')
+        executor.assert_called_once_with()
+
+    def test_habitacion_sin_imagen(self):
+        """Prueba que una habitación sin imagen no expone variantes"""
+        habitacion = Habitacion.objects.create(tipo_habitacion='sencilla', numero_habitacion=302, precio=1.0)
+        response = self.client.get(f'/api/habitaciones/{habitacion.id}/')
+        self.assertIsNone(response.data['imagenes'])
+
+
+class OcupacionNocheTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas del calendario de ocupación por noche"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.habitacion = Habitacion.objects.create(
+            tipo_habitacion='sencilla',
+            numero_habitacion=101,
+            precio=150000.0,
+            estado=True
+        )
+        self.fecha_inicio = date.today() + timedelta(days=1)
+        self.reserva = Reserva.objects.create(
+            habitacion=self.habitacion,
+            usuario=self.user,
+            fecha_inicio=self.fecha_inicio,
+            fecha_fin=self.fecha_inicio + timedelta(days=3)
+        )
+
+    def fechas_ocupadas(self):
+        return list(OcupacionNoche.objects.order_by('fecha').values_list('fecha', flat=True))
+
+    def test_reserva_crea_una_fila_por_noche(self):
+        """Prueba que una reserva activa ocupa cada noche de la estadía"""
+        self.assertEqual(self.fechas_ocupadas(), [self.fecha_inicio + timedelta(days=i) for i in range(3)])
+
+    def test_cambio_de_fechas_y_estado_actualiza_calendario(self):
+        """Prueba que el calendario sigue las fechas y libera las noches al cancelar o hacer checkout"""
+        self.reserva.fecha_fin = self.fecha_inicio + timedelta(days=1)
+        self.reserva.save()
+        self.assertEqual(self.fechas_ocupadas(), [self.fecha_inicio])
+
+        for estado in ['cancelada', 'checkout']:
+            self.reserva.estado = 'pagada'
+            self.reserva.save()
+            self.reserva.estado = estado
+            self.reserva.save()
+            self.assertEqual(self.fechas_ocupadas(), [])
+
+    def test_eliminar_reserva_libera_noches(self):
+        """Prueba que borrar la reserva borra sus noches"""
+        self.reserva.delete()
+        self.assertFalse(OcupacionNoche.objects.exists())
+
+    def test_comando_reconstruir_y_verificar(self):
+        """Prueba que el comando detecta diferencias y las corrige al reconstruir"""
+        OcupacionNoche.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('reconstruir_ocupacion', '--verificar', stdout=io.StringIO(), stderr=io.StringIO())
+
+        call_command('reconstruir_ocupacion', stdout=io.StringIO())
+        self.assertEqual(len(self.fechas_ocupadas()), 3)
+        call_command('reconstruir_ocupacion', '--verificar', stdout=io.StringIO())
+
+
+class MotorDisponibilidadTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas de la matriz y la búsqueda de disponibilidad en memoria"""
+
+    def setUp(self):
+        disponibilidad.invalidar()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.sencilla = Habitacion.objects.create(
+            tipo_habitacion='sencilla', numero_habitacion=101, precio=150000.0
+        )
+        self.doble = Habitacion.objects.create(
+            tipo_habitacion='doble', numero_habitacion=201, precio=180000.0
+        )
+        # Mes siguiente completo, con la sencilla ocupada las noches 5 y 6
+        self.mes = (date.today().replace(day=1) + timedelta(days=32)).replace(day=1)
+        Reserva.objects.create(
+            habitacion=self.sencilla, usuario=self.user,
+            fecha_inicio=self.mes + timedelta(days=4), fecha_fin=self.mes + timedelta(days=6)
+        )
+        disponibilidad.invalidar()
+
+    def test_matriz_mensual(self):
+        """Prueba que la matriz marca las noches ocupadas de cada habitación"""
+        response = self.client.get('/api/habitaciones/disponibilidad-matriz/', {'mes': self.mes.strftime('%Y-%m')})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['fechas'][0], self.mes)
+        filas = {h['id']: h['disponible'] for h in response.data['habitaciones']}
+        self.assertEqual(len(filas[self.sencilla.id]), len(response.data['fechas']))
+        self.assertEqual(filas[self.sencilla.id][3:7], [True, False, False, True])
+        self.assertTrue(all(filas[self.doble.id]))
+
+    def test_busqueda_noches_seguidas(self):
+        """Prueba que solo se devuelven habitaciones con suficientes noches seguidas libres"""
+        params = {
+            'fecha_inicio': (self.mes + timedelta(days=2)).isoformat(),
+            'fecha_fin': (self.mes + timedelta(days=9)).isoformat(),
+        }
+        response = self.client.get('/api/habitaciones/busqueda/', {**params, 'noches': 4, 'tipo': 'sencilla'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+        response = self.client.get('/api/habitaciones/busqueda/', {**params, 'noches': 3})
+        resultados = {h['id']: h['primera_fecha'] for h in response.data}
+        self.assertEqual(resultados, {
+            self.sencilla.id: self.mes + timedelta(days=6),
+            self.doble.id: self.mes + timedelta(days=2),
+        })
+
+    def test_invalidacion_por_reserva(self):
+        """Prueba que una reserva nueva invalida el motor al confirmarse"""
+        fecha_inicio = self.mes + timedelta(days=10)
+        fecha_fin = fecha_inicio + timedelta(days=2)
+        self.assertEqual(len(disponibilidad.motor.libres(fecha_inicio, fecha_fin, 2)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.create(
+                habitacion=self.doble, usuario=self.user,
+                fecha_inicio=fecha_inicio, fecha_fin=fecha_fin
+            )
+        libres = disponibilidad.motor.libres(fecha_inicio, fecha_fin, 2)
+        self.assertEqual([h['id'] for h in libres], [self.sencilla.id])
+
+    def test_fechas_fuera_de_ventana(self):
+        """Prueba que búsqueda y matriz rechazan fechas lejanas en vez de cargarlas en memoria"""
+        response = self.client.get('/api/habitaciones/busqueda/', {'fecha_inicio': '0001-01-01', 'fecha_fin': '0001-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/habitaciones/disponibilidad-matriz/', {'mes': '2999-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertRaises(ValueError):
+            disponibilidad.motor.libres(date(1, 1, 1), date(1, 1, 2))
+
+    def test_recarga_publica_el_calendario_de_una_vez(self):
+        """Prueba que una recarga no altera el calendario que ya está leyendo otra petición"""
+        fecha_inicio, fecha_fin = self.mes, self.mes + timedelta(days=7)
+        calendario = disponibilidad.motor.asegurar(fecha_inicio, fecha_fin)
+        nueva = Habitacion.objects.create(tipo_habitacion='triple', numero_habitacion=301, precio=250000.0)
+        disponibilidad.invalidar()
+
+        recargado = disponibilidad.motor.asegurar(fecha_inicio, fecha_fin)
+        self.assertIsNot(recargado, calendario)
+        self.assertNotIn(nueva.id, calendario.ocupacion)
+        self.assertEqual({h['id'] for h in calendario.habitaciones}, set(calendario.ocupacion))
+        self.assertIn(nueva.id, recargado.ocupacion)
+
+    def test_disponibles_batch(self):
+        """Prueba que varias consultas por habitación y por tipo se responden con una sola consulta"""
+        ocupado = {
+            'fecha_inicio': (self.mes + timedelta(days=5)).isoformat(),
+            'fecha_fin': (self.mes + timedelta(days=8)).isoformat(),
+        }
+        libre = {
+            'fecha_inicio': (self.mes + timedelta(days=6)).isoformat(),
+            'fecha_fin': (self.mes + timedelta(days=8)).isoformat(),
+        }
+        consultas = [
+            {'habitacion_id': self.sencilla.id, **ocupado},
+            {'habitacion_id': self.sencilla.id, **libre},
+            {'habitacion_id': 9999, **libre},
+            {'tipo': 'sencilla', **ocupado},
+            {'tipo': 'doble', **ocupado},
+        ]
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/habitaciones/disponibles/batch/', {'consultas': consultas}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resultados = response.data['resultados']
+        self.assertEqual([r.get('disponible') for r in resultados[:3]], [False, True, False])
+        self.assertEqual(resultados[3]['habitaciones'], [])
+        self.assertEqual(resultados[4]['habitaciones'], [self.doble.id])
+
+    def test_disponibles_batch_valida_consultas(self):
+        """Prueba que cada consulta debe indicar habitación o tipo y un rango válido"""
+        consultas = [
+            {'tipo': 'doble', 'habitacion_id': self.doble.id, 'fecha_inicio': '2030-01-02', 'fecha_fin': '2030-01-03'},
+            {'tipo': 'doble', 'fecha_inicio': '2030-01-03', 'fecha_fin': '2030-01-02'},
+        ]
+        response = self.client.post('/api/habitaciones/disponibles/batch/', {'consultas': consultas}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['consultas']), 2)
+
+
+class HabitacionSerializerTests(DetectorConsultasMixin, APITestCase):
     """Pruebas específicas para validaciones del serializer"""
     
     def setUp(self):
@@ -308,7 +1124,6 @@ class HabitacionSerializerTests(APITestCase):
             'habitacion_id': self.habitacion.id,
             'fecha_inicio': fecha_inicio.isoformat(),
             'fecha_fin': (fecha_fin + timedelta(days=1)).isoformat(),  # Extender un día
-            'estado': 'pagada'
         }
         
         response = self.client.put(f'/api/reservas/{reserva.id}/', data)
@@ -341,4 +1156,385 @@ class HabitacionSerializerTests(APITestCase):
 '''
 
 
-'''
\ No newline at end of file
+'''
+
+class ImportacionExportacionTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas de la importación y exportación masiva"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.habitacion = Habitacion.objects.create(
+            tipo_habitacion='sencilla',
+            numero_habitacion=101,
+            precio=150000.0,
+            estado=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def reserva(self, inicio, noches, estado='pagada'):
+        return {
+            'habitacion_id': self.habitacion.id,
+            'usuario_id': self.user.id,
+            'fecha_inicio': (date.today() + timedelta(days=inicio)).isoformat(),
+            'fecha_fin': (date.today() + timedelta(days=inicio + noches)).isoformat(),
+            'estado': estado,
+        }
+
+    def ndjson(self, filas):
+        return '\n'.join(json.dumps(fila) for fila in filas) + '\n'
+
+    def test_importar_habitaciones_csv(self):
+        """Prueba que el CSV crea las habitaciones válidas y reporta números repetidos"""
+        contenido = (
+            'tipo_habitacion,numero_habitacion,precio,estado\n'
+            'doble,201,200000,true\n'
+            'triple,202,250000,false\n'
+            'doble,201,200000,true\n'
+            'suite,203,100,true\n'
+            'sencilla,101,100,true\n'
+        )
+        response = self.client.post('/api/habitaciones/importar/', contenido, content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['creadas'], 2)
+        self.assertEqual([e['fila'] for e in response.data['errores']], [3, 4, 5])
+        self.assertFalse(Habitacion.objects.get(numero_habitacion=202).estado)
+
+    def test_importar_reservas_valida_solapamientos_del_lote(self):
+        """Prueba que se rechazan los solapamientos con la base y dentro del mismo lote"""
+        Reserva.objects.create(
+            habitacion=self.habitacion, usuario=self.user,
+            fecha_inicio=date.today() + timedelta(days=1),
+            fecha_fin=date.today() + timedelta(days=3),
+        )
+        filas = [
+            self.reserva(-30, 2, 'checkout'),   # histórica
+            self.reserva(2, 2),                 # choca con la reserva existente
+            self.reserva(10, 3),
+            self.reserva(11, 1),                # choca con la fila anterior
+            self.reserva(11, 1, 'cancelada'),   # las canceladas no ocupan
+            dict(self.reserva(20, 1), usuario_id=9999),
+        ]
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                '/api/reservas/importar/?formato=ndjson', self.ndjson(filas), content_type='application/x-ndjson'
+            )
+        self.assertEqual(response.data['creadas'], 3)
+        self.assertEqual([e['fila'] for e in response.data['errores']], [2, 4, 6])
+        self.assertEqual(response.data['total_errores'], 3)
+        # Las noches de las reservas importadas quedan en el calendario
+        self.assertEqual(OcupacionNoche.objects.filter(fecha__gte=date.today() + timedelta(days=10)).count(), 3)
+
+    def test_importar_en_varios_lotes(self):
+        """Prueba que un lote ya confirmado cuenta para los solapamientos del siguiente"""
+        from .importacion import importar_reservas
+        filas = self.ndjson([self.reserva(i, 1) for i in range(5)] + [self.reserva(2, 1)])
+        resultado = importar_reservas(io.BytesIO(filas.encode()), 'ndjson', tamano_lote=2)
+        self.assertEqual(resultado.creadas, 5)
+        self.assertEqual([e['fila'] for e in resultado.errores], [6])
+
+    def test_importar_requiere_admin(self):
+        """Prueba que solo el staff puede importar y exportar"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/reservas/importar/', '', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/api/habitaciones/exportar/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_exportar_e_importar_de_nuevo(self):
+        """Prueba que la exportación en streaming se puede volver a importar"""
+        response = self.client.get('/api/habitaciones/exportar/?formato=csv')
+        self.assertTrue(response.streaming)
+        contenido = b''.join(response.streaming_content).decode()
+        self.assertEqual(contenido.splitlines()[1].split(',')[2], '101')
+
+        self.habitacion.delete()
+        response = self.client.post('/api/habitaciones/importar/', contenido, content_type='text/csv')
+        self.assertEqual(response.data['creadas'], 1)
+
+    def test_exportar_reservas_con_filtros(self):
+        """Prueba que la exportación de reservas respeta los filtros del listado"""
+        for inicio, estado in [(1, 'pagada'), (5, 'cancelada')]:
+            Reserva.objects.create(
+                habitacion=self.habitacion, usuario=self.user, estado=estado,
+                fecha_inicio=date.today() + timedelta(days=inicio),
+                fecha_fin=date.today() + timedelta(days=inicio + 1),
+            )
+        response = self.client.get('/api/reservas/exportar/?estado__in=pagada')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        filas = [json.loads(linea) for linea in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([fila['estado'] for fila in filas], ['pagada'])
+
+
+class PreciosTests(DetectorConsultasMixin, APITestCase):
+    """Pruebas de la tarifa dinámica y las cotizaciones"""
+
+    def setUp(self):
+        precios.invalidar()
+        disponibilidad.invalidar()
+        self.admin = User.objects.create_user(username='admin', password='adminpass123', is_staff=True)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.sencilla = Habitacion.objects.create(tipo_habitacion='sencilla', numero_habitacion=101, precio=100000.0)
+        self.sencilla2 = Habitacion.objects.create(tipo_habitacion='sencilla', numero_habitacion=102, precio=100000.0)
+        self.doble = Habitacion.objects.create(tipo_habitacion='doble', numero_habitacion=201, precio=99.99)
+        # Un lunes dentro de un mes, para que los días de la semana sean previsibles
+        dentro_de_un_mes = date.today() + timedelta(days=30)
+        self.lunes = dentro_de_un_mes - timedelta(days=dentro_de_un_mes.weekday())
+
+    def dia(self, n):
+        return self.lunes + timedelta(days=n)
+
+    def cotizar(self, habitacion, inicio, fin):
+        response = self.client.get(
+            f'/api/habitaciones/{habitacion.id}/cotizacion/',
+            {'fecha_inicio': self.dia(inicio).isoformat(), 'fecha_fin': self.dia(fin).isoformat()},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data
+
+    def regla(self, **campos):
+        return ReglaPrecio.objects.create(nombre='Regla', **campos)
+
+    def test_sin_reglas_precio_base(self):
+        """Prueba que sin reglas cada noche vale el precio base, con importes como cadenas"""
+        datos = self.cotizar(self.sencilla, 0, 3)
+        self.assertEqual(datos['noches'], 3)
+        self.assertEqual(datos['total'], '300000.00')
+        self.assertEqual([n['precio'] for n in datos['desglose']], ['100000.00'] * 3)
+        self.assertEqual(datos['desglose'][0]['fecha'], self.dia(0).isoformat())
+
+    def test_temporada_y_dia_semana_se_multiplican(self):
+        """Prueba que las reglas de distinta clase se combinan noche a noche"""
+        self.regla(clase=ReglaPrecio.TEMPORADA, factor=Decimal('1.5'), fecha_inicio=self.dia(1), fecha_fin=self.dia(3))
+        self.regla(clase=ReglaPrecio.DIA_SEMANA, factor=Decimal('1.2'), dia_semana=2)
+        datos = self.cotizar(self.sencilla, 0, 4)
+        # lunes base, martes temporada, miércoles temporada y miércoles, jueves base
+        self.assertEqual(
+            [n['precio'] for n in datos['desglose']],
+            ['100000.00', '150000.00', '180000.00', '100000.00'],
+        )
+        self.assertEqual(datos['total'], '530000.00')
+        # El miércoles de la semana siguiente también, fuera de la temporada
+        self.assertEqual(self.cotizar(self.sencilla, 9, 10)['total'], '120000.00')
+
+    def test_una_regla_por_clase(self):
+        """Prueba que de cada clase gana la de mayor prioridad y, a igual prioridad, la del tipo"""
+        self.regla(clase=ReglaPrecio.DIA_SEMANA, factor=Decimal('1.1'), dia_semana=0)
+        self.regla(clase=ReglaPrecio.DIA_SEMANA, factor=Decimal('1.3'), dia_semana=0, tipo_habitacion='sencilla')
+        self.assertEqual(self.cotizar(self.sencilla, 0, 1)['total'], '130000.00')
+        self.assertEqual(self.cotizar(self.doble, 0, 1)['total'], '109.99')
+
+        self.regla(clase=ReglaPrecio.DIA_SEMANA, factor=Decimal('0.9'), dia_semana=0, prioridad=1)
+        self.assertEqual(self.cotizar(self.sencilla, 0, 1)['total'], '90000.00')
+
+    def test_ocupacion_por_tipo(self):
+        """Prueba que la regla de ocupación se aplica solo a las noches en que el tipo llega al umbral"""
+        self.regla(clase=ReglaPrecio.OCUPACION, factor=Decimal('1.25'), ocupacion_minima=Decimal('50'))
+        Reserva.objects.create(
+            habitacion=self.sencilla2, usuario=self.user, fecha_inicio=self.dia(1), fecha_fin=self.dia(3)
+        )
+        datos = self.cotizar(self.sencilla, 0, 4)
+        self.assertEqual(
+            [n['precio'] for n in datos['desglose']],
+            ['100000.00', '125000.00', '125000.00', '100000.00'],
+        )
+        self.assertEqual(self.cotizar(self.doble, 0, 4)['total'], '399.96')
+
+    def test_reservas_no_recompilan_tarifas(self):
+        """Prueba que una reserva no recompila la tabla de tarifas y aun así cambia la ocupación"""
+        self.regla(clase=ReglaPrecio.OCUPACION, factor=Decimal('1.25'), ocupacion_minima=Decimal('50'))
+        tabla = precios.motor.asegurar(self.dia(0), self.dia(4))
+        self.assertEqual(self.cotizar(self.sencilla, 1, 2)['total'], '100000.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reserva.objects.create(
+                habitacion=self.sencilla2, usuario=self.user, fecha_inicio=self.dia(1), fecha_fin=self.dia(3)
+            )
+        self.assertIs(precios.motor.asegurar(self.dia(0), self.dia(4)), tabla)
+        datos = self.cotizar(self.sencilla, 0, 2)
+        self.assertEqual([n['factor'] for n in datos['desglose']], ['1.0000', '1.2500'])
+        self.assertEqual(datos['total'], '225000.00')
+
+    def test_cambios_de_reglas_invalidan(self):
+        """Prueba que crear o borrar una regla por la API cambia las cotizaciones ya calculadas"""
+        self.assertEqual(self.cotizar(self.sencilla, 0, 1)['total'], '100000.00')
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/reglas-precio/', {
+            'nombre': 'Lunes', 'clase': 'dia_semana', 'factor': '0.8', 'dia_semana': 0,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(self.cotizar(self.sencilla, 0, 1)['total'], '80000.00')
+
+        self.client.delete(f"/api/reglas-precio/{response.data['id']}/")
+        self.assertEqual(self.cotizar(self.sencilla, 0, 1)['total'], '100000.00')
+
+    def test_validacion_reglas(self):
+        """Prueba que cada clase de regla exige sus campos y solo los administradores las gestionan"""
+        datos = {'nombre': 'Verano', 'clase': 'temporada', 'factor': '1.5', 'dia_semana': 3}
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.post('/api/reglas-precio/', datos, format='json').status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/reglas-precio/', datos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'fecha_inicio', 'fecha_fin', 'dia_semana'})
+
+        response = self.client.post('/api/reglas-precio/', {
+            'nombre': 'Lleno', 'clase': 'ocupacion', 'factor': '1.5', 'ocupacion_minima': '120',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ocupacion_minima', response.data)
+
+    def test_cotizacion_fechas_invalidas(self):
+        """Prueba que la cotización exige un rango de fechas válido"""
+        url = f'/api/habitaciones/{self.sencilla.id}/cotizacion/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'fecha_inicio': self.dia(2).isoformat(), 'fecha_fin': self.dia(1).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'fecha_inicio': self.dia(0).isoformat(), 'fecha_fin': self.dia(400).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cotizacion_fuera_de_ventana(self):
+        """Prueba que las fechas lejanas se rechazan sin compilar tablas para ellas"""
+        tabla = precios.motor.asegurar(self.dia(0), self.dia(1))
+        for fecha_inicio, fecha_fin in (('0001-01-01', '0001-12-31'), ('2999-01-01', '2999-01-05')):
+            response = self.client.get('/api/habitaciones/cotizaciones/', {'fecha_inicio': fecha_inicio, 'fecha_fin': fecha_fin})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertRaises(ValueError):
+            precios.motor.asegurar(date(1, 1, 1), date(1, 1, 2))
+        self.assertIs(precios.motor.asegurar(self.dia(0), self.dia(1)), tabla)
+        self.assertLessEqual(tabla.dias, memoria.HISTORIAL_DIAS + memoria.HORIZONTE_DIAS)
+
+    def test_cotizaciones_todas_las_habitaciones(self):
+        """Prueba que la cotización de todas las habitaciones usa una consulta y filtra disponibles"""
+        self.regla(clase=ReglaPrecio.TEMPORADA, factor=Decimal('2'), fecha_inicio=self.dia(0), fecha_fin=self.dia(1),
+                   tipo_habitacion='doble')
+        Reserva.objects.create(
+            habitacion=self.sencilla2, usuario=self.user, fecha_inicio=self.dia(1), fecha_fin=self.dia(2)
+        )
+        params = {'fecha_inicio': self.dia(0).isoformat(), 'fecha_fin': self.dia(2).isoformat()}
+        response = self.client.get('/api/habitaciones/cotizaciones/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['noches'], 2)
+        totales = {h['id']: h['total'] for h in response.data['habitaciones']}
+        self.assertEqual(totales, {
+            self.sencilla.id: '200000.00', self.sencilla2.id: '200000.00', self.doble.id: '299.97',
+        })
+
+        # Con la tabla ya compilada, solo la consulta de habitaciones
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/habitaciones/cotizaciones/', {**params, 'disponibles': 'true'})
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual([h['id'] for h in response.data['habitaciones']], [self.sencilla.id, self.doble.id])
+
+        response = self.client.get('/api/habitaciones/cotizaciones/', {**params, 'tipo': 'doble'})
+        self.assertEqual([h['id'] for h in response.data['habitaciones']], [self.doble.id])
+
+    def test_importes_decimales(self):
+        """Prueba que el total es la suma exacta de las tarifas por noche ya redondeadas"""
+        self.regla(clase=ReglaPrecio.TEMPORADA, factor=Decimal('1.1'), fecha_inicio=self.dia(0), fecha_fin=self.dia(3))
+        self.doble.refresh_from_db()
+        tabla = precios.motor.asegurar(self.dia(0), self.dia(3))
+        total = tabla.total('doble', self.doble.precio, self.dia(0), self.dia(3))
+        self.assertIsInstance(total, Decimal)
+        self.assertEqual(total, Decimal('329.97'))
+        self.assertEqual(self.cotizar(self.doble, 0, 3)['total'], '329.97')
+
+
+class BenchmarkTests(APITestCase):
+    """Pruebas del generador de datos y de los escenarios de benchmark"""
+
+    def test_generar_datos(self):
+        """Prueba que el generador mezcla estados sin solapar reservas activas"""
+        resumen = datos_benchmark.generar(habitaciones=5, reservas=300, anios=2, clientes_totales=10)
+        self.assertEqual(resumen['habitaciones'], 5)
+        self.assertEqual(resumen['reservas'], Reserva.objects.count())
+        self.assertTrue({'checkout', 'cancelada', 'pagada'} <= set(resumen['por_estado']))
+        self.assertEqual(
+            set(Habitacion.objects.values_list('tipo_habitacion', flat=True)) - {'sencilla', 'doble', 'triple'},
+            set(),
+        )
+
+        for habitacion in Habitacion.objects.all():
+            activas = list(Reserva.objects.activas().filter(habitacion=habitacion).order_by('fecha_inicio'))
+            for anterior, siguiente in zip(activas, activas[1:]):
+                self.assertLessEqual(anterior.fecha_fin, siguiente.fecha_inicio)
+        noches = sum((r.fecha_fin - r.fecha_inicio).days for r in Reserva.objects.activas())
+        self.assertEqual(OcupacionNoche.objects.count(), noches)
+        self.assertFalse(Reserva.objects.filter(estado='checkout', checkout_en__isnull=True).exists())
+
+    def test_escenarios_en_json(self):
+        """Prueba que bench_escenarios mide, escribe el JSON y revierte lo que crea"""
+        salida = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        salida.close()
+        self.addCleanup(os.remove, salida.name)
+        call_command(
+            'bench_escenarios', '--generar', '--habitaciones', '3', '--reservas', '50',
+            '--escenarios', 'catalogo', 'disponibles_7n', 'reservar', 'checkout',
+            '--repeticiones', '3', '--calentamiento', '1', '--salida', salida.name, stdout=io.StringIO(),
+        )
+        with open(salida.name, encoding='utf-8') as archivo:
+            resultados = json.load(archivo)
+
+        self.assertEqual(list(resultados['escenarios']), ['catalogo', 'disponibles_7n', 'reservar', 'checkout'])
+        self.assertEqual(resultados['datos']['habitaciones'], 3)
+        checkout = resultados['escenarios']['checkout']
+        self.assertEqual(checkout['codigos'], {'200': 3})
+        self.assertLessEqual(checkout['p50_ms'], checkout['p99_ms'])
+        self.assertFalse(Habitacion.objects.exists())
+        self.assertFalse(Reserva.objects.exists())
+
+
+class ServidorSecuencial(LiveServerThread):
+    # La base en memoria de las pruebas se comparte entre los hilos del servidor:
+    # atendiendo una petición a la vez las transacciones no se mezclan
+    def _create_server(self, connections_override=None):
+        return WSGIServer((self.host, self.port), QuietWSGIRequestHandler, allow_reuse_address=False)
+
+
+class CargaTests(LiveServerTestCase):
+    """Pruebas del generador de carga contra un servidor real"""
+    server_thread_class = ServidorSecuencial
+
+    def setUp(self):
+        for numero in (101, 102):
+            Habitacion.objects.create(tipo_habitacion='doble', numero_habitacion=numero, precio=200000.0)
+
+    def opciones(self, **cambios):
+        opciones = {
+            'url': self.live_server_url, 'usuarios': 3, 'iteraciones': 2, 'pasos': carga.PASOS[:3],
+            'objetivo': 1, 'dias': 0, 'noches': 2, 'pensar': 0, 'timeout': 30, 'semilla': 1,
+        }
+        opciones.update(cambios)
+        return opciones
+
+    def test_recorridos_concurrentes(self):
+        """Prueba que los usuarios virtuales completan recorridos sin dobles reservas"""
+        resumen, resultados = carga.ejecutar(self.opciones())
+        self.assertEqual(resumen['errores'], 0)
+        self.assertEqual(resumen['recorridos'], 6)
+        self.assertEqual(resumen['pasos']['registro']['codigos'], {'201': 3})
+        self.assertEqual(resumen['dobles_reservas'], 0)
+        aceptadas = resumen['pasos']['reservar']['codigos'].get('201', 0)
+        self.assertEqual(aceptadas + resumen['conflictos_reserva'], 6)
+        self.assertEqual(resumen['recorridos_completos'], aceptadas)
+        # Cada recorrido cancela al terminar: no queda ninguna habitación ocupada
+        self.assertFalse(Reserva.objects.activas().exists())
+
+    def test_detecta_dobles_reservas(self):
+        """Prueba que se cuentan solo las reservas solapadas activas a la vez"""
+        resultados = carga.Resultados()
+        hoy = date.today()
+
+        def reserva(id, pedida, aceptada, liberada, inicio=0):
+            resultados.reserva({
+                'id': id, 'habitacion_id': 1, 'pedida': pedida, 'aceptada': aceptada, 'liberada': liberada,
+                'fecha_inicio': hoy + timedelta(days=inicio), 'fecha_fin': hoy + timedelta(days=inicio + 2),
+            })
+
+        reserva(1, 0, 1, 10)
+        reserva(2, 11, 12, 20)  # después de liberar la 1
+        reserva(3, 13, 14, 30)  # mientras la 2 seguía activa
+        reserva(4, 15, 16, 40, inicio=5)  # otras noches
+        self.assertEqual(resultados.dobles_reservas(), [(2, 3)])
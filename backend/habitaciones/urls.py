@@ -1,11 +1,17 @@
 from django.urls import path, include
-from .views import HabitacionViewSet, ReservaViewSet
+from .views import HabitacionViewSet, ReglaPrecioViewSet, ReservaViewSet
+from . import vistas_async
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
 router.register(r'habitaciones', HabitacionViewSet)
 router.register(r'reservas', ReservaViewSet)
+router.register(r'reglas-precio', ReglaPrecioViewSet)
 
 urlpatterns = [
+    # Lecturas asíncronas para ASGI (ver habitaciones/vistas_async.py)
+    path('async/habitaciones/', vistas_async.catalogo),
+    path('async/habitaciones/disponibles/', vistas_async.disponibles),
+    path('async/reservas/', vistas_async.reservas),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
@@ -1,15 +1,85 @@
 from rest_framework import viewsets
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Habitacion, Reserva
-from .serializers import HabitacionSerializer, ReservaSerializer
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated, IsAdminUser
+from django.http import StreamingHttpResponse
+from .models import Habitacion, ReglaPrecio, Reserva
+from .serializers import (
+    HabitacionSerializer, ReservaSerializer, DisponibilidadBatchSerializer, TransicionMasivaSerializer,
+    ConsultaCotizacionSerializer, CotizacionSerializer, CotizacionHabitacionSerializer, ReglaPrecioSerializer,
+)
+from .pagination import ReservaCursorPagination
+from .ocupacion import habitaciones_ocupadas, responder_consultas
+from .disponibilidad import motor
+from .memoria import dentro_de_ventana, ventana
+from .cache import CatalogoCacheMixin
+from . import estados, importacion, precios
 from rest_framework import serializers
+from registro.authentication import TokenSinConsultaAuthentication
+from hotel_project.json_rapido import JSONRapidoParser
+from datetime import date, timedelta
 
-class HabitacionViewSet(viewsets.ModelViewSet):
+
+def _parse_fecha(valor, nombre):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise serializers.ValidationError({nombre: 'Formato de fecha inválido, use AAAA-MM-DD.'})
+
+def _validar_ventana(fecha_inicio, fecha_fin):
+    # Las consultas en memoria solo cubren un rango acotado alrededor de hoy
+    if not dentro_de_ventana(fecha_inicio, fecha_fin):
+        desde, hasta = ventana()
+        raise serializers.ValidationError(f"Las fechas deben estar entre {desde} y {hasta}.")
+
+def _exportacion(queryset, campos, request, nombre):
+    formato = importacion.formato_de(request)
+    response = StreamingHttpResponse(
+        importacion.exportar(queryset, campos, formato),
+        content_type=importacion.FORMATOS[formato],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return response
+
+def filtrar_reservas(queryset, params):
+    """Filtros del listado de reservas: estado__in, habitacion_id y ventana de fechas."""
+    lista_estados = params.get('estado__in')
+    if lista_estados:
+        queryset = queryset.filter(estado__in=[e for e in lista_estados.split(',') if e])
+
+    habitacion_id = params.get('habitacion_id')
+    if habitacion_id:
+        if not habitacion_id.isdigit():
+            raise serializers.ValidationError({'habitacion_id': 'Debe ser un número entero.'})
+        queryset = queryset.filter(habitacion_id=habitacion_id)
+
+    # Ventana de fechas: reservas que se solapan con [fecha_desde, fecha_hasta)
+    fecha_desde = params.get('fecha_desde')
+    if fecha_desde:
+        queryset = queryset.filter(fecha_fin__gt=_parse_fecha(fecha_desde, 'fecha_desde'))
+
+    fecha_hasta = params.get('fecha_hasta')
+    if fecha_hasta:
+        queryset = queryset.filter(fecha_inicio__lt=_parse_fecha(fecha_hasta, 'fecha_hasta'))
+
+    return queryset
+
+class HabitacionViewSet(CatalogoCacheMixin, viewsets.ModelViewSet):
     queryset = Habitacion.objects.all()
     serializer_class = HabitacionSerializer
-    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    parser_classes = [JSONRapidoParser, MultiPartParser, FormParser]
+    # Solo en lecturas públicas: las escrituras y las acciones de administración usan
+    # JWTAuthentication, que comprueba que el usuario sigue activo y es staff
+    autenticacion_lectura = [TokenSinConsultaAuthentication]
+
+    def get_authenticators(self):
+        metodo = self.request.method
+        accion = getattr(self, self.action_map.get(metodo.lower(), ''), None)
+        permisos = getattr(accion, 'kwargs', {}).get('permission_classes', self.permission_classes)
+        if metodo in SAFE_METHODS and IsAdminUser not in permisos:
+            return [clase() for clase in self.autenticacion_lectura]
+        return super().get_authenticators()
 
     @action(detail=False, methods=['get'])
     def disponibles(self, request):
@@ -22,40 +92,204 @@ class HabitacionViewSet(viewsets.ModelViewSet):
 
         if fecha_inicio and fecha_fin:
 
-            reservas_solapadas = Reserva.objects.filter(
-                fecha_inicio__lt=fecha_fin,
-                fecha_fin__gt=fecha_inicio,
-                estado__in=['pendiente', 'pagada', 'checkin_aceptado']
-            ).values_list('habitacion_id', flat=True)
-            
+            ocupadas = habitaciones_ocupadas(
+                _parse_fecha(fecha_inicio, 'fecha_inicio'),
+                _parse_fecha(fecha_fin, 'fecha_fin'),
+            )
 
-            habitaciones = habitaciones.exclude(id__in=reservas_solapadas)
+            habitaciones = habitaciones.exclude(id__in=ocupadas)
         
         serializer = self.get_serializer(habitaciones, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], url_path='disponibles/batch')
+    def disponibles_batch(self, request):
+        """
+        Varias consultas de disponibilidad en una petición:
+        {"consultas": [{"habitacion_id": 1, "fecha_inicio": ..., "fecha_fin": ...},
+                       {"tipo": "doble", "fecha_inicio": ..., "fecha_fin": ...}]}
+        """
+        serializer = DisponibilidadBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'resultados': responder_consultas(serializer.validated_data['consultas'])})
+
+    @action(detail=False, methods=['get'], url_path='disponibilidad-matriz')
+    def disponibilidad_matriz(self, request):
+        """Habitaciones × noches de un mes completo (?mes=AAAA-MM, por defecto el actual)."""
+        mes = request.query_params.get('mes')
+        if mes:
+            primer_dia = _parse_fecha(f'{mes}-01', 'mes')
+        else:
+            primer_dia = date.today().replace(day=1)
+        siguiente_mes = (primer_dia + timedelta(days=31)).replace(day=1)
+        _validar_ventana(primer_dia, siguiente_mes)
+
+        dias = (siguiente_mes - primer_dia).days
+        return Response({
+            'fechas': [primer_dia + timedelta(days=i) for i in range(dias)],
+            'habitaciones': motor.matriz(primer_dia, siguiente_mes),
+        })
+
+    @action(detail=False, methods=['get'])
+    def busqueda(self, request):
+        """Habitaciones con `noches` noches seguidas libres entre fecha_inicio y fecha_fin."""
+        params = request.query_params
+        if not params.get('fecha_inicio') or not params.get('fecha_fin'):
+            raise serializers.ValidationError('Se requieren fecha_inicio y fecha_fin.')
+        fecha_inicio = _parse_fecha(params['fecha_inicio'], 'fecha_inicio')
+        fecha_fin = _parse_fecha(params['fecha_fin'], 'fecha_fin')
+        noches = params.get('noches', '1')
+        if not noches.isdigit() or int(noches) < 1:
+            raise serializers.ValidationError({'noches': 'Debe ser un entero positivo.'})
+        if fecha_inicio >= fecha_fin:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior a la fecha de fin.")
+        _validar_ventana(fecha_inicio, fecha_fin)
+
+        return Response(motor.libres(fecha_inicio, fecha_fin, int(noches), params.get('tipo')))
+
+    @action(detail=True, methods=['get'])
+    def cotizacion(self, request, pk=None):
+        """Precio de una estadía (?fecha_inicio=&fecha_fin=) con la tarifa de cada noche."""
+        consulta = ConsultaCotizacionSerializer(data=request.query_params)
+        consulta.is_valid(raise_exception=True)
+        datos = consulta.validated_data
+        cotizacion = precios.motor.cotizar(self.get_object(), datos['fecha_inicio'], datos['fecha_fin'])
+        return Response(CotizacionSerializer(cotizacion).data)
+
+    @action(detail=False, methods=['get'])
+    def cotizaciones(self, request):
+        """
+        Precio de la misma estadía en todas las habitaciones habilitadas, en una sola
+        consulta (?fecha_inicio=&fecha_fin=, opcionales tipo= y disponibles=true).
+        """
+        consulta = ConsultaCotizacionSerializer(data=request.query_params)
+        consulta.is_valid(raise_exception=True)
+        datos = consulta.validated_data
+        fecha_inicio, fecha_fin = datos['fecha_inicio'], datos['fecha_fin']
+
+        habitaciones = Habitacion.objects.filter(estado=True)
+        if 'tipo' in datos:
+            habitaciones = habitaciones.filter(tipo_habitacion=datos['tipo'])
+        if datos['disponibles']:
+            habitaciones = habitaciones.exclude(id__in=habitaciones_ocupadas(fecha_inicio, fecha_fin))
+        habitaciones = habitaciones.order_by('numero_habitacion').values(
+            'id', 'numero_habitacion', 'tipo_habitacion', 'precio'
+        )
+
+        cotizaciones = precios.motor.cotizar_todas(habitaciones, fecha_inicio, fecha_fin)
+        return Response({
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'noches': (fecha_fin - fecha_inicio).days,
+            'habitaciones': CotizacionHabitacionSerializer(cotizaciones, many=True).data,
+        })
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def importar(self, request):
+        """Alta masiva desde NDJSON o CSV (?formato=, o según el Content-Type)."""
+        resultado = importacion.importar_habitaciones(request.stream, importacion.formato_de(request))
+        return Response(resultado.datos())
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def exportar(self, request):
+        return _exportacion(self.get_queryset(), importacion.CAMPOS_HABITACION, request, 'habitaciones')
+
+class ReglaPrecioViewSet(viewsets.ModelViewSet):
+    """Reglas de la tarifa dinámica; cada cambio invalida las tablas de precios (ver signals.py)."""
+    queryset = ReglaPrecio.objects.order_by('clase', '-prioridad', 'id')
+    serializer_class = ReglaPrecioSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
 class ReservaViewSet(viewsets.ModelViewSet):
     queryset = Reserva.objects.all()
     serializer_class = ReservaSerializer
+    pagination_class = ReservaCursorPagination
+
+    def expand_habitacion(self):
+        # El listado es compacto salvo que se pida ?expand=habitacion
+        if self.action != 'list':
+            return True
+        expand = self.request.query_params.get('expand', '')
+        return 'habitacion' in expand.split(',')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand_habitacion'] = self.expand_habitacion()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+
+        if self.expand_habitacion():
+            queryset = queryset.select_related('habitacion')
+
+        # Los usuarios que no son staff solo ven sus propias reservas
+        if not user.is_staff:
+            queryset = queryset.filter(usuario_id=user.id)
+
+        if self.action not in ('list', 'exportar'):
+            return queryset
+
+        return filtrar_reservas(queryset, self.request.query_params)
 
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
 
-    @action(detail=True, methods=['patch'])
-    def checkout(self, request, pk=None):
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def importar(self, request):
+        """Carga masiva de reservas (también históricas) desde NDJSON o CSV."""
+        resultado = importacion.importar_reservas(request.stream, importacion.formato_de(request))
+        return Response(resultado.datos())
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminUser])
+    def exportar(self, request):
+        """Exportación en streaming; admite los mismos filtros que el listado."""
+        return _exportacion(self.get_queryset(), importacion.CAMPOS_RESERVA, request, 'reservas')
+
+    def transicion(self, accion, pk, mensaje):
         try:
-            reserva = self.get_object()
-            if reserva.estado != 'checkin_aceptado':
-                return Response({'error': 'La reserva no está en estado de check-in aceptado.'}, status=400)
+            reserva = estados.aplicar(self.get_queryset(), pk, accion)
+        except estados.TransicionInvalida as e:
+            return Response({'error': str(e)}, status=e.status)
+        datos = {'success': mensaje, 'reserva': self.get_serializer(reserva).data}
+        if accion == 'checkout':
+            datos['salida_tardia'] = estados.salida_tardia(reserva)
+        return Response(datos)
+
+    @action(detail=True, methods=['post', 'patch'])
+    def pagar(self, request, pk=None):
+        return self.transicion('pagar', pk, 'Reserva pagada.')
+
+    @action(detail=True, methods=['post', 'patch'])
+    def checkin(self, request, pk=None):
+        """Check-in de una reserva pagada, desde la hora de check-in configurada del día de llegada."""
+        return self.transicion('checkin', pk, 'Check-in realizado.')
+
+    @action(detail=True, methods=['post', 'patch'])
+    def checkout(self, request, pk=None):
+        """Check-out de una reserva con check-in; indica si fue después de la hora de salida configurada."""
+        return self.transicion('checkout', pk, 'Check-out realizado y habitación liberada.')
+
+    @action(detail=True, methods=['post', 'patch'])
+    def cancelar(self, request, pk=None):
+        return self.transicion('cancelar', pk, 'Reserva cancelada.')
 
-            reserva.estado = 'checkout'
-            reserva.save()
+    def transicion_masiva(self, request, accion):
+        serializer = TransicionMasivaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        resultados = estados.aplicar_masivo(self.get_queryset(), accion, serializer.validated_data.get('ids'))
+        return Response({
+            'procesadas': sum(r['ok'] for r in resultados),
+            'resultados': resultados,
+        })
 
-            # Liberar la habitación
-            habitacion = reserva.habitacion
-            habitacion.estado = True
-            habitacion.save()
+    @action(detail=False, methods=['post'], url_path='checkin-masivo', permission_classes=[IsAuthenticated, IsAdminUser])
+    def checkin_masivo(self, request):
+        """Check-in de varias reservas: {"ids": [...]} o {"todas_hoy": true}."""
+        return self.transicion_masiva(request, 'checkin')
 
-            return Response({'success': 'Check-out realizado y habitación liberada.'})
-        except Exception as e:
-            return Response({'error': str(e)}, status=500)
\ No newline at end of file
+    @action(detail=False, methods=['post'], url_path='checkout-masivo', permission_classes=[IsAuthenticated, IsAdminUser])
+    def checkout_masivo(self, request):
+        """Check-out de varias reservas: {"ids": [...]} o {"todas_hoy": true} (salidas de hoy o atrasadas)."""
+        return self.transicion_masiva(request, 'checkout')
@@ -0,0 +1,134 @@
+"""
+Versiones asíncronas de los endpoints de lectura más usados, para servir con ASGI
+(uvicorn hotel_project.asgi:application). Usan el ORM asíncrono (async for, aget)
+y devuelven lo mismo que sus equivalentes DRF:
+
+    /api/async/habitaciones/              → GET /api/habitaciones/
+    /api/async/habitaciones/disponibles/  → GET /api/habitaciones/disponibles/
+    /api/async/reservas/                  → GET /api/reservas/
+
+DRF no tiene vistas asíncronas, así que aquí la autenticación, la paginación y las
+respuestas se resuelven a mano reutilizando lo que no toca la base de datos:
+TokenSinConsultaAuthentication, los serializers y la caché del catálogo.
+Bajo WSGI también funcionan, pero Django las ejecuta en un bucle por petición.
+"""
+from django.core.cache import cache as django_cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions, serializers
+from rest_framework.utils.urls import replace_query_param
+
+from hotel_project import json_rapido, versiones
+from hotel_project.metricas import medir_render
+from registro.authentication import TokenSinConsultaAuthentication
+
+from . import cache
+from .models import Habitacion, Reserva
+from .ocupacion import habitaciones_ocupadas
+from .pagination import ReservaCursorPagination
+from .serializers import HabitacionSerializer, ReservaSerializer
+from .views import _parse_fecha, filtrar_reservas
+
+
+def respuesta(data, status=200, headers=None):
+    with medir_render():
+        contenido = json_rapido.dumps(data)
+    return HttpResponse(contenido, status=status, headers=headers, content_type='application/json')
+
+
+def error(exc):
+    """Respuesta de una excepción de DRF con el mismo cuerpo que daría una vista DRF."""
+    detalle = exc.detail if isinstance(exc, serializers.ValidationError) else {'detail': exc.detail}
+    return respuesta(detalle, status=exc.status_code)
+
+
+async def serializar_habitaciones(queryset, request):
+    habitaciones = [habitacion async for habitacion in queryset]
+    return HabitacionSerializer(habitaciones, many=True, context={'request': request}).data
+
+
+@require_safe
+async def catalogo(request):
+    """Catálogo de habitaciones; comparte entradas de caché y ETag con la vista DRF."""
+    version, = await versiones.aleer(cache.CLAVE_VERSION)
+    clave = cache.clave(version, 'list', None, request)
+    entrada = await django_cache.aget(clave)
+    if entrada is None:
+        data = await serializar_habitaciones(Habitacion.objects.all(), request)
+        entrada = cache.nueva_entrada(data, version[1])
+        await django_cache.aset(clave, entrada, cache.TIEMPO_CACHE)
+
+    no_modificado = get_conditional_response(request, etag=entrada['etag'], last_modified=entrada['modificado'])
+    if no_modificado is not None:
+        return HttpResponse(status=no_modificado.status_code, headers=cache.cabeceras(entrada))
+    return respuesta(entrada['data'], headers=cache.cabeceras(entrada))
+
+
+@require_safe
+async def disponibles(request):
+    habitaciones = Habitacion.objects.filter(estado=True)
+    fecha_inicio = request.GET.get('fecha_inicio')
+    fecha_fin = request.GET.get('fecha_fin')
+    try:
+        if fecha_inicio and fecha_fin:
+            ocupadas = habitaciones_ocupadas(
+                _parse_fecha(fecha_inicio, 'fecha_inicio'),
+                _parse_fecha(fecha_fin, 'fecha_fin'),
+            )
+            habitaciones = habitaciones.exclude(id__in=ocupadas)
+    except exceptions.APIException as exc:
+        return error(exc)
+    return respuesta(await serializar_habitaciones(habitaciones, request))
+
+
+@require_safe
+async def reservas(request):
+    """
+    Listado de reservas con los mismos filtros y ?expand=habitacion que la vista DRF.
+    Pagina por llave primaria descendente: ?cursor=<id> devuelve las reservas
+    anteriores a ese id y `next` trae la URL de la página siguiente.
+    """
+    try:
+        autenticado = TokenSinConsultaAuthentication().authenticate(request)
+        if autenticado is None:
+            raise exceptions.NotAuthenticated()
+        user = autenticado[0]
+
+        expand = 'habitacion' in request.GET.get('expand', '').split(',')
+        queryset = Reserva.objects.order_by('-id')
+        if expand:
+            queryset = queryset.select_related('habitacion')
+        if not user.is_staff:
+            queryset = queryset.filter(usuario_id=user.id)
+        queryset = filtrar_reservas(queryset, request.GET)
+
+        cursor = request.GET.get('cursor')
+        if cursor:
+            if not cursor.isdigit():
+                raise exceptions.NotFound('Cursor inválido.')
+            queryset = queryset.filter(id__lt=int(cursor))
+        tamano = tamano_pagina(request)
+    except exceptions.APIException as exc:
+        return error(exc)
+
+    pagina = [reserva async for reserva in queryset[:tamano + 1]]
+    siguiente = None
+    if len(pagina) > tamano:
+        pagina = pagina[:tamano]
+        siguiente = replace_query_param(request.build_absolute_uri(), 'cursor', pagina[-1].id)
+
+    contexto = {'request': request, 'expand_habitacion': expand}
+    return respuesta({
+        'next': siguiente,
+        'previous': None,
+        'results': ReservaSerializer(pagina, many=True, context=contexto).data,
+    })
+
+
+def tamano_pagina(request):
+    paginacion = ReservaCursorPagination
+    valor = request.GET.get(paginacion.page_size_query_param, '')
+    if valor.isdigit() and int(valor) > 0:
+        return min(int(valor), paginacion.max_page_size)
+    return paginacion.page_size
@@ -0,0 +1,118 @@
+"""
+Detector de consultas repetidas (el patrón N+1) y lentas dentro de una petición.
+
+La misma plantilla SQL (con sus %s, sin los parámetros) ejecutada
+DETECTOR_CONSULTAS_REPETIDAS veces o más en una petición cuenta como N+1, y
+cualquier consulta que tarde más de DETECTOR_CONSULTAS_LENTAS_MS como lenta.
+De cada problema se guarda la pila de llamadas del código del proyecto.
+
+Modos (DETECTOR_CONSULTAS):
+    ''          desactivado (el middleware se retira solo)
+    'avisar'    escribe cada problema en el log; pensado para staging
+    'estricto'  lanza ConsultasProblematicas con la pila; pensado para tests
+
+En tests se usa con hotel_project.pruebas.DetectorConsultasMixin, que activa el
+modo estricto y añade assertConsultasSanas() para código que no pasa por una petición.
+"""
+import logging
+import time
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentacion import ConsultasMiddleware, EnvoltorioConsultas
+
+logger = logging.getLogger(__name__)
+
+MODOS = ('', 'avisar', 'estricto')
+
+RAIZ_PROYECTO = str(Path(settings.BASE_DIR).resolve())
+
+# La maquinaria del detector no es el origen de ninguna consulta
+PROPIOS = {__file__, str(Path(__file__).with_name('instrumentacion.py')), str(Path(__file__).with_name('pruebas.py'))}
+
+
+class ConsultasProblematicas(AssertionError):
+    pass
+
+
+def pila_del_proyecto():
+    """Frames de la pila actual que pertenecen al proyecto, sin el detector ni dependencias."""
+    return [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(RAIZ_PROYECTO)
+        and 'site-packages' not in frame.filename
+        and frame.filename not in PROPIOS
+    ]
+
+
+class Problema:
+
+    def __init__(self, tipo, sql, pila, veces=1, duracion=0.0):
+        self.tipo = tipo
+        self.sql = sql
+        self.pila = pila
+        self.veces = veces
+        self.duracion = duracion
+
+    def __str__(self):
+        if self.tipo == 'repetida':
+            titulo = f'Consulta repetida {self.veces} veces (¿N+1?)'
+        else:
+            titulo = f'Consulta lenta: {self.duracion * 1000:.1f} ms'
+        return f"{titulo}:\n    {self.sql}\n{''.join(traceback.format_list(self.pila))}"
+
+
+class Detector(EnvoltorioConsultas):
+    """execute_wrapper que acumula los problemas de consultas de una petición o bloque."""
+
+    def __init__(self, repetidas=None, lentas_ms=None):
+        self.repetidas = repetidas or settings.DETECTOR_CONSULTAS_REPETIDAS
+        self.lentas = (lentas_ms or settings.DETECTOR_CONSULTAS_LENTAS_MS) / 1000
+        self.conteo = {}
+        self.problemas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            veces = self.conteo[sql] = self.conteo.get(sql, 0) + 1
+            if veces == self.repetidas:
+                self.problemas.append(Problema('repetida', sql, pila_del_proyecto(), veces=veces))
+            elif veces > self.repetidas:
+                for problema in self.problemas:
+                    if problema.tipo == 'repetida' and problema.sql == sql:
+                        problema.veces = veces
+            if duracion > self.lentas:
+                self.problemas.append(Problema('lenta', sql, pila_del_proyecto(), duracion=duracion))
+
+    def reportar(self, contexto, estricto):
+        if not self.problemas:
+            return
+        if estricto:
+            detalle = '\n'.join(str(problema) for problema in self.problemas)
+            raise ConsultasProblematicas(f'{contexto}: {len(self.problemas)} problemas de consultas\n{detalle}')
+        for problema in self.problemas:
+            logger.warning('%s: %s', contexto, problema)
+
+
+class DetectorConsultasMiddleware(ConsultasMiddleware):
+
+    def __init__(self, get_response):
+        if settings.DETECTOR_CONSULTAS not in MODOS:
+            raise ValueError(f'DETECTOR_CONSULTAS debe ser uno de {MODOS}')
+        if not settings.DETECTOR_CONSULTAS:
+            raise MiddlewareNotUsed
+        self.estricto = settings.DETECTOR_CONSULTAS == 'estricto'
+        super().__init__(get_response)
+
+    def crear(self, request):
+        return Detector()
+
+    def terminar(self, request, response, detector):
+        detector.reportar(f'{request.method} {request.path}', self.estricto)
+        return response
@@ -0,0 +1,73 @@
+"""
+Base común de la instrumentación de consultas por petición (métricas y detector
+de consultas): un execute_wrapper que se instala en todas las conexiones y un
+middleware síncrono/asíncrono que lo instala alrededor de cada petición.
+"""
+from contextlib import contextmanager, nullcontext
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+
+class EnvoltorioConsultas:
+    """execute_wrapper que se instala en todas las conexiones. Las subclases definen __call__."""
+
+    # Las conexiones son por hilo: bajo ASGI hay que instalarse en el hilo donde
+    # corre el ORM (el de sync_to_async de la petición), no en el del bucle.
+    def instalar(self):
+        for conexion in connections.all():
+            conexion.execute_wrappers.append(self)
+
+    def retirar(self):
+        for conexion in connections.all():
+            conexion.execute_wrappers.remove(self)
+
+    @contextmanager
+    def activo(self):
+        self.instalar()
+        try:
+            yield self
+        finally:
+            self.retirar()
+
+
+class ConsultasMiddleware:
+    """
+    Instala el envoltorio de `crear()` durante la petición y entrega la respuesta a
+    `terminar()`. `alrededor()` envuelve además la petición en el hilo del llamador.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def crear(self, request):
+        raise NotImplementedError
+
+    def alrededor(self, envoltorio):
+        return nullcontext()
+
+    def terminar(self, request, response, envoltorio):
+        return response
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        envoltorio = self.crear(request)
+        with self.alrededor(envoltorio), envoltorio.activo():
+            response = self.get_response(request)
+        return self.terminar(request, response, envoltorio)
+
+    async def __acall__(self, request):
+        envoltorio = self.crear(request)
+        with self.alrededor(envoltorio):
+            await sync_to_async(envoltorio.instalar)()
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(envoltorio.retirar)()
+        return self.terminar(request, response, envoltorio)
@@ -0,0 +1,86 @@
+"""
+Renderer y parser JSON de la API.
+
+Con orjson instalado se serializa directamente a bytes, sin pasar por un str
+intermedio ni por el codificador de Python. Sin orjson se usa el módulo json con
+un codificador reutilizado (json.dumps crea uno nuevo en cada llamada) y el
+parser lee los bytes de una vez en lugar de decodificarlos con codecs.
+
+El resultado es el mismo JSON que el de DRF, con dos diferencias de orjson:
+los NaN/Infinity salen como null y no hay espacios tras los separadores aunque
+COMPACT_JSON sea False. Las peticiones con indentación (API navegable,
+"Accept: application/json; indent=4") o con UNICODE_JSON desactivado se
+delegan en el JSONRenderer de DRF.
+"""
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from .metricas import medir_render
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# Mismo escape que DRF: JSON válido que además es un subconjunto estricto de JavaScript
+SEPARADORES_JS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def _por_defecto(obj):
+    # Decimal, cadenas perezosas, QuerySet, etc.: como el JSONEncoder de DRF
+    return _codificador.default(obj)
+
+
+_codificador = encoders.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+_codificador_estricto = encoders.JSONEncoder(ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+if orjson is not None:
+    OPCIONES_ORJSON = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def dumps(data, strict=False):
+    """Serializa data a bytes JSON compactos en UTF-8."""
+    if orjson is not None:
+        ret = orjson.dumps(data, default=_por_defecto, option=OPCIONES_ORJSON)
+    else:
+        ret = (_codificador_estricto if strict else _codificador).encode(data).encode()
+    for original, escapado in SEPARADORES_JS:
+        if original in ret:
+            ret = ret.replace(original, escapado)
+    return ret
+
+
+def loads(datos):
+    """Deserializa bytes JSON; lanza ValueError si no son válidos."""
+    if orjson is not None:
+        return orjson.loads(datos)
+    return json.loads(datos)
+
+
+class JSONRapidoRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with medir_render():
+            indent = self.get_indent(accepted_media_type, renderer_context or {})
+            if indent is not None or self.ensure_ascii:
+                return super().render(data, accepted_media_type, renderer_context)
+            return dumps(data, strict=self.strict)
+
+
+class JSONRapidoParser(JSONParser):
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,120 @@
+"""
+Servido de archivos de MEDIA_ROOT sin cargarlos en memoria: FileResponse (que el
+servidor WSGI puede enviar con sendfile), peticiones Range y GET condicionales.
+"""
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Nombres con un hash SHA-256 (p. ej. las variantes de imagen): su contenido no cambia nunca
+NOMBRE_CON_HASH = re.compile(r'(^|[^0-9a-f])[0-9a-f]{64}([^0-9a-f]|$)')
+
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDAR = 'public, no-cache'
+
+
+class ArchivoParcial:
+    """Vista de solo lectura de `largo` bytes de un archivo a partir de `inicio`."""
+
+    def __init__(self, archivo, inicio, largo):
+        archivo.seek(inicio)
+        self.archivo = archivo
+        self.restante = largo
+
+    def read(self, tamano=-1):
+        if self.restante <= 0:
+            return b''
+        tamano = self.restante if tamano < 0 else min(tamano, self.restante)
+        datos = self.archivo.read(tamano)
+        self.restante -= len(datos)
+        return datos
+
+    def fileno(self):
+        # Permite sendfile: el servidor parte de la posición actual y envía Content-Length bytes
+        return self.archivo.fileno()
+
+    def close(self):
+        self.archivo.close()
+
+
+def rango_solicitado(cabecera, tamano):
+    """
+    Interpreta una cabecera Range de un solo rango.
+    Devuelve (inicio, fin) inclusivos, None si se debe ignorar, o False si no es satisfacible.
+    """
+    coincidencia = RANGO.match(cabecera.strip())
+    if not coincidencia:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        largo = int(fin)
+        if largo == 0:
+            return False
+        return max(tamano - largo, 0), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return False
+    return inicio, fin
+
+
+@require_safe
+def servir_media(request, ruta):
+    ruta = posixpath.normpath(ruta).lstrip('/')
+    archivo = Path(safe_join(settings.MEDIA_ROOT, ruta))
+    if not archivo.is_file():
+        raise Http404('El archivo no existe.')
+
+    stat = archivo.stat()
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    cabeceras = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': CACHE_INMUTABLE if NOMBRE_CON_HASH.search(archivo.name) else CACHE_REVALIDAR,
+    }
+
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if no_modificado is not None:
+        for nombre, valor in cabeceras.items():
+            no_modificado.headers[nombre] = valor
+        return no_modificado
+
+    content_type = mimetypes.guess_type(archivo.name)[0] or 'application/octet-stream'
+    rango = None
+    cabecera_rango = request.headers.get('Range')
+    if cabecera_rango and request.headers.get('If-Range', etag) == etag:
+        rango = rango_solicitado(cabecera_rango, stat.st_size)
+
+    if rango is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if rango is None:
+        response = FileResponse(archivo.open('rb'), content_type=content_type)
+    else:
+        inicio, fin = rango
+        response = FileResponse(
+            ArchivoParcial(archivo.open('rb'), inicio, fin - inicio + 1), content_type=content_type
+        )
+        response.status_code = 206
+        response.headers['Content-Length'] = fin - inicio + 1
+        response.headers['Content-Range'] = f'bytes {inicio}-{fin}/{stat.st_size}'
+
+    for nombre, valor in cabeceras.items():
+        response.headers[nombre] = valor
+    return response
@@ -0,0 +1,180 @@
+"""
+Instrumentación por petición: número y tiempo de consultas SQL, tiempo de render
+del JSON, el resto (todo lo demás: middleware, autenticación, permisos, la vista y
+sus serializers) y tamaño de la respuesta.
+
+Los tiempos van en la cabecera Server-Timing (visible en la pestaña de red del
+navegador) solo para administradores, o para todos con METRICAS_SERVER_TIMING:
+expone tiempos internos de la base. Cada petición se suma a un histograma en memoria
+por ruta con las últimas METRICAS_MUESTRAS mediciones. GET /api/metrics/ (solo
+administradores) devuelve p50/p95/p99 por ruta y DELETE lo reinicia.
+
+El histograma es por proceso: con varios workers cada uno lleva el suyo.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject
+
+from .instrumentacion import ConsultasMiddleware, EnvoltorioConsultas
+
+PERCENTILES = (50, 95, 99)
+
+# Columnas de cada muestra del histograma, en orden
+CAMPOS = ('total_ms', 'db_ms', 'consultas', 'resto_ms', 'render_ms', 'bytes')
+
+_actual = ContextVar('metricas_medicion', default=None)
+
+
+class Medicion(EnvoltorioConsultas):
+    """Acumula lo que cuesta una petición. Se instala como execute_wrapper de cada conexión."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.db = 0.0
+        self.render = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - inicio
+            self.consultas += 1
+
+    def tiempos(self):
+        """Milisegundos de (total, db, resto, render); resto es el total sin SQL ni render."""
+        total = time.perf_counter() - self.inicio
+        resto = max(total - self.db - self.render, 0.0)
+        return tuple(round(s * 1000, 3) for s in (total, self.db, resto, self.render))
+
+
+@contextmanager
+def medir_render():
+    """Suma el tiempo del bloque al render de la petición en curso, si se está midiendo."""
+    medicion = _actual.get()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if medicion is not None:
+            medicion.render += time.perf_counter() - inicio
+
+
+def percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, len(ordenados) * p // 100)]
+
+
+class Histograma:
+    """Últimas N muestras por ruta, con acceso seguro entre hilos."""
+
+    def __init__(self, muestras):
+        self.muestras = muestras
+        self._lock = threading.Lock()
+        self._rutas = defaultdict(lambda: deque(maxlen=self.muestras))
+        self._totales = defaultdict(int)
+
+    def agregar(self, ruta, muestra):
+        with self._lock:
+            self._rutas[ruta].append(muestra)
+            self._totales[ruta] += 1
+
+    def reiniciar(self):
+        with self._lock:
+            self._rutas.clear()
+            self._totales.clear()
+
+    def resumen(self):
+        with self._lock:
+            rutas = {ruta: list(muestras) for ruta, muestras in self._rutas.items()}
+            totales = dict(self._totales)
+
+        resumen = {}
+        for ruta, muestras in rutas.items():
+            datos = {'peticiones': totales[ruta], 'en_ventana': len(muestras)}
+            for i, campo in enumerate(CAMPOS):
+                valores = sorted(m[i] for m in muestras if m[i] is not None)
+                if valores:
+                    datos[campo] = {f'p{p}': percentil(valores, p) for p in PERCENTILES}
+            resumen[ruta] = datos
+        # Las rutas más lentas primero
+        return dict(sorted(resumen.items(), key=lambda item: -item[1]['total_ms']['p95']))
+
+
+historial = Histograma(settings.METRICAS_MUESTRAS)
+
+
+def nombre_ruta(request):
+    """
+    Nombre legible de la vista que atendió la petición: 'ReservaViewSet.list',
+    'CustomTokenObtainPairView.post', 'vistas_async.catalogo'...
+    """
+    match = request.resolver_match
+    if match is None:
+        return 'sin_ruta'
+    vista = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    if vista is None:
+        return f"{match.func.__module__.rsplit('.', 1)[-1]}.{match.func.__name__}"
+    metodo = request.method.lower()
+    accion = (getattr(match.func, 'actions', None) or {}).get(metodo, metodo)
+    return f'{vista.__name__}.{accion}'
+
+
+def tamano(response):
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def es_staff(request):
+    # Solo si la vista ya autenticó (DRF deja el usuario en la petición): resolver aquí
+    # el usuario perezoso de la sesión consultaría la base, y bajo ASGI no se puede
+    usuario = request.__dict__.get('user')
+    if usuario is None or isinstance(usuario, SimpleLazyObject):
+        return False
+    return bool(usuario.is_staff)
+
+
+class MetricasMiddleware(ConsultasMiddleware):
+
+    def __init__(self, get_response):
+        if not settings.METRICAS_HABILITADAS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def crear(self, request):
+        return Medicion()
+
+    @contextmanager
+    def alrededor(self, medicion):
+        # En el contexto de la petición, para que medir_render la encuentre
+        token = _actual.set(medicion)
+        try:
+            yield
+        finally:
+            _actual.reset(token)
+
+    def terminar(self, request, response, medicion):
+        total, db, resto, render = medicion.tiempos()
+        historial.agregar(
+            nombre_ruta(request),
+            (total, db, medicion.consultas, resto, render, tamano(response)),
+        )
+        if not (settings.METRICAS_SERVER_TIMING or es_staff(request)):
+            return response
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db};desc="{medicion.consultas} consultas"',
+            f'resto;dur={resto}',
+            f'render;dur={render}',
+            f'total;dur={total}',
+        ])
+        return response
+
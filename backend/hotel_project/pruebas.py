@@ -0,0 +1,37 @@
+"""
+Utilidades para los tests del proyecto. Solo se importan desde los tests:
+dependen de django.test.
+"""
+from contextlib import contextmanager
+
+from django.test import override_settings
+
+from .consultas import Detector
+
+
+class DetectorConsultasMixin:
+    """
+    Mixin para TestCase: cada petición del cliente de pruebas falla con la pila si
+    repite una consulta o tiene una lenta. Los umbrales se ajustan por clase.
+    """
+    consultas_repetidas = 5
+    consultas_lentas_ms = 200
+
+    # A nivel de clase: los setUp de las suites no siempre llaman a super()
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        ajustes = override_settings(
+            DETECTOR_CONSULTAS='estricto',
+            DETECTOR_CONSULTAS_REPETIDAS=cls.consultas_repetidas,
+            DETECTOR_CONSULTAS_LENTAS_MS=cls.consultas_lentas_ms,
+        )
+        ajustes.enable()
+        cls.addClassCleanup(ajustes.disable)
+
+    @contextmanager
+    def assertConsultasSanas(self, repetidas=None, lentas_ms=None):
+        detector = Detector(repetidas or self.consultas_repetidas, lentas_ms or self.consultas_lentas_ms)
+        with detector.activo():
+            yield detector
+        detector.reportar('Bloque', estricto=True)
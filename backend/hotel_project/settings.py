@@ -11,8 +11,12 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,6 +46,30 @@ else:
     # En desarrollo local
     MEDIA_ROOT = BASE_DIR / 'media'
 
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+# Procesar las imágenes subidas en un hilo del propio servidor, que además recoge
+# las pendientes al atender la primera petición. Con False solo se procesan con
+# `python manage.py procesar_imagenes` (p. ej. en un proceso aparte); las pruebas
+# llaman a las tareas directamente.
+HABITACIONES_IMAGENES_EN_PROCESO = (
+    os.environ.get('HABITACIONES_IMAGENES_EN_PROCESO', '1') == '1' and not TESTING
+)
+# Segundos tras los que una imagen en 'procesando' se vuelve a encolar (el worker murió)
+HABITACIONES_IMAGENES_TIEMPO_MAXIMO = int(os.environ.get('HABITACIONES_IMAGENES_TIEMPO_MAXIMO', '600'))
+
+# Tiempos por petición en la cabecera Server-Timing e histograma por ruta en /api/metrics/
+METRICAS_HABILITADAS = os.environ.get('METRICAS_HABILITADAS', '1') == '1'
+METRICAS_MUESTRAS = int(os.environ.get('METRICAS_MUESTRAS', '1000'))
+# Server-Timing para todos los clientes; sin esto solo lo reciben los administradores
+METRICAS_SERVER_TIMING = os.environ.get('METRICAS_SERVER_TIMING', '0') == '1'
+
+# Detector de consultas repetidas (N+1) y lentas por petición: '', 'avisar' o 'estricto'
+# (ver hotel_project/consultas.py)
+DETECTOR_CONSULTAS = os.environ.get('DETECTOR_CONSULTAS', '')
+DETECTOR_CONSULTAS_REPETIDAS = int(os.environ.get('DETECTOR_CONSULTAS_REPETIDAS', '5'))
+DETECTOR_CONSULTAS_LENTAS_MS = int(os.environ.get('DETECTOR_CONSULTAS_LENTAS_MS', '100'))
+
 
 # Application definition
 
@@ -62,6 +90,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'registro.User'
 
 MIDDLEWARE = [
+    'hotel_project.metricas.MetricasMiddleware',
+    'hotel_project.consultas.DetectorConsultasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -160,6 +190,42 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Compartida entre los workers: en archivos por defecto (todos los workers de una
+# máquina); con varias máquinas, Redis o Memcached con DJANGO_CACHE_BACKEND/LOCATION.
+# 'versiones' guarda solo las versiones de hotel_project/versiones.py, aparte de
+# las entradas del catálogo para que estas nunca las desalojen.
+
+DIRECTORIO_CACHE = Path(os.environ.get('DJANGO_CACHE_DIR', Path(tempfile.gettempdir()) / 'hotel-lindo-sueno'))
+CACHE_ARCHIVOS = 'django.core.cache.backends.filebased.FileBasedCache'
+CACHE_LOCAL = 'django.core.cache.backends.locmem.LocMemCache'
+
+if TESTING:
+    # Un solo proceso y sin restos de ejecuciones anteriores
+    CACHES = {
+        'default': {'BACKEND': CACHE_LOCAL, 'LOCATION': 'pruebas'},
+        'versiones': {'BACKEND': CACHE_LOCAL, 'LOCATION': 'pruebas-versiones', 'TIMEOUT': None},
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', CACHE_ARCHIVOS),
+            'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', str(DIRECTORIO_CACHE / 'default')),
+        },
+        'versiones': {
+            'BACKEND': os.environ.get('DJANGO_CACHE_VERSIONES_BACKEND', CACHE_ARCHIVOS),
+            'LOCATION': os.environ.get('DJANGO_CACHE_VERSIONES_LOCATION', str(DIRECTORIO_CACHE / 'versiones')),
+            'TIMEOUT': None,
+        },
+    }
+    # Cada worker con su memoria no vería las invalidaciones de los demás
+    if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1 and any(
+        alias['BACKEND'] == CACHE_LOCAL for alias in CACHES.values()
+    ):
+        raise ImproperlyConfigured('LocMemCache no se comparte entre workers: use un backend compartido.')
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -186,4 +252,14 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # JSON con orjson si está instalado (ver hotel_project/json_rapido.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'hotel_project.json_rapido.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'hotel_project.json_rapido.JSONRapidoParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
\ No newline at end of file
@@ -0,0 +1,318 @@
+import datetime
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.functional import lazy
+from rest_framework import status
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+
+from habitaciones.models import Habitacion, Reserva
+from habitaciones.serializers import ReservaSerializer
+
+from . import json_rapido, metricas, versiones
+from .consultas import ConsultasProblematicas
+from .pruebas import DetectorConsultasMixin
+
+
+class ServirMediaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.contenido = bytes(range(256)) * 4
+        os.makedirs(os.path.join(self.media, 'habitaciones', 'variantes'))
+        with open(os.path.join(self.media, 'habitaciones', 'foto.jpg'), 'wb') as archivo:
+            archivo.write(self.contenido)
+        self.hash = 'a' * 64
+        with open(os.path.join(self.media, 'habitaciones', 'variantes', f'{self.hash}-card.webp'), 'wb') as archivo:
+            archivo.write(self.contenido)
+
+    def test_archivo_completo(self):
+        """Prueba que el archivo se sirve completo con validadores de caché"""
+        response = self.client.get('/media/habitaciones/foto.jpg')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.contenido)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+    def test_get_condicional(self):
+        """Prueba que un ETag vigente responde 304"""
+        etag = self.client.get('/media/habitaciones/foto.jpg')['ETag']
+        response = self.client.get('/media/habitaciones/foto.jpg', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_rangos(self):
+        """Prueba peticiones Range parciales, de sufijo e insatisfacibles"""
+        response = self.client.get('/media/habitaciones/foto.jpg', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), self.contenido[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.contenido)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+        response = self.client.get('/media/habitaciones/foto.jpg', HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.contenido[-5:])
+
+        response = self.client.get('/media/habitaciones/foto.jpg', HTTP_RANGE=f'bytes={len(self.contenido)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        response = self.client.get(
+            '/media/habitaciones/foto.jpg', HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"otro"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_nombre_con_hash_es_inmutable(self):
+        """Prueba que los archivos direccionados por contenido se cachean para siempre"""
+        response = self.client.get(f'/media/habitaciones/variantes/{self.hash}-card.webp')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_rutas_invalidas(self):
+        """Prueba archivos inexistentes, directorios y métodos no permitidos"""
+        self.assertEqual(self.client.get('/media/habitaciones/no.jpg').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/media/habitaciones/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            self.client.post('/media/habitaciones/foto.jpg').status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+
+class JSONRapidoTests(SimpleTestCase):
+    """Pruebas del renderer y parser JSON de la API, con y sin orjson"""
+
+    datos = {
+        'id': 1,
+        'precio': Decimal('150000.50'),
+        'fecha': datetime.date(2030, 1, 2),
+        'creado': datetime.datetime(2030, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        'error': ErrorDetail('inválido', code='invalid'),
+        'perezoso': lazy(lambda: 'texto', str)(),
+        'separador': 'a\u2028b',
+        'lista': [None, True, 1.5],
+    }
+
+    def render(self):
+        return json_rapido.JSONRapidoRenderer().render(self.datos, 'application/json')
+
+    def test_mismo_json_que_drf(self):
+        """Prueba que el resultado equivale al de JSONRenderer, también sin orjson"""
+        esperado = JSONRenderer().render(self.datos, 'application/json')
+        self.assertEqual(json_rapido.loads(self.render()), json_rapido.loads(esperado))
+        self.assertIn(b'"2030-01-02T03:04:05Z"', self.render())
+        self.assertIn(b'\\u2028', self.render())
+        with mock.patch.object(json_rapido, 'orjson', None):
+            self.assertEqual(self.render(), esperado)
+
+    def test_indentacion_delegada_en_drf(self):
+        """Prueba que las peticiones con indent usan el renderer de DRF"""
+        ret = json_rapido.JSONRapidoRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(ret, b'{\n  "a": 1\n}')
+
+    def test_parser(self):
+        """Prueba que el parser lee bytes y reporta JSON inválido como ParseError"""
+        parser = json_rapido.JSONRapidoParser()
+        for orjson in (json_rapido.orjson, None):
+            with mock.patch.object(json_rapido, 'orjson', orjson):
+                self.assertEqual(parser.parse(io.BytesIO('{"á": [1, 2]}'.encode())), {'á': [1, 2]})
+                with self.assertRaises(ParseError):
+                    parser.parse(io.BytesIO(b'{"a": '))
+
+    def test_respuesta_de_la_api(self):
+        """Prueba que las vistas DRF responden con el renderer configurado"""
+        response = self.client.get('/api/habitaciones/disponibles/', {'fecha_inicio': 'x', 'fecha_fin': 'y'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsInstance(response.accepted_renderer, json_rapido.JSONRapidoRenderer)
+
+
+
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        metricas.historial.reiniciar()
+        self.addCleanup(metricas.historial.reiniciar)
+        self.client = APIClient()
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.user = User.objects.create_user(username='cliente', password='testpass123')
+        for numero in (101, 102):
+            Habitacion.objects.create(tipo_habitacion='sencilla', numero_habitacion=numero, precio=100000.0)
+
+    def test_server_timing(self):
+        """Prueba que los administradores reciben consultas y tiempos en Server-Timing"""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/habitaciones/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tramos = [tramo.split(';')[0] for tramo in response['Server-Timing'].split(', ')]
+        self.assertEqual(tramos, ['db', 'resto', 'render', 'total'])
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* consultas"')
+
+    def test_server_timing_oculto(self):
+        """Prueba que sin METRICAS_SERVER_TIMING los demás clientes no reciben Server-Timing"""
+        self.assertNotIn('Server-Timing', self.client.get('/api/habitaciones/'))
+        self.client.force_authenticate(user=self.user)
+        self.assertNotIn('Server-Timing', self.client.get('/api/habitaciones/'))
+        with override_settings(METRICAS_SERVER_TIMING=True):
+            self.assertIn('Server-Timing', self.client.get('/api/habitaciones/'))
+
+    def test_percentiles_por_ruta(self):
+        """Prueba que /api/metrics/ resume cada ruta con p50/p95/p99"""
+        for _ in range(3):
+            self.client.get('/api/habitaciones/')
+        self.client.get('/api/habitaciones/1/')
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rutas = response.json()['rutas']
+        listado = rutas['HabitacionViewSet.list']
+        self.assertEqual(listado['peticiones'], 3)
+        self.assertEqual(set(listado['total_ms']), {'p50', 'p95', 'p99'})
+        # La primera consulta el catálogo; las siguientes salen de la caché
+        self.assertEqual(listado['consultas']['p50'], 0)
+        self.assertGreater(listado['consultas']['p99'], 0)
+        self.assertGreater(listado['bytes']['p50'], 0)
+        self.assertIn('HabitacionViewSet.retrieve', rutas)
+
+    def test_solo_administradores(self):
+        """Prueba que las métricas exigen un administrador y que DELETE las reinicia"""
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.delete('/api/metrics/').status_code, status.HTTP_204_NO_CONTENT)
+        # Solo queda la propia petición DELETE, registrada después de reiniciar
+        self.assertEqual(list(metricas.historial.resumen()), ['MetricasView.delete'])
+
+    def test_ventana_y_percentiles(self):
+        """Prueba que el histograma conserva solo las últimas muestras"""
+        historial = metricas.Histograma(muestras=100)
+        for i in range(1, 201):
+            historial.agregar('ruta', (float(i), 0.0, 1, 0.0, 0.0, None))
+        resumen = historial.resumen()['ruta']
+        self.assertEqual(resumen['peticiones'], 200)
+        self.assertEqual(resumen['en_ventana'], 100)
+        self.assertEqual(resumen['total_ms'], {'p50': 151.0, 'p95': 196.0, 'p99': 200.0})
+        self.assertNotIn('bytes', resumen)
+
+
+
+class DetectorConsultasTests(DetectorConsultasMixin, APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='cliente', password='testpass123', is_staff=True)
+        inicio = datetime.date.today() + datetime.timedelta(days=10)
+        for numero in range(101, 107):
+            habitacion = Habitacion.objects.create(tipo_habitacion='doble', numero_habitacion=numero, precio=100000.0)
+            Reserva.objects.create(
+                habitacion=habitacion, usuario=self.user,
+                fecha_inicio=inicio, fecha_fin=inicio + datetime.timedelta(days=2),
+            )
+        self.client.force_authenticate(user=self.user)
+
+    def test_detecta_n_mas_1(self):
+        """Prueba que serializar reservas sin select_related falla con la pila del código"""
+        with self.assertRaises(ConsultasProblematicas) as contexto:
+            with self.assertConsultasSanas():
+                ReservaSerializer(Reserva.objects.all(), many=True, context={'expand_habitacion': True}).data
+        mensaje = str(contexto.exception)
+        self.assertIn('Consulta repetida 6 veces', mensaje)
+        self.assertIn('habitaciones_habitacion', mensaje)
+        self.assertIn('test_detecta_n_mas_1', mensaje)
+
+    def test_listado_expandido_sin_n_mas_1(self):
+        """Prueba que el listado con ?expand=habitacion pasa el detector estricto"""
+        response = self.client.get('/api/reservas/', {'expand': 'habitacion'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['results']), 6)
+
+    def test_estricto_en_peticiones(self):
+        """Prueba que en modo estricto una petición con consultas repetidas falla"""
+        with override_settings(DETECTOR_CONSULTAS_REPETIDAS=1):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            with self.assertRaises(ConsultasProblematicas):
+                client.get('/api/reservas/')
+
+    def test_modo_avisar(self):
+        """Prueba que el modo avisar solo escribe en el log"""
+        with override_settings(DETECTOR_CONSULTAS='avisar', DETECTOR_CONSULTAS_REPETIDAS=1):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            with self.assertLogs('hotel_project.consultas', level='WARNING') as logs:
+                response = client.get('/api/reservas/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('GET /api/reservas/', logs.output[0])
+
+    def test_consultas_lentas(self):
+        """Prueba que las consultas que superan el umbral se reportan como lentas"""
+        with self.assertRaisesRegex(ConsultasProblematicas, 'Consulta lenta'):
+            with self.assertConsultasSanas(lentas_ms=1e-6):
+                Habitacion.objects.count()
+
+
+class VersionesTests(SimpleTestCase):
+    """Pruebas de las versiones compartidas entre procesos"""
+
+    clave = 'pruebas:version'
+
+    def setUp(self):
+        versiones.almacen().delete(self.clave)
+
+    def test_invalidar_cambia_la_version(self):
+        """Prueba que cada invalidación deja un valor distinto y la lectura es estable"""
+        primera, = versiones.leer(self.clave)
+        self.assertEqual(versiones.leer(self.clave), [primera])
+        versiones.invalidar(self.clave)
+        segunda, = versiones.leer(self.clave)
+        self.assertNotEqual(segunda, primera)
+
+    def test_clave_perdida_no_repite_valores(self):
+        """Prueba que si la clave desaparece se recrea con un valor nunca visto (sin ABA)"""
+        vistas = set()
+        for _ in range(3):
+            version, = versiones.leer(self.clave)
+            self.assertNotIn(version, vistas)
+            vistas.add(version)
+            versiones.almacen().delete(self.clave)
+
+    def test_catalogo_no_desaloja_versiones(self):
+        """Prueba que llenar la caché por defecto no toca las versiones"""
+        version, = versiones.leer(self.clave)
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'llena',
+                        'OPTIONS': {'MAX_ENTRIES': 10}},
+            'versiones': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pruebas-versiones'},
+        }):
+            from django.core.cache import caches
+            for i in range(100):
+                caches['default'].set(f'entrada:{i}', i)
+            self.assertEqual(versiones.leer(self.clave), [version])
+
+    def test_locmem_con_varios_workers(self):
+        """Prueba que la configuración rechaza LocMemCache con varios workers"""
+        entorno = {
+            **os.environ,
+            'WEB_CONCURRENCY': '3',
+            'DJANGO_CACHE_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'DJANGO_SETTINGS_MODULE': 'hotel_project.settings',
+        }
+        proceso = subprocess.run(
+            [sys.executable, '-c', 'import django; django.setup()'],
+            env=entorno, capture_output=True, text=True,
+        )
+        self.assertNotEqual(proceso.returncode, 0)
+        self.assertIn('LocMemCache', proceso.stderr)
@@ -1,19 +1,23 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from .media import servir_media
+from .views import MetricasView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
     path('api/registro/', include('registro.urls')),
+    path('api/metrics/', MetricasView.as_view(), name='metricas'),
     path('api/', include('habitaciones.urls')),
     path('api/configuraciones/', include('configuraciones.urls')),
     path('api/reservas/', include('reservas.urls')),
 ]
 
 # Servir archivos media tanto en desarrollo como en producción (Azure)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+urlpatterns += [
+    re_path(r'^%s(?P<ruta>.*)$' % settings.MEDIA_URL.lstrip('/'), servir_media),
+]
 
 '''
 Usamos modelviewset para hace todos los metodos de un CRUD
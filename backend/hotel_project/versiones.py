@@ -0,0 +1,63 @@
+"""
+Versiones compartidas entre procesos: cuando cambian, cada worker descarta su copia
+local (configuración, motores de disponibilidad y precios) o deja de usar las
+entradas de caché que las llevan en la clave (catálogo).
+
+Viven en su propio alias de caché, CACHES['versiones']: unas pocas claves que ningún
+cliente puede crear, así nunca se descartan para hacer sitio. Cada invalidación
+guarda un valor nuevo y único, (identificador, momento), en lugar de incrementar
+un contador: dos invalidaciones simultáneas no se pisan y una clave perdida (p. ej.
+al vaciar la caché) se recrea con otro valor nuevo, nunca con uno ya visto.
+"""
+import time
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+
+ALIAS = 'versiones'
+
+
+def almacen():
+    return caches[ALIAS]
+
+
+def nueva():
+    return (uuid.uuid4().hex, int(time.time()))
+
+
+def invalidar(clave):
+    almacen().set(clave, nueva(), None)
+
+
+def invalidar_ahora_y_tras_commit(funcion):
+    """
+    Para las señales de los modelos: ejecuta `funcion` (que invalida una versión) ya
+    y otra vez tras el commit, por si otro proceso recargó entre medias datos aún
+    sin confirmar y se quedó con ellos bajo la versión nueva.
+    """
+    funcion()
+    transaction.on_commit(funcion)
+
+
+def leer(*claves):
+    """Versión actual de cada clave, en el mismo orden; las que falten se crean."""
+    valores = almacen().get_many(claves)
+    faltan = [clave for clave in claves if clave not in valores]
+    if faltan:
+        # add no pisa el valor si otro proceso lo creó entre medias
+        for clave in faltan:
+            almacen().add(clave, nueva(), None)
+        valores.update(almacen().get_many(faltan))
+    # Sin caché (DummyCache) cada lectura es una versión nueva
+    return [valores.get(clave) or nueva() for clave in claves]
+
+
+async def aleer(*claves):
+    valores = await almacen().aget_many(claves)
+    faltan = [clave for clave in claves if clave not in valores]
+    if faltan:
+        for clave in faltan:
+            await almacen().aadd(clave, nueva(), None)
+        valores.update(await almacen().aget_many(faltan))
+    return [valores.get(clave) or nueva() for clave in claves]
@@ -0,0 +1,18 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .metricas import historial
+
+
+class MetricasView(APIView):
+    """p50/p95/p99 por ruta de este proceso (ver hotel_project/metricas.py); DELETE lo reinicia."""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({'muestras_por_ruta': historial.muestras, 'rutas': historial.resumen()})
+
+    def delete(self, request):
+        historial.reiniciar()
+        return Response(status=status.HTTP_204_NO_CONTENT)
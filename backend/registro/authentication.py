@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+
+class UsuarioToken(TokenUser):
+    """
+    Usuario construido con los claims del token (id, username, is_staff, is_superuser).
+    Si la vista usa cualquier otro campo, carga el registro completo una sola vez.
+    """
+
+    @cached_property
+    def usuario(self):
+        return User.objects.get(pk=self.id)
+
+    def __getattr__(self, nombre):
+        if nombre.startswith('_') or nombre == 'token':
+            raise AttributeError(nombre)
+        return getattr(self.usuario, nombre)
+
+
+class TokenSinConsultaAuthentication(JWTStatelessUserAuthentication):
+    """
+    Autenticación JWT sin consultar la tabla de usuarios en cada petición.
+    Pensada para vistas de solo lectura; se activa por vista con authentication_classes.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('El token no contiene la identificación del usuario')
+        return UsuarioToken(validated_token)
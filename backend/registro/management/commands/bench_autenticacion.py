@@ -0,0 +1,57 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from habitaciones.views import HabitacionViewSet
+from registro.authentication import TokenSinConsultaAuthentication
+from registro.serializers import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara peticiones/segundo de un endpoint de solo lectura autenticado con '
+        'JWTAuthentication (carga el usuario) y con TokenSinConsultaAuthentication.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=500)
+        parser.add_argument('--url', default='/api/habitaciones/disponibles/')
+
+    def handle(self, *args, **options):
+        clases_originales = HabitacionViewSet.autenticacion_lectura
+        with transaction.atomic():
+            user = User.objects.create_user(username='bench_autenticacion', password=None)
+            token = CustomTokenObtainPairSerializer.get_token(user).access_token
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+            try:
+                for clase in [JWTAuthentication, TokenSinConsultaAuthentication]:
+                    HabitacionViewSet.autenticacion_lectura = [clase]
+                    self.medir(client, clase.__name__, options)
+            finally:
+                HabitacionViewSet.autenticacion_lectura = clases_originales
+                transaction.set_rollback(True)
+
+    def medir(self, client, nombre, options):
+        consultas = []
+
+        def contar(execute, sql, params, many, context):
+            consultas.append(sql)
+            return execute(sql, params, many, context)
+
+        client.get(options['url'])
+        with connection.execute_wrapper(contar):
+            client.get(options['url'])
+        inicio = time.perf_counter()
+        for _ in range(options['peticiones']):
+            client.get(options['url'])
+        total = time.perf_counter() - inicio
+        self.stdout.write(
+            f'{nombre:<32} {options["peticiones"] / total:>8.1f} peticiones/s  '
+            f'{len(consultas)} consultas/petición'
+        )
@@ -0,0 +1,46 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el rendimiento del login (/api/registro/login/): logins por segundo, '
+        'latencia y consultas SQL por login. El usuario de prueba se revierte al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50)
+
+    def handle(self, *args, **options):
+        client = Client()
+        credenciales = {'username': 'bench_login', 'password': 'bench-login-123'}
+        tiempos = []
+        consultas = []
+
+        with transaction.atomic():
+            User.objects.create_user(**credenciales)
+            inicio = time.perf_counter()
+            for _ in range(options['logins']):
+                with CaptureQueriesContext(connection) as capturadas:
+                    t0 = time.perf_counter()
+                    response = client.post('/api/registro/login/', credenciales, content_type='application/json')
+                    tiempos.append((time.perf_counter() - t0) * 1000)
+                consultas.append(len(capturadas))
+                if response.status_code != 200:
+                    self.stderr.write(f'Login fallido: {response.status_code} {response.content[:200]!r}')
+                    break
+            total = time.perf_counter() - inicio
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'logins:            {len(tiempos)}')
+        self.stdout.write(f'logins/segundo:    {len(tiempos) / total:.1f}')
+        self.stdout.write(f'latencia p50 (ms): {statistics.median(tiempos):.2f}')
+        self.stdout.write(f'consultas/login:   {max(consultas)}')
@@ -1,6 +1,7 @@
 # registro/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 User = get_user_model()
 
@@ -41,3 +42,24 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ('username', 'email')
         read_only_fields = ('id',)
+
+
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Agrega los permisos del usuario al token de acceso y a la respuesta del login,
+    usando el usuario ya autenticado en lugar de consultarlo de nuevo.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.username
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        data['is_admin'] = self.user.is_staff
+        data['is_superuser'] = self.user.is_superuser
+        return data
@@ -1,13 +1,16 @@
 from django.test import TestCase
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from .authentication import TokenSinConsultaAuthentication
+from .serializers import CustomTokenObtainPairSerializer
+from hotel_project.pruebas import DetectorConsultasMixin
 
 User = get_user_model()
 
-class AuthenticationTests(APITestCase):
+class AuthenticationTests(DetectorConsultasMixin, APITestCase):
     
     def setUp(self):
         self.client = APIClient()
@@ -76,6 +79,21 @@ class AuthenticationTests(APITestCase):
         self.assertTrue(response.data['is_admin'])
         self.assertTrue(response.data['is_superuser'])
 
+    def test_login_incluye_permisos_en_token(self):
+        """Prueba que el token de acceso lleva los permisos y el login hace una sola consulta"""
+        login_data = {
+            'username': 'existinguser',
+            'password': 'existingpass123'
+        }
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/registro/login/', login_data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_admin'])
+        token = AccessToken(response.data['access'])
+        self.assertEqual(token['username'], 'existinguser')
+        self.assertFalse(token['is_staff'])
+        self.assertFalse(token['is_superuser'])
+
     def test_get_user_info_authenticated(self):
         """Prueba obtener información del usuario autenticado"""
         self.client.force_authenticate(user=self.user)
@@ -164,3 +182,57 @@ class AuthenticationTests(APITestCase):
         update_data = {'username': 'newusername'}
         response = self.client.put('/api/registro/update-profile/', update_data)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenSinConsultaAuthenticationTests(DetectorConsultasMixin, APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='existinguser',
+            email='existing@test.com',
+            password='existingpass123',
+            is_staff=True
+        )
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_autentica_sin_consultar_usuario(self):
+        """Prueba que el usuario se arma con los claims del token sin consultas"""
+        with self.assertNumQueries(0):
+            user, _ = TokenSinConsultaAuthentication().authenticate(self.request)
+            self.assertEqual(user.id, self.user.id)
+            self.assertEqual(user.username, 'existinguser')
+            self.assertTrue(user.is_staff)
+            self.assertTrue(user.is_authenticated)
+
+    def test_carga_el_usuario_al_usar_otros_campos(self):
+        """Prueba que los campos fuera del token se cargan una sola vez desde la base"""
+        user, _ = TokenSinConsultaAuthentication().authenticate(self.request)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'existing@test.com')
+            self.assertEqual(user.first_name, '')
+
+    def test_catalogo_con_token_sin_consultar_usuario(self):
+        """Prueba que el catálogo de habitaciones no carga el usuario autenticado"""
+        self.client.credentials(HTTP_AUTHORIZATION=self.request.META['HTTP_AUTHORIZATION'])
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/habitaciones/disponibles/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_escrituras_y_administracion_cargan_el_usuario(self):
+        """Prueba que un staff degradado pierde las escrituras y acciones de administración aunque su token diga lo contrario"""
+        self.client.credentials(HTTP_AUTHORIZATION=self.request.META['HTTP_AUTHORIZATION'])
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+
+        response = self.client.get('/api/habitaciones/exportar/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post('/api/habitaciones/importar/', b'', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.post('/api/habitaciones/', {
+            'tipo_habitacion': 'sencilla', 'numero_habitacion': 1, 'precio': 100000.0,
+        })
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Las lecturas públicas siguen sin consultar al usuario
+        self.assertEqual(self.client.get('/api/habitaciones/disponibles/').status_code, status.HTTP_200_OK)
@@ -13,6 +13,7 @@ export default function Configuraciones() {
   const [config, setConfig] = useState({
     check_in_time: '14:00',
     check_out_time: '12:00',
+    minutos_expiracion_pendiente: 60,
   });
   const [userConfig, setUserConfig] = useState({
     username: '',
@@ -317,6 +318,21 @@ export default function Configuraciones() {
                     className="w-full p-2 border rounded text-black"
                   />
                 </div>
+
+                <div>
+                  <label htmlFor="minutos_expiracion_pendiente" className="block text-sm font-medium text-gray-700 mb-1">
+                    Minutos para pagar una reserva pendiente
+                  </label>
+                  <input
+                    id="minutos_expiracion_pendiente"
+                    type="number"
+                    min="1"
+                    name="minutos_expiracion_pendiente"
+                    value={config.minutos_expiracion_pendiente}
+                    onChange={handleConfigChange}
+                    className="w-full p-2 border rounded text-black"
+                  />
+                </div>
               </div>
 
               <div className="mt-6">
@@ -6,6 +6,7 @@ import Link from 'next/link';
 import Image from 'next/image';
 import { jwtDecode } from "jwt-decode";
 import { useNotification } from '../../components/NotificationContext';
+import { obtenerTodasLasPaginas } from '../../lib/paginacion';
 
 export default function CheckIn() {
   const [reservas, setReservas] = useState([]);
@@ -21,16 +22,12 @@ export default function CheckIn() {
         router.push('/login');
         return;
       }
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/`, {
+      const data = await obtenerTodasLasPaginas(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/?estado__in=pagada,checkin_aceptado&expand=habitacion`, {
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
       });
-      if (!response.ok) {
-        throw new Error('Error al obtener las reservas');
-      }
-      const data = await response.json();
       console.log('Reservas recibidas en check-in:', data);
       // Filtrar reservas pagadas y checkin_aceptado
       const paraCheckIn = data.filter(r => r.estado === 'pagada' || r.estado === 'checkin_aceptado');
@@ -60,23 +57,23 @@ export default function CheckIn() {
         router.push('/login');
         return;
       }
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${reservaId}/`, {
-        method: 'PATCH',
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${reservaId}/checkin/`, {
+        method: 'POST',
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ estado: 'checkin_aceptado' }),
       });
       if (!response.ok) {
-        throw new Error('Error al realizar el check-in');
+        const data = await response.json().catch(() => ({}));
+        throw new Error(data.error || 'Error al realizar el check-in');
       }
       addNotification('Check-In realizado', 'success');
       // Recargar la lista de reservas desde el backend
       fetchReservas();
     } catch (error) {
       console.error('Error:', error);
-      alert('Error al realizar el check-in');
+      alert(error.message || 'Error al realizar el check-in');
     }
   };
 
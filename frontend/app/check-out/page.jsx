@@ -6,6 +6,7 @@ import Link from 'next/link';
 import Image from 'next/image';
 import { jwtDecode } from "jwt-decode";
 import { useNotification } from '../../components/NotificationContext';
+import { obtenerTodasLasPaginas } from '../../lib/paginacion';
 
 export default function CheckOut() {
   const [estancias, setEstancias] = useState([]);
@@ -33,16 +34,12 @@ export default function CheckOut() {
         }
 
         // Obtener reservas con check-in aceptado del usuario
-        const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/`, {
+        const data = await obtenerTodasLasPaginas(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/?estado__in=checkin_aceptado&expand=habitacion`, {
           headers: {
             'Authorization': `Bearer ${token}`,
             'Content-Type': 'application/json',
           },
         });
-        if (!response.ok) {
-          throw new Error('Error al obtener las reservas');
-        }
-        const data = await response.json();
         // Filtrar solo reservas con check-in aceptado
         const checkinAceptado = data.filter(r => r.estado === 'checkin_aceptado');
         setEstancias(checkinAceptado);
@@ -70,13 +67,12 @@ export default function CheckOut() {
         router.push('/login');
         return;
       }
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${estanciaId}/`, {
-        method: 'PATCH',
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${estanciaId}/checkout/`, {
+        method: 'POST',
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ estado: 'checkout' }),
       });
       if (!response.ok) {
         throw new Error('Error al realizar el check-out');
@@ -8,6 +8,7 @@ import Calendar from 'react-calendar';
 import 'react-calendar/dist/Calendar.css';
 import { jwtDecode } from "jwt-decode";
 import { useNotification } from '../../components/NotificationContext';
+import { obtenerTodasLasPaginas } from '../../lib/paginacion';
 
 export default function Home() {
   const [date, setDate] = useState(new Date());
@@ -15,7 +16,6 @@ export default function Home() {
   const [greeting, setGreeting] = useState('');
   const router = useRouter();
   const [reservas, setReservas] = useState([]);
-  const [reservasFinalizadas, setReservasFinalizadas] = useState([]);
   const [loadingReservas, setLoadingReservas] = useState(true);
   const [cancelError, setCancelError] = useState('');
   const [showCalendars, setShowCalendars] = useState({});
@@ -100,25 +100,19 @@ export default function Home() {
       try {
         const token = localStorage.getItem('token');
         if (!token) return;
-        const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/`, {
+        const data = await obtenerTodasLasPaginas(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/?estado__in=pagada,checkin_aceptado&expand=habitacion`, {
           headers: {
             'Authorization': `Bearer ${token}`,
             'Content-Type': 'application/json',
           },
         });
-        if (!response.ok) return;
-        const data = await response.json();
         // Log para depuración: muestra id y estado de cada reserva
         console.log('Reservas del usuario:', data.map(r => ({id: r.id, estado: r.estado})));
-        // Reservas activas: pagada o checkin_aceptado
-        const activas = data.filter(r => r.estado === 'pagada' || r.estado === 'checkin_aceptado');
-        setReservas(activas);
-        // Reservas finalizadas: solo checkout (no cancelada)
-        const finalizadas = data.filter(r => r.estado === 'checkout');
-        setReservasFinalizadas(finalizadas);
+        // Solo las activas (pagada o checkin_aceptado): el historial de checkout
+        // crece sin límite y esta página no lo muestra
+        setReservas(data);
       } catch (e) {
         setReservas([]);
-        setReservasFinalizadas([]);
       } finally {
         setLoadingReservas(false);
       }
@@ -134,13 +128,12 @@ export default function Home() {
       // Solo cancelar reservas activas (pagada o checkin_aceptado)
       for (const reserva of reservas) {
         if (reserva.estado === 'pagada' || reserva.estado === 'checkin_aceptado') {
-          await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${reserva.id}/`, {
-            method: 'PATCH',
+          await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${reserva.id}/cancelar/`, {
+            method: 'POST',
             headers: {
               'Authorization': `Bearer ${token}`,
               'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ estado: 'cancelada' }),
           });
         }
       }
@@ -82,13 +82,12 @@ export default function Pagos() {
         return;
       }
       // Actualizar el estado de la reserva a 'pagada' en el backend
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${ultimaReserva.id}/`, {
-        method: 'PATCH',
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${ultimaReserva.id}/pagar/`, {
+        method: 'POST',
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ estado: 'pagada' }),
       });
       if (!response.ok) {
         throw new Error('Error al actualizar el estado de la reserva a pagada');
@@ -116,15 +115,12 @@ export default function Pagos() {
       }
 
       // Actualizar el estado de la reserva a 'cancelada'
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${ultimaReserva.id}/`, {
-        method: 'PATCH',
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/${ultimaReserva.id}/cancelar/`, {
+        method: 'POST',
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({
-          estado: 'cancelada'
-        }),
       });
 
       if (!response.ok) {
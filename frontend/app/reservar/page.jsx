@@ -7,6 +7,7 @@ import { jwtDecode } from "jwt-decode";
 import Calendar from 'react-calendar';
 import 'react-calendar/dist/Calendar.css';
 import { useNotification } from '../../components/NotificationContext';
+import { obtenerTodasLasPaginas } from '../../lib/paginacion';
 import Image from 'next/image';
 
 export default function Reservar() {
@@ -19,6 +20,7 @@ export default function Reservar() {
   const [dateRange, setDateRange] = useState([new Date(), new Date(Date.now() + 7 * 24 * 60 * 60 * 1000)]);
   const [reservaActiva, setReservaActiva] = useState(false);
   const [checkingReserva, setCheckingReserva] = useState(true);
+  const [cotizacion, setCotizacion] = useState(null);
   const router = useRouter();
   const { addNotification } = useNotification();
 
@@ -100,6 +102,22 @@ export default function Reservar() {
     }
   }, [dateRange]);
 
+  // Total con la tarifa dinámica del servidor para la habitación y fechas elegidas
+  useEffect(() => {
+    setCotizacion(null);
+    if (!selectedRoom || !dateRange[0] || !dateRange[1]) return;
+    const fechaInicio = dateRange[0].toISOString().split('T')[0];
+    const fechaFin = dateRange[1].toISOString().split('T')[0];
+    if (fechaInicio >= fechaFin) return;
+
+    let vigente = true;
+    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/habitaciones/${selectedRoom.id}/cotizacion/?fecha_inicio=${fechaInicio}&fecha_fin=${fechaFin}`)
+      .then(response => (response.ok ? response.json() : null))
+      .then(datos => { if (vigente) setCotizacion(datos); })
+      .catch(() => {});
+    return () => { vigente = false; };
+  }, [selectedRoom, dateRange]);
+
   useEffect(() => {
     const checkReservaActiva = async () => {
       try {
@@ -108,17 +126,12 @@ export default function Reservar() {
           setCheckingReserva(false);
           return;
         }
-        const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/`, {
+        const reservas = await obtenerTodasLasPaginas(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/reservas/?estado__in=pagada,checkin_aceptado`, {
           headers: {
             'Authorization': `Bearer ${token}`,
             'Content-Type': 'application/json',
           },
         });
-        if (!response.ok) {
-          setCheckingReserva(false);
-          return;
-        }
-        const reservas = await response.json();
         const pagadas = reservas.filter(r => r.estado === 'pagada');
         const checkinAceptado = reservas.filter(r => r.estado === 'checkin_aceptado');
         // Bloquear solo si NO hay pagadas y SÍ hay al menos una con checkin_aceptado
@@ -220,6 +233,7 @@ export default function Reservar() {
 
   const calculateTotal = () => {
     if (!selectedRoom) return 0;
+    if (cotizacion) return cotizacion.total;
     return (selectedRoom.precio * calculateNights()).toFixed(2);
   };
 
@@ -315,9 +329,11 @@ export default function Reservar() {
                     {room.imagen ? (
                       <Image
                         src={
-                          room.imagen?.startsWith('http')
-                            ? room.imagen
-                            : `${process.env.NEXT_PUBLIC_API_BASE_URL}/media/habitaciones/${room.imagen}`
+                          room.imagenes?.card?.webp || (
+                            room.imagen?.startsWith('http')
+                              ? room.imagen
+                              : `${process.env.NEXT_PUBLIC_API_BASE_URL}/media/habitaciones/${room.imagen}`
+                          )
                         }
                         alt={`Habitación ${room.numero_habitacion}`}
                         fill
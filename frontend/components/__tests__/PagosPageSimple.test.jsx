@@ -301,17 +301,42 @@ describe('🚀 PAGOS PAGE - PROFESSIONAL TESTING', () => {
 
       await waitFor(() => {
         expect(global.fetch).toHaveBeenCalledWith(
-          'http://localhost:8000/api/reservas/123/',
+          'http://localhost:8000/api/reservas/123/cancelar/',
           expect.objectContaining({
-            method: 'PATCH',
+            method: 'POST',
             headers: {
               'Authorization': 'Bearer valid-token',
               'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ estado: 'cancelada' }),
           })
         )
       })
+      expect(global.fetch.mock.calls[0][1].body).toBeUndefined()
+      await waitFor(() => {
+        expect(mockRouter.push).toHaveBeenCalledWith('/home')
+      })
+    })
+
+    it('keeps the reservation when the cancel action is rejected', async () => {
+      global.confirm.mockReturnValue(true)
+      global.fetch.mockResolvedValueOnce({
+        ok: false,
+        status: 400,
+        json: () => Promise.resolve({ detail: 'No se puede cancelar una reserva en estado checkout.' }),
+      })
+
+      render(<PagosPage />)
+
+      await waitFor(() => {
+        const cancelButton = screen.getByText('Cancelar Reserva')
+        fireEvent.click(cancelButton)
+      })
+
+      await waitFor(() => {
+        expect(global.alert).toHaveBeenCalledWith('Error al cancelar la reserva')
+      })
+      expect(localStorageMock.removeItem).not.toHaveBeenCalledWith('ultima_reserva')
+      expect(mockRouter.push).not.toHaveBeenCalledWith('/home')
     })
   })
 
@@ -357,17 +382,47 @@ describe('🚀 PAGOS PAGE - PROFESSIONAL TESTING', () => {
 
       await waitFor(() => {
         expect(global.fetch).toHaveBeenCalledWith(
-          'http://localhost:8000/api/reservas/123/',
+          'http://localhost:8000/api/reservas/123/pagar/',
           expect.objectContaining({
-            method: 'PATCH',
+            method: 'POST',
             headers: {
               'Authorization': 'Bearer valid-token',
               'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ estado: 'pagada' }),
           })
         )
       })
+      expect(global.fetch.mock.calls[0][1].body).toBeUndefined()
+      await waitFor(() => {
+        expect(mockRouter.push).toHaveBeenCalledWith('/home')
+      })
+    })
+
+    it('shows an error when the pay action is rejected', async () => {
+      global.fetch.mockResolvedValueOnce({
+        ok: false,
+        status: 400,
+        json: () => Promise.resolve({ detail: 'No se puede pagar una reserva en estado cancelada.' }),
+      })
+
+      render(<PagosPage />)
+
+      await waitFor(() => {
+        const payButton = screen.getByText('Proceder al Pago')
+        fireEvent.click(payButton)
+      })
+
+      await user.type(screen.getByPlaceholderText('1234 5678 9012 3456'), '1234567890123456')
+      await user.type(screen.getByPlaceholderText('MM/AA'), '12/24')
+      await user.type(screen.getByPlaceholderText('123'), '123')
+
+      await user.click(screen.getByRole('button', { name: 'Pagar' }))
+
+      expect(
+        await screen.findByText('Error al actualizar el estado de la reserva a pagada')
+      ).toBeInTheDocument()
+      expect(localStorageMock.removeItem).not.toHaveBeenCalledWith('ultima_reserva')
+      expect(mockRouter.push).not.toHaveBeenCalledWith('/home')
     })
   })
 }) 
\ No newline at end of file
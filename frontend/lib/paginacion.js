@@ -0,0 +1,19 @@
+// Recorre la paginación por cursor de la API siguiendo `next` hasta el final y
+// devuelve todos los resultados. También acepta respuestas sin paginar (un arreglo).
+export async function obtenerTodasLasPaginas(url, opciones = {}) {
+  const resultados = [];
+  let siguiente = url;
+  while (siguiente) {
+    const response = await fetch(siguiente, opciones);
+    if (!response.ok) {
+      throw new Error(`Error ${response.status} al obtener ${siguiente}`);
+    }
+    const body = await response.json();
+    if (Array.isArray(body)) {
+      return [...resultados, ...body];
+    }
+    resultados.push(...(body.results || []));
+    siguiente = body.next;
+  }
+  return resultados;
+}